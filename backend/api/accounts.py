@@ -2,11 +2,13 @@ from flask import Blueprint, request, jsonify
 from extensions import db, jwt, limiter
 from models import Account, CreditCard, AccountType, User
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from cache import bump_data_version, cached_response
 
 accounts_bp = Blueprint('accounts', __name__, url_prefix='/accounts')
 
 @accounts_bp.route('/', methods=['GET'])
 @jwt_required()
+@cached_response()
 def get_accounts():
     user_id = get_jwt_identity()
     accounts = Account.query.filter_by(user_id=user_id).all()
@@ -80,6 +82,7 @@ def create_account():
         db.session.add(new_cc)
 
     db.session.add(new_account)
+    bump_data_version(user_id)
     db.session.commit()
 
     return jsonify({"msg": "Account created", "id": new_account.id}), 201
@@ -136,6 +139,7 @@ def update_account(id):
             account.credit_card.payment_due_day= cc_data.get('payment_due_day', account.credit_card.payment_due_day)
             account.credit_card.interest_rate = cc_data.get('interest_rate', account.credit_card.interest_rate)
 
+    bump_data_version(user_id)
     db.session.commit()
     return jsonify({"msg": "Account updated"}), 200
 
@@ -154,6 +158,7 @@ def delete_account(id):
     account.deleted_at = datetime.utcnow()
     
     # db.session.delete(account) # Hard delete
+    bump_data_version(user_id)
     db.session.commit()
     
     return jsonify({"msg": "Account deleted"}), 200
@@ -170,11 +175,13 @@ def get_account_transactions(id):
         - category_id: Filter by category
         - type: 'income' or 'expense'
         - limit: Number of results (default 100)
-        - offset: Pagination offset
+        - cursor: next_cursor from the previous page
     """
     from datetime import datetime, timedelta
     from models import Transaction, Category
-    from sqlalchemy import func
+    from sqlalchemy import func, case, exists
+    from sqlalchemy.orm import aliased, joinedload
+    from pagination import page_args, keyset_page
     
     user_id = get_jwt_identity()
     account = Account.query.filter_by(id=id, user_id=user_id).first()
@@ -187,21 +194,22 @@ def get_account_transactions(id):
     end_date = request.args.get('end_date')
     category_id = request.args.get('category_id')
     tx_type = request.args.get('type')  # income, expense
-    limit = int(request.args.get('limit', 100))
-    offset = int(request.args.get('offset', 0))
+    try:
+        cursor, limit = page_args(default_limit=100)
+    except ValueError:
+        return jsonify({"msg": "Invalid cursor"}), 400
     
-    # Build query
-    query = Transaction.query.filter(
+    # Filters shared by the summary and the page
+    base_filters = [
         Transaction.account_id == id,
         Transaction.parent_id.is_(None),  # Only main transactions
         Transaction.transfer_id.is_(None)  # Exclude transfers
-    )
+    ]
     
-    # Apply filters
     if start_date:
         try:
             start_dt = datetime.fromisoformat(start_date)
-            query = query.filter(Transaction.date >= start_dt)
+            base_filters.append(Transaction.date >= start_dt)
         except:
             pass
             
@@ -210,55 +218,46 @@ def get_account_transactions(id):
             end_dt = datetime.fromisoformat(end_date)
             # Add 1 day to include the end date
             end_dt = end_dt.replace(hour=23, minute=59, second=59)
-            query = query.filter(Transaction.date <= end_dt)
-        except:
-            pass
-            
-    if category_id:
-        query = query.filter(Transaction.category_id == int(category_id))
-        
-    if tx_type == 'income':
-        query = query.filter(Transaction.amount > 0)
-    elif tx_type == 'expense':
-        query = query.filter(Transaction.amount < 0)
-    
-    # Get total count before pagination
-    total_count = query.count()
-    
-    # Order and paginate
-    transactions = query.order_by(Transaction.date.desc()).offset(offset).limit(limit).all()
-    
-    # Calculate summary stats
-    all_txs = Transaction.query.filter(
-        Transaction.account_id == id,
-        Transaction.parent_id.is_(None),
-        Transaction.transfer_id.is_(None)
-    )
-    
-    if start_date:
-        try:
-            all_txs = all_txs.filter(Transaction.date >= datetime.fromisoformat(start_date))
-        except:
-            pass
-    if end_date:
-        try:
-            end_dt = datetime.fromisoformat(end_date).replace(hour=23, minute=59, second=59)
-            all_txs = all_txs.filter(Transaction.date <= end_dt)
+            base_filters.append(Transaction.date <= end_dt)
         except:
             pass
     
-    all_txs = all_txs.all()
-    
-    total_income = sum(tx.amount for tx in all_txs if tx.amount > 0)
-    total_expense = sum(abs(tx.amount) for tx in all_txs if tx.amount < 0)
-    net_change = total_income - total_expense
-    
-    # Group by category for breakdown
+    # Summary: one GROUP BY category over the date range (no rows loaded)
+    is_income = Transaction.amount > 0
+    is_expense = Transaction.amount < 0
+    summary_rows = db.session.query(
+        Transaction.category_id,
+        Category.name,
+        func.coalesce(func.sum(case((is_income, Transaction.amount), else_=0)), 0),
+        func.coalesce(func.sum(case((is_expense, -Transaction.amount), else_=0)), 0),
+        func.count(case((is_income, 1))),
+        func.count(case((is_expense, 1))),
+        func.count(Transaction.id)
+    ).outerjoin(Category, Category.id == Transaction.category_id)\
+        .filter(*base_filters)\
+        .group_by(Transaction.category_id, Category.name)\
+        .all()
+    
+    total_income = 0
+    total_expense = 0
+    total_count = 0
     category_breakdown = {}
-    for tx in all_txs:
-        if tx.amount < 0:  # Expenses only for breakdown
-            cat_name = tx.category.name if tx.category else 'Sin categoría'
-            category_breakdown[cat_name] = category_breakdown.get(cat_name, 0) + abs(tx.amount)
+    for cat_id, cat_name, income, expense, income_count, expense_count, count in summary_rows:
+        total_income += income
+        total_expense += expense
+        if expense:  # Expenses only for breakdown
+            cat_name = cat_name or 'Sin categoría'
+            category_breakdown[cat_name] = category_breakdown.get(cat_name, 0) + expense
+        # Count matching the category/type filters, read off the same groups
+        if category_id and cat_id != int(category_id):
+            continue
+        if tx_type == 'income':
+            total_count += income_count
+        elif tx_type == 'expense':
+            total_count += expense_count
+        else:
+            total_count += count
+    net_change = total_income - total_expense
     
     # Sort by amount descending
     category_breakdown_list = sorted(
@@ -267,9 +266,31 @@ def get_account_transactions(id):
         reverse=True
     )
     
+    # Page: category joined, has_splits as an EXISTS column instead of loading children
+    child = aliased(Transaction)
+    has_splits = exists().where(child.parent_id == Transaction.id).label('has_splits')
+    query = db.session.query(Transaction, has_splits)\
+        .options(joinedload(Transaction.category))\
+        .filter(*base_filters)
+    
+    if category_id:
+        query = query.filter(Transaction.category_id == int(category_id))
+        
+    if tx_type == 'income':
+        query = query.filter(is_income)
+    elif tx_type == 'expense':
+        query = query.filter(is_expense)
+    
+    # Keyset page on (date, id)
+    rows, next_cursor = keyset_page(
+        query, [Transaction.date, Transaction.id],
+        lambda row: (row.Transaction.date, row.Transaction.id),
+        cursor=cursor, limit=limit
+    )
+    
     # Build response
     result = []
-    for tx in transactions:
+    for tx, tx_has_splits in rows:
         result.append({
             "id": tx.id,
             "amount": tx.amount,
@@ -278,7 +299,7 @@ def get_account_transactions(id):
             "category": tx.category.name if tx.category else 'Sin categoría',
             "category_id": tx.category_id,
             "type": "income" if tx.amount > 0 else "expense",
-            "has_splits": len(tx.children) > 0
+            "has_splits": bool(tx_has_splits)
         })
     
     return jsonify({
@@ -299,20 +320,70 @@ def get_account_transactions(id):
         },
         "pagination": {
             "limit": limit,
-            "offset": offset,
+            "next_cursor": next_cursor,
             "total": total_count,
-            "has_more": offset + limit < total_count
+            "has_more": next_cursor is not None
         }
     }), 200
 
 
+def _series_params():
+    """
+    Window and granularity for time-series endpoints.
+    start/end are ISO dates (default: the last `days` days, 30) and granularity is
+    day/week/month (the older period=daily/weekly/monthly is still accepted).
+    """
+    from datetime import datetime, timedelta
+    
+    legacy = {'daily': 'day', 'weekly': 'week', 'monthly': 'month'}
+    granularity = request.args.get('granularity') or legacy.get(request.args.get('period', 'daily'), 'day')
+    
+    end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else datetime.utcnow()
+    if request.args.get('start'):
+        start = datetime.fromisoformat(request.args['start'])
+    else:
+        start = end - timedelta(days=int(request.args.get('days', 30)))
+    return start, end, granularity
+
+
+@accounts_bp.route('/summary', methods=['GET'])
+@jwt_required()
+@cached_response(ttl=3600)
+def get_accounts_summary():
+    """
+    Gap-filled series for several accounts in one request (e.g. every sparkline on the Accounts page).
+    Query params: ids (comma separated, default all accounts), start, end, granularity.
+    """
+    from services.timeseries_service import TimeSeriesService
+    
+    user_id = get_jwt_identity()
+    query = db.session.query(Account.id).filter(Account.user_id == user_id, Account.deleted_at.is_(None))
+    
+    try:
+        if request.args.get('ids'):
+            requested = [int(i) for i in request.args['ids'].split(',') if i.strip()]
+            query = query.filter(Account.id.in_(requested))
+        start, end, granularity = _series_params()
+        account_ids = [row.id for row in query.order_by(Account.id)]
+        series = TimeSeriesService.series(user_id, account_ids, start, end, granularity)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    
+    return jsonify({
+        "granularity": granularity,
+        "periods": series["periods"],
+        "accounts": {str(k): v for k, v in series["accounts"].items()}
+    }), 200
+
+
 @accounts_bp.route('/<int:id>/summary', methods=['GET'])
 @jwt_required()
 def get_account_summary(id):
-    """Get daily/weekly/monthly summary for an account"""
-    from datetime import datetime, timedelta
-    from models import Transaction
-    from sqlalchemy import func, extract
+    """
+    Daily/weekly/monthly summary for an account as a dense, zero-filled series:
+    parallel arrays of periods, income, expense, net and transactions.
+    """
+    from services.timeseries_service import TimeSeriesService
     
     user_id = get_jwt_identity()
     account = Account.query.filter_by(id=id, user_id=user_id).first()
@@ -320,51 +391,11 @@ def get_account_summary(id):
     if not account:
         return jsonify({"msg": "Account not found"}), 404
     
-    period = request.args.get('period', 'daily')  # daily, weekly, monthly
-    days = int(request.args.get('days', 30))  # Number of days to look back
-    
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    transactions = Transaction.query.filter(
-        Transaction.account_id == id,
-        Transaction.date >= start_date,
-        Transaction.parent_id.is_(None),
-        Transaction.transfer_id.is_(None)
-    ).order_by(Transaction.date).all()
-    
-    # Group by period
-    grouped_data = {}
-    
-    for tx in transactions:
-        if period == 'daily':
-            key = tx.date.strftime('%Y-%m-%d')
-        elif period == 'weekly':
-            # Get Monday of the week
-            monday = tx.date - timedelta(days=tx.date.weekday())
-            key = monday.strftime('%Y-%m-%d')
-        else:  # monthly
-            key = tx.date.strftime('%Y-%m')
-        
-        if key not in grouped_data:
-            grouped_data[key] = {'income': 0, 'expense': 0, 'transactions': 0}
-        
-        if tx.amount > 0:
-            grouped_data[key]['income'] += tx.amount
-        else:
-            grouped_data[key]['expense'] += abs(tx.amount)
-        grouped_data[key]['transactions'] += 1
-    
-    # Convert to list
-    result = [
-        {
-            'period': k,
-            'income': v['income'],
-            'expense': v['expense'],
-            'net': v['income'] - v['expense'],
-            'transactions': v['transactions']
-        }
-        for k, v in sorted(grouped_data.items())
-    ]
+    try:
+        start, end, granularity = _series_params()
+        series = TimeSeriesService.series(user_id, [id], start, end, granularity)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
     
     return jsonify({
         "account": {
@@ -372,8 +403,9 @@ def get_account_summary(id):
             "name": account.name,
             "current_balance": account.balance
         },
-        "period_type": period,
-        "data": result
+        "period_type": granularity,
+        "periods": series["periods"],
+        **series["accounts"][id]
     }), 200
 
 @accounts_bp.route('/recalculate-balances', methods=['POST'])
@@ -385,48 +417,21 @@ def recalculate_balances():
     Útil cuando los balances están desincronizados.
     """
     user_id = get_jwt_identity()
-    from models import Transaction
-    from sqlalchemy import func
+    from services.balance_service import BalanceService
+    
+    dry_run = request.args.get('dry_run', 'false').lower() == 'true'
     
     try:
-        # Obtener todas las cuentas del usuario
-        accounts = Account.query.filter_by(user_id=user_id, deleted_at=None).all()
-        
-        updated_accounts = []
-        
-        for account in accounts:
-            # Calcular el balance correcto: suma de todas las transacciones principales
-            # Solo transacciones principales (parent_id is None)
-            # Incluye transfers porque ambos afectan el balance correctamente
-            result = db.session.query(
-                func.coalesce(func.sum(Transaction.amount), 0.0)
-            ).filter(
-                Transaction.account_id == account.id,
-                Transaction.parent_id.is_(None),  # Solo transacciones principales
-                Transaction.deleted_at.is_(None)   # No incluir eliminadas
-            ).scalar()
-            
-            old_balance = account.balance
-            new_balance = float(result) if result else 0.0
-            
-            # Actualizar el balance
-            account.balance = new_balance
-            
-            if abs(old_balance - new_balance) > 0.01:  # Solo reportar si hubo cambio significativo
-                updated_accounts.append({
-                    "id": account.id,
-                    "name": account.name,
-                    "old_balance": old_balance,
-                    "new_balance": new_balance,
-                    "difference": new_balance - old_balance
-                })
-        
-        db.session.commit()
+        # Un solo agregado GROUP BY account_id; solo se actualizan (y reportan) las cuentas desfasadas
+        # Incluye transfers porque ambos afectan el balance correctamente
+        checked_count = Account.query.filter_by(user_id=user_id, deleted_at=None).count()
+        updated_accounts = BalanceService.recalculate(user_id=user_id, dry_run=dry_run)
         
         return jsonify({
-            "msg": f"Balances recalculados para {len(accounts)} cuentas",
+            "msg": f"Balances recalculados para {checked_count} cuentas",
             "updated_count": len(updated_accounts),
-            "updated_accounts": updated_accounts
+            "updated_accounts": updated_accounts,
+            "dry_run": dry_run
         }), 200
         
     except Exception as e:
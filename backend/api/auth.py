@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from extensions import db, jwt, limiter
 from models import User, Category
+from cache import bump_data_version
+from services.exchange_rate_service import SUPPORTED_CURRENCIES
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -70,7 +72,8 @@ def login():
             "user": {
                 "id": user.id,
                 "username": user.username,
-                "email": user.email
+                "email": user.email,
+                "base_currency": user.base_currency
             }
         }), 200
 
@@ -95,6 +98,7 @@ def me():
         "id": user.id,
         "username": user.username,
         "email": user.email,
+        "base_currency": user.base_currency,
         "created_at": user.created_at.isoformat() if user.created_at else None
     }), 200
 
@@ -131,6 +135,15 @@ def update_profile():
                     return jsonify({"msg": "El email ya está registrado"}), 409
                 user.email = new_email
         
+        # Update dashboard base currency if provided (null goes back to the default)
+        if 'base_currency' in data:
+            base_currency = (data['base_currency'] or '').strip().upper() or None
+            if base_currency is not None and base_currency not in SUPPORTED_CURRENCIES:
+                return jsonify({"msg": f"Moneda no soportada: {base_currency}"}), 400
+            if base_currency != user.base_currency:
+                user.base_currency = base_currency
+                bump_data_version(user.id)
+        
         db.session.commit()
         
         return jsonify({
@@ -138,7 +151,8 @@ def update_profile():
             "user": {
                 "id": user.id,
                 "username": user.username,
-                "email": user.email
+                "email": user.email,
+                "base_currency": user.base_currency
             }
         }), 200
         
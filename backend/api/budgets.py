@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
 from models import Budget, Category
+from services.dashboard_service import DashboardService
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from cache import bump_data_version, cached_response
 from datetime import datetime
 
 budgets_bp = Blueprint('budgets', __name__, url_prefix='/budgets')
@@ -66,6 +68,7 @@ def create_budget():
     )
     
     db.session.add(budget)
+    bump_data_version(user_id)
     db.session.commit()
     
     return jsonify({
@@ -90,6 +93,7 @@ def update_budget(id):
     if 'period' in data:
         budget.period = data['period']
     
+    bump_data_version(user_id)
     db.session.commit()
     
     return jsonify({'msg': 'Budget updated'}), 200
@@ -105,40 +109,31 @@ def delete_budget(id):
         return jsonify({'msg': 'Budget not found'}), 404
     
     db.session.delete(budget)
+    bump_data_version(user_id)
     db.session.commit()
     
     return jsonify({'msg': 'Budget deleted'}), 200
 
 @budgets_bp.route('/status', methods=['GET'])
 @jwt_required()
+@cached_response(ttl=3600)
 def get_budget_status():
     """Get budget status with actual spending"""
     user_id = get_jwt_identity()
     
-    from models import Transaction, Account
-    from datetime import datetime, timedelta
-    from sqlalchemy import func, extract
-    
     # Get current month
     today = datetime.utcnow()
     month_start = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     
     budgets = Budget.query.filter_by(user_id=user_id).all()
     
+    # Current month spending per category from the monthly rollups (split children included)
+    spent = DashboardService.totals_by_category(user_id, month_start, include_splits=True)
+    
     result = []
     for budget in budgets:
         # Calculate actual spending for this category in current month
-        actual = 0
-        
-        txs = Transaction.query.join(Account).filter(
-            Account.user_id == user_id,
-            Transaction.category_id == budget.category_id,
-            Transaction.date >= month_start,
-            Transaction.amount < 0,  # expenses only
-            Transaction.transfer_id == None
-        ).all()
-        
-        actual = sum(abs(tx.amount) for tx in txs)
+        actual = spent.get(budget.category_id, (0.0, 0.0))[1]
         
         utilization = (actual / budget.amount) * 100 if budget.amount > 0 else 0
         
@@ -157,29 +152,20 @@ def get_budget_status():
 
 @budgets_bp.route('/alerts', methods=['GET'])
 @jwt_required()
+@cached_response(ttl=3600)
 def get_budget_alerts():
     """Get budget alerts (over 80% or over limit)"""
     user_id = get_jwt_identity()
     
-    from models import Transaction, Account
-    from datetime import datetime
-    
     today = datetime.utcnow()
     month_start = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     
     budgets = Budget.query.filter_by(user_id=user_id).all()
+    spent = DashboardService.totals_by_category(user_id, month_start, include_splits=True)
     
     alerts = []
     for budget in budgets:
-        txs = Transaction.query.join(Account).filter(
-            Account.user_id == user_id,
-            Transaction.category_id == budget.category_id,
-            Transaction.date >= month_start,
-            Transaction.amount < 0,
-            Transaction.transfer_id == None
-        ).all()
-        
-        actual = sum(abs(tx.amount) for tx in txs)
+        actual = spent.get(budget.category_id, (0.0, 0.0))[1]
         utilization = (actual / budget.amount) * 100 if budget.amount > 0 else 0
         
         if utilization >= 100:
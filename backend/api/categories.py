@@ -1,20 +1,23 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
-from models import Category
+from models import Category, Rule
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from cache import bump_data_version, cached_response
+from services.reference_service import ReferenceService
 
 categories_bp = Blueprint('categories', __name__, url_prefix='/categories')
 
 @categories_bp.route('/', methods=['GET'])
 @jwt_required()
+@cached_response()
 def get_categories():
     user_id = get_jwt_identity()
-    categories = Category.query.filter_by(user_id=user_id).all()
+    categories = ReferenceService.categories(user_id)
     return jsonify([{
-        "id": c.id,
-        "name": c.name,
-        "type": c.type # expense, income
-    } for c in categories]), 200
+        "id": cat_id,
+        "name": c["name"],
+        "type": c["type"] # expense, income
+    } for cat_id, c in categories.items()]), 200
 
 @categories_bp.route('/', methods=['POST'])
 @jwt_required()
@@ -30,6 +33,7 @@ def create_category():
         
     new_cat = Category(name=name, type=type_str, user_id=user_id)
     db.session.add(new_cat)
+    bump_data_version(user_id)
     db.session.commit()
     
     return jsonify({"id": new_cat.id, "name": new_cat.name}), 201
@@ -40,7 +44,10 @@ def delete_category(id):
     user_id = get_jwt_identity()
     cat = Category.query.filter_by(id=id, user_id=user_id).first()
     if cat:
+        # Rules can't point to a missing category
+        Rule.query.filter_by(category_id=cat.id, user_id=user_id).delete(synchronize_session=False)
         db.session.delete(cat)
+        bump_data_version(user_id)
         db.session.commit()
         return jsonify({"msg": "Deleted"}), 200
     return jsonify({"msg": "Not found"}), 404
@@ -67,13 +74,15 @@ def seed_categories():
         ("Cuidado Personal", "expense"),
     ]
     
+    existing = {(c["name"], c["type"]) for c in ReferenceService.categories(user_id).values()}
     added_count = 0
     for name, type_ in defaults:
-        exists = Category.query.filter_by(user_id=user_id, name=name, type=type_).first()
-        if not exists:
+        if (name, type_) not in existing:
             cat = Category(name=name, type=type_, user_id=user_id)
             db.session.add(cat)
             added_count += 1
             
+    if added_count:
+        bump_data_version(user_id)
     db.session.commit()
     return jsonify({"msg": f"Seeded {added_count} categories"}), 201
@@ -1,131 +1,23 @@
+import math
+
 from flask import Blueprint, request, jsonify
 from extensions import db
 from models import ExchangeRate
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
-import requests
+from services.exchange_rate_service import ExchangeRateService, UNSUPPORTED_BY_API
+from services.rate_history_service import RateHistoryService
 
 exchange_rates_bp = Blueprint('exchange_rates', __name__, url_prefix='/exchange-rates')
 
-# Supported currencies
-SUPPORTED_CURRENCIES = ['COP', 'EUR', 'USD', 'CZK']
-
-# Cache for API rates (in-memory, could use Redis in production)
-_rates_cache = {
-    'rates': {},
-    'last_updated': None
-}
-
-def fetch_live_rates(base='EUR'):
-    """
-    Fetch live exchange rates from frankfurter.app API
-    Returns rates relative to base currency
-    """
-    try:
-        # Frankfurter API (free, no key needed)
-        url = f"https://api.frankfurter.app/latest?from={base}"
-        response = requests.get(url, timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return data.get('rates', {})
-    except Exception as e:
-        print(f"Error fetching rates: {e}")
-    
-    return None
-
-# Hardcoded fallback rates (realistic rates as of 2024)
-# COP is not supported by ECB/Frankfurter API, so we need manual rates
-FALLBACK_RATES = {
-    'COP_EUR': 0.00022,      # 1 COP = 0.00022 EUR (1 EUR ≈ 4500 COP)
-    'COP_USD': 0.00024,      # 1 COP = 0.00024 USD (1 USD ≈ 4200 COP)
-    'COP_CZK': 0.0057,       # 1 COP = 0.0057 CZK (1 CZK ≈ 175 COP)
-    'EUR_COP': 4500,         # 1 EUR = 4500 COP
-    'EUR_USD': 1.08,         # 1 EUR = 1.08 USD
-    'EUR_CZK': 25.3,         # 1 EUR = 25.3 CZK
-    'USD_COP': 4200,         # 1 USD = 4200 COP
-    'USD_EUR': 0.93,         # 1 USD = 0.93 EUR
-    'USD_CZK': 23.5,         # 1 USD = 23.5 CZK
-    'CZK_COP': 175,          # 1 CZK = 175 COP
-    'CZK_EUR': 0.04,         # 1 CZK = 0.04 EUR
-    'CZK_USD': 0.043         # 1 CZK = 0.043 USD
-}
-
-# Currencies NOT supported by Frankfurter API (ECB doesn't track them)
-UNSUPPORTED_BY_API = ['COP']
-
-def get_all_rates():
-    """
-    Get rates for all supported currency pairs
-    Returns a dict like {'COP_EUR': 0.00022, 'EUR_COP': 4500, ...}
-    
-    Note: COP is not supported by the ECB/Frankfurter API, so we use
-    fallback rates for any pair involving COP.
-    """
-    global _rates_cache
-    
-    # Check cache (valid for 1 hour)
-    if (_rates_cache['last_updated'] and 
-        datetime.utcnow() - _rates_cache['last_updated'] < timedelta(hours=1)):
-        return _rates_cache['rates']
-    
-    all_rates = {}
-    api_success = False
-    
-    # Try to fetch from API
-    try:
-        # Get EUR-based rates first
-        eur_rates = fetch_live_rates('EUR')
-        if eur_rates:
-            api_success = True
-            # Add EUR as base
-            eur_rates['EUR'] = 1.0
-            
-            # Calculate cross rates for API-supported currencies
-            api_supported = [c for c in SUPPORTED_CURRENCIES if c not in UNSUPPORTED_BY_API]
-            
-            for from_curr in api_supported:
-                for to_curr in api_supported:
-                    if from_curr == to_curr:
-                        continue
-                    
-                    key = f"{from_curr}_{to_curr}"
-                    
-                    if from_curr == 'EUR':
-                        rate = eur_rates.get(to_curr)
-                    elif to_curr == 'EUR':
-                        from_rate = eur_rates.get(from_curr)
-                        rate = 1 / from_rate if from_rate else None
-                    else:
-                        # Cross rate: from_curr -> EUR -> to_curr
-                        from_rate = eur_rates.get(from_curr)
-                        to_rate = eur_rates.get(to_curr)
-                        if from_rate and to_rate:
-                            rate = (1 / from_rate) * to_rate
-                        else:
-                            rate = None
-                    
-                    if rate:
-                        all_rates[key] = rate
-    except Exception as e:
-        print(f"Error calculating rates from API: {e}")
-    
-    # For any COP pairs or missing rates, use fallback values
-    for key, fallback_rate in FALLBACK_RATES.items():
-        if key not in all_rates:
-            all_rates[key] = fallback_rate
-    
-    # Update cache
-    _rates_cache['rates'] = all_rates
-    _rates_cache['last_updated'] = datetime.utcnow() if api_success else None
-    
-    return all_rates
+MAX_BATCH_ITEMS = 10000
 
 @exchange_rates_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_exchange_rates():
-    """Get all current exchange rates"""
-    rates = get_all_rates()
+    """Get all current exchange rates (last known; refreshed in the background)"""
+    rates = ExchangeRateService.get_rates()
+    status = ExchangeRateService.status()
     
     # Format response
     result = []
@@ -139,8 +31,10 @@ def get_exchange_rates():
     
     return jsonify({
         'rates': result,
-        'last_updated': _rates_cache.get('last_updated', datetime.utcnow()).isoformat() if _rates_cache.get('last_updated') else None,
-        'source': 'live' if _rates_cache.get('last_updated') else 'fallback'
+        'last_updated': status['last_updated'].isoformat() if status['last_updated'] else None,
+        'source': 'live' if status['last_updated'] else 'fallback',
+        'stale': status['stale'],
+        'retry_in': status['retry_in']
     }), 200
 
 @exchange_rates_bp.route('/convert', methods=['GET'])
@@ -161,20 +55,19 @@ def convert_currency():
             'source': 'live'
         }), 200
     
-    rates = get_all_rates()
-    key = f"{from_currency}_{to_currency}"
-    rate = rates.get(key)
+    matrix = ExchangeRateService.get_matrix()
     
-    # If rate not found, use fallback
-    if rate is None:
-        rate = FALLBACK_RATES.get(key, 1)
+    # Unknown currency: no conversion
+    if from_currency not in matrix.index or to_currency not in matrix.index:
+        rate = 1
         source = 'fallback'
     else:
+        rate = matrix.rate(from_currency, to_currency)
         # Check if this pair involves COP (which uses fallback rates)
         if from_currency in UNSUPPORTED_BY_API or to_currency in UNSUPPORTED_BY_API:
             source = 'fallback'
         else:
-            source = 'live' if _rates_cache.get('last_updated') else 'fallback'
+            source = 'live' if ExchangeRateService.is_live() else 'fallback'
     
     converted = amount * rate
     
@@ -187,18 +80,55 @@ def convert_currency():
         'source': source
     }), 200
 
+@exchange_rates_bp.route('/convert/batch', methods=['POST'])
+@jwt_required()
+def convert_batch():
+    """
+    Convert many amounts at once: {"items": [{"amount": 10, "from": "USD", "to": "COP"}, ...]}.
+    Results are in item order; all items use the same snapshot of rates.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return jsonify({'msg': 'items must be a non-empty list'}), 400
+    if len(items) > MAX_BATCH_ITEMS:
+        return jsonify({'msg': f'Too many items (max {MAX_BATCH_ITEMS})'}), 400
+
+    try:
+        amounts = [float(item.get('amount', 1)) for item in items]
+        from_codes = [str(item.get('from', '')).upper() for item in items]
+        to_codes = [str(item.get('to', '')).upper() for item in items]
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({'msg': 'Each item needs a numeric amount, from and to'}), 400
+    # float() accepts "nan" and "inf", which jsonify would emit as invalid JSON
+    if not all(math.isfinite(amount) for amount in amounts):
+        return jsonify({'msg': 'Amounts must be finite numbers'}), 400
+
+    matrix = ExchangeRateService.get_matrix()
+    try:
+        converted, rates = matrix.convert(amounts, from_codes, to_codes)
+    except KeyError as e:
+        return jsonify({'msg': f'Unsupported currency: {e.args[0]}'}), 400
+    if not all(math.isfinite(value) for value in converted):
+        return jsonify({'msg': 'Amount out of range'}), 400
+
+    status = ExchangeRateService.status()
+    return jsonify({
+        'results': [{'converted': round(value, 2), 'rate': rate} for value, rate in zip(converted, rates)],
+        'count': len(converted),
+        'last_updated': status['last_updated'].isoformat() if status['last_updated'] else None,
+        'source': 'live' if status['last_updated'] else 'fallback'
+    }), 200
+
 @exchange_rates_bp.route('/refresh', methods=['POST'])
 @jwt_required()
 def refresh_rates():
-    """Force refresh of exchange rates from API"""
-    global _rates_cache
-    
-    # Clear cache to force refresh
-    _rates_cache['last_updated'] = None
+    """Force refresh of exchange rates from API (joins a refresh already in progress)"""
+    refreshed = ExchangeRateService.refresh()
+    rates = ExchangeRateService.get_rates()
+    status = ExchangeRateService.status()
     
-    rates = get_all_rates()
-    
-    if _rates_cache.get('last_updated'):
+    if refreshed:
         # Save to database for historical tracking
         for key, rate in rates.items():
             from_curr, to_curr = key.split('_')
@@ -218,12 +148,13 @@ def refresh_rates():
         return jsonify({
             'msg': 'Tasas actualizadas desde API en tiempo real',
             'count': len(rates),
-            'last_updated': _rates_cache['last_updated'].isoformat()
+            'last_updated': status['last_updated'].isoformat()
         }), 200
     else:
         return jsonify({
             'msg': 'No se pudo conectar con la API, usando tasas de respaldo',
-            'count': len(rates)
+            'count': len(rates),
+            'retry_in': status['retry_in']
         }), 200
 
 @exchange_rates_bp.route('/history', methods=['GET'])
@@ -246,3 +177,26 @@ def get_rate_history():
         'date': r.date.isoformat(),
         'rate': r.rate
     } for r in rates]), 200
+
+@exchange_rates_bp.route('/at', methods=['GET'])
+@jwt_required()
+def get_rate_at():
+    """Rate of a currency pair as of a date (latest stored snapshot on or before it)"""
+    from_currency = request.args.get('from', 'EUR').upper()
+    to_currency = request.args.get('to', 'COP').upper()
+    try:
+        date = datetime.fromisoformat(request.args['date']) if request.args.get('date') else datetime.utcnow()
+    except ValueError:
+        return jsonify({'msg': 'Invalid date'}), 400
+
+    try:
+        rate = RateHistoryService.get().rate_at(from_currency, to_currency, date)
+    except KeyError as e:
+        return jsonify({'msg': f'Unsupported currency: {e.args[0]}'}), 400
+
+    return jsonify({
+        'from': from_currency,
+        'to': to_currency,
+        'date': date.date().isoformat(),
+        'rate': rate
+    }), 200
@@ -1,92 +1,38 @@
-from flask import Blueprint, request, jsonify, Response
-from extensions import db
-from models import Transaction, Account, Category, Transfer
+from flask import Blueprint, request, jsonify, Response, stream_with_context, send_file, current_app
+from extensions import db, limiter
+from models import ExportJob
+from services.export_service import ExportService
+from services.export_job_service import ExportJobService
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
-import csv
-import io
+import os
 
 export_bp = Blueprint('export', __name__, url_prefix='/export')
 
+def _csv_response(chunks, filename):
+    """Streams a CSV generator; the request context stays open until the last chunk."""
+    return Response(
+        stream_with_context(chunks),
+        mimetype='text/csv',
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}',
+            'Content-Type': 'text/csv; charset=utf-8'
+        }
+    )
+
 @export_bp.route('/transactions', methods=['GET'])
 @jwt_required()
 def export_transactions():
-    """Export transactions to CSV"""
+    """Export transactions to CSV (streamed)"""
     user_id = get_jwt_identity()
     
     # Get query params for filtering
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
-    account_id = request.args.get('account_id')
-    category_id = request.args.get('category_id')
-    tx_type = request.args.get('type')  # income, expense, all
-    
-    # Build query
-    query = Transaction.query.join(Account).filter(
-        Account.user_id == user_id,
-        Transaction.deleted_at == None,
-        Transaction.parent_id == None  # Only main transactions
-    )
-    
-    if start_date:
-        try:
-            start = datetime.fromisoformat(start_date)
-            query = query.filter(Transaction.date >= start)
-        except:
-            pass
-    
-    if end_date:
-        try:
-            end = datetime.fromisoformat(end_date)
-            query = query.filter(Transaction.date <= end)
-        except:
-            pass
-    
-    if account_id:
-        query = query.filter(Transaction.account_id == int(account_id))
-    
-    if category_id:
-        query = query.filter(Transaction.category_id == int(category_id))
-    
-    if tx_type == 'income':
-        query = query.filter(Transaction.amount > 0)
-    elif tx_type == 'expense':
-        query = query.filter(Transaction.amount < 0)
-    
-    transactions = query.order_by(Transaction.date.desc()).all()
-    
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Header
-    writer.writerow([
-        'Fecha',
-        'Descripción',
-        'Monto',
-        'Tipo',
-        'Cuenta',
-        'Categoría',
-        'ID'
-    ])
-    
-    # Data rows
-    for tx in transactions:
-        tx_type_label = 'Ingreso' if tx.amount > 0 else 'Gasto'
-        if tx.transfer_id:
-            tx_type_label = 'Transferencia'
-        
-        writer.writerow([
-            tx.date.strftime('%Y-%m-%d') if tx.date else '',
-            tx.description or '',
-            tx.amount,
-            tx_type_label,
-            tx.account.name if tx.account else '',
-            tx.category.name if tx.category else 'Sin categoría',
-            tx.id
-        ])
-    
-    output.seek(0)
+    try:
+        filters = ExportService.transaction_filters(request.args)
+    except ValueError:
+        return jsonify({"msg": "Invalid account_id or category_id"}), 400
     
     # Generate filename with date range
     filename = f"transacciones_{datetime.now().strftime('%Y%m%d')}"
@@ -96,158 +42,106 @@ def export_transactions():
         filename += f"_hasta_{end_date}"
     filename += ".csv"
     
-    return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={
-            'Content-Disposition': f'attachment; filename={filename}',
-            'Content-Type': 'text/csv; charset=utf-8'
-        }
-    )
+    return _csv_response(ExportService.transactions_csv(user_id, **filters), filename)
 
 @export_bp.route('/accounts', methods=['GET'])
 @jwt_required()
 def export_accounts():
     """Export accounts summary to CSV"""
     user_id = get_jwt_identity()
-    
-    accounts = Account.query.filter_by(user_id=user_id, deleted_at=None).all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    writer.writerow([
-        'Nombre',
-        'Tipo',
-        'Institución',
-        'Moneda',
-        'Saldo',
-        'ID'
-    ])
-    
-    type_labels = {
-        'cash': 'Efectivo',
-        'bank': 'Banco',
-        'credit': 'Crédito',
-        'investment': 'Inversión'
-    }
-    
-    for acc in accounts:
-        writer.writerow([
-            acc.name,
-            type_labels.get(acc.type.value, acc.type.value) if acc.type else '',
-            acc.institution or '',
-            acc.currency_code,
-            acc.balance,
-            acc.id
-        ])
-    
-    output.seek(0)
-    
-    return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={
-            'Content-Disposition': f'attachment; filename=cuentas_{datetime.now().strftime("%Y%m%d")}.csv',
-            'Content-Type': 'text/csv; charset=utf-8'
-        }
-    )
+    return _csv_response(ExportService.accounts_csv(user_id), f'cuentas_{datetime.now().strftime("%Y%m%d")}.csv')
 
 @export_bp.route('/full-report', methods=['GET'])
 @jwt_required()
 def export_full_report():
-    """Export a full financial report"""
+    """Export a full financial report (summary, then streamed transaction detail)"""
     user_id = get_jwt_identity()
+    year, month = ExportService.report_period(request.args)
+    period_label = ExportService.period_label(year, month)
+    filename = f"reporte_financiero_{period_label.replace('/', '-')}.csv"
     
-    # Get date range
-    year = request.args.get('year', datetime.now().year)
-    month = request.args.get('month')  # Optional
-    
-    # Build query
-    query = Transaction.query.join(Account).filter(
-        Account.user_id == user_id,
-        Transaction.deleted_at == None,
-        Transaction.parent_id == None
-    )
+    return _csv_response(ExportService.full_report_csv(user_id, year=year, month=month), filename)
+
+@export_bp.route('/jobs', methods=['POST'])
+@jwt_required()
+@limiter.limit("10 per minute")
+def create_export_job():
+    """
+    Queue an export: {"kind": "transactions" | "accounts" | "full-report",
+    "params": {same filters as the GET endpoints}, "gzip": false}.
+    Poll GET /export/jobs/<id> until status is done, then download.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    params = data.get('params') or {}
+    if not isinstance(params, dict):
+        return jsonify({"msg": "params must be an object"}), 400
     
     try:
-        year = int(year)
-        from sqlalchemy import extract
-        query = query.filter(extract('year', Transaction.date) == year)
-        
-        if month:
-            month = int(month)
-            query = query.filter(extract('month', Transaction.date) == month)
-    except:
-        pass
+        job = ExportJobService.create(int(user_id), data.get('kind'), params, compress=bool(data.get('gzip')))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
     
-    transactions = query.order_by(Transaction.date.desc()).all()
-    
-    # Calculate summary
-    total_income = sum(tx.amount for tx in transactions if tx.amount > 0)
-    total_expense = sum(abs(tx.amount) for tx in transactions if tx.amount < 0)
-    net = total_income - total_expense
-    
-    # Group by category
-    by_category = {}
-    for tx in transactions:
-        cat_name = tx.category.name if tx.category else 'Sin categoría'
-        if cat_name not in by_category:
-            by_category[cat_name] = {'income': 0, 'expense': 0}
-        if tx.amount > 0:
-            by_category[cat_name]['income'] += tx.amount
-        else:
-            by_category[cat_name]['expense'] += abs(tx.amount)
-    
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Summary section
-    writer.writerow(['=== RESUMEN FINANCIERO ==='])
-    period_label = f"{year}" if not month else f"{month}/{year}"
-    writer.writerow(['Período', period_label])
-    writer.writerow(['Total Ingresos', total_income])
-    writer.writerow(['Total Gastos', total_expense])
-    writer.writerow(['Balance Neto', net])
-    writer.writerow([])
-    
-    # By category section
-    writer.writerow(['=== POR CATEGORÍA ==='])
-    writer.writerow(['Categoría', 'Ingresos', 'Gastos', 'Neto'])
-    for cat_name, values in sorted(by_category.items()):
-        cat_net = values['income'] - values['expense']
-        writer.writerow([cat_name, values['income'], values['expense'], cat_net])
-    writer.writerow([])
-    
-    # Transactions detail
-    writer.writerow(['=== DETALLE DE TRANSACCIONES ==='])
-    writer.writerow(['Fecha', 'Descripción', 'Monto', 'Tipo', 'Cuenta', 'Categoría'])
-    
-    for tx in transactions:
-        tx_type_label = 'Ingreso' if tx.amount > 0 else 'Gasto'
-        if tx.transfer_id:
-            tx_type_label = 'Transferencia'
-        
-        writer.writerow([
-            tx.date.strftime('%Y-%m-%d') if tx.date else '',
-            tx.description or '',
-            tx.amount,
-            tx_type_label,
-            tx.account.name if tx.account else '',
-            tx.category.name if tx.category else 'Sin categoría'
-        ])
-    
-    output.seek(0)
-    
-    filename = f"reporte_financiero_{period_label.replace('/', '-')}.csv"
-    
-    return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={
-            'Content-Disposition': f'attachment; filename={filename}',
-            'Content-Type': 'text/csv; charset=utf-8'
-        }
-    )
+    return jsonify({"msg": "Export queued", **ExportJobService.status(job)}), 202
 
+@export_bp.route('/jobs', methods=['GET'])
+@jwt_required()
+def get_export_jobs():
+    """The user's export jobs, newest first"""
+    user_id = get_jwt_identity()
+    ExportJobService.cleanup()
+    jobs = ExportJob.query.filter_by(user_id=user_id)\
+        .order_by(ExportJob.created_at.desc(), ExportJob.id.desc())\
+        .limit(50)\
+        .all()
+    return jsonify([ExportJobService.status(job) for job in jobs]), 200
+
+@export_bp.route('/jobs/<int:id>', methods=['GET'])
+@jwt_required()
+def get_export_job(id):
+    user_id = get_jwt_identity()
+    ExportJobService.cleanup()
+    job = ExportJob.query.filter_by(id=id, user_id=user_id).first()
+    if not job:
+        return jsonify({"msg": "Export job not found"}), 404
+    return jsonify(ExportJobService.status(job)), 200
+
+@export_bp.route('/jobs/<int:id>/download', methods=['GET'])
+@jwt_required()
+def download_export_job(id):
+    """
+    The artifact. Supports Range requests (resumable downloads); with
+    EXPORT_ACCEL_REDIRECT set, nginx serves the file instead.
+    """
+    user_id = get_jwt_identity()
+    job = ExportJob.query.filter_by(id=id, user_id=user_id).first()
+    if not job:
+        return jsonify({"msg": "Export job not found"}), 404
+    path = ExportJobService.artifact_path(job)
+    if job.status != 'done' or not path or not os.path.exists(path):
+        return jsonify({"msg": "Export is not ready", "status": job.status}), 409
+    
+    download_name = ExportJobService.download_name(job)
+    mimetype = 'application/gzip' if job.compress else 'text/csv'
+    accel_prefix = current_app.config.get('EXPORT_ACCEL_REDIRECT')
+    if accel_prefix:
+        response = Response(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + job.file_name
+        response.headers['Content-Disposition'] = f'attachment; filename={download_name}'
+        return response
+    
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=download_name,
+                     conditional=True, max_age=0)
+
+@export_bp.route('/jobs/<int:id>', methods=['DELETE'])
+@jwt_required()
+def delete_export_job(id):
+    user_id = get_jwt_identity()
+    job = ExportJob.query.filter_by(id=id, user_id=user_id).first()
+    if not job:
+        return jsonify({"msg": "Export job not found"}), 404
+    if job.status in ('pending', 'running'):
+        return jsonify({"msg": "Export is still running"}), 409
+    ExportJobService.delete(job)
+    db.session.commit()
+    return jsonify({"msg": "Export job deleted"}), 200
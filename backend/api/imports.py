@@ -0,0 +1,69 @@
+from flask import Blueprint, request, jsonify, current_app
+from extensions import db, limiter
+from services.import_service import ImportService, BANK_PROFILES
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+import_bp = Blueprint('import', __name__, url_prefix='/import')
+
+@import_bp.route('/profiles', methods=['GET'])
+@jwt_required()
+def get_profiles():
+    """Bank profiles available for CSV import"""
+    return jsonify([
+        {"id": key, "name": profile['name']}
+        for key, profile in BANK_PROFILES.items()
+    ]), 200
+
+@import_bp.route('/', methods=['POST'])
+@jwt_required()
+@limiter.limit("5 per minute")
+def import_statement():
+    """
+    Import a bank statement (multipart/form-data).
+    Fields:
+        - file: CSV, OFX or QFX file
+        - account_id: Target account
+        - profile: Bank profile for CSV files (default 'generic', see /import/profiles)
+        - format: csv, ofx or qfx (default: from the file extension)
+
+    Rows are committed in chunks. If a chunk fails to store, or the file can't
+    be read further, the chunks before it stay imported and the import stops:
+    the response is 207 with the stats of what was stored ("imported" counts
+    only committed rows) and an "error" {line, msg} for where it stopped.
+    Rows that can't be parsed (bad date, missing or non-finite amount) are
+    skipped and listed in "errors". Nothing is stored when the answer is 400
+    (bad account, format, profile or file) or 500.
+    """
+    user_id = get_jwt_identity()
+    upload = request.files.get('file')
+    account_id = request.form.get('account_id', type=int)
+    
+    if not upload or not upload.filename:
+        return jsonify({"msg": "file is required"}), 400
+    if not account_id:
+        return jsonify({"msg": "account_id is required"}), 400
+    
+    fmt = (request.form.get('format') or upload.filename.rsplit('.', 1)[-1]).lower()
+    profile = request.form.get('profile', 'generic')
+    
+    def log_progress(stats):
+        current_app.logger.info(
+            "Import user=%s account=%s: %s rows, %s rows/s",
+            user_id, account_id, stats['rows'], stats['rows_per_second']
+        )
+    
+    try:
+        # upload.stream is spooled to disk for large files; parsed row by row
+        stats = ImportService.import_statement(
+            user_id, account_id, upload.stream, fmt=fmt, profile=profile, progress=log_progress
+        )
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"msg": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"msg": "Error importing statement", "error": str(e)}), 500
+    
+    if "error" in stats:
+        return jsonify({"msg": "Statement partially imported", **stats}), 207
+    return jsonify({"msg": "Statement imported", **stats}), 201
@@ -18,7 +18,8 @@ def get_portfolio():
     
     result = []
     for inv in investments:
-        current_val = inv.quantity * inv.price_history[-1].price if inv.price_history else inv.quantity * inv.avg_buy_price
+        # Maintained last price (no price history load); falls back to avg buy price
+        current_val = inv.current_value
         # Note: In real app, we fetch live price. Here we use last history price.
         
         result.append({
@@ -2,6 +2,10 @@ from flask import Blueprint, request, jsonify
 from extensions import db
 from models import RecurringTransaction, RecurrenceFrequency, Transaction, Account
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from cache import bump_data_version, cached_response, cached_value
+from pagination import page_args, keyset_page, wants_total, set_page_headers
+from services.rollup_service import RollupService
+from services.duplicate_service import DuplicateService
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 
@@ -10,15 +14,30 @@ recurring_bp = Blueprint('recurring', __name__, url_prefix='/recurring')
 @recurring_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_recurring_transactions():
-    """Get all recurring transactions for the current user"""
+    """
+    Get all recurring transactions for the current user.
+    Paged by keyset only when ?limit= is sent (next page in X-Next-Cursor).
+    """
+    from sqlalchemy import func
     user_id = get_jwt_identity()
+    try:
+        cursor, limit = page_args(default_limit=None)
+    except ValueError:
+        return jsonify({"msg": "Invalid cursor"}), 400
     
-    recurring = RecurringTransaction.query.filter_by(
+    query = RecurringTransaction.query.filter_by(
         user_id=user_id, 
         deleted_at=None
-    ).order_by(RecurringTransaction.next_due.asc()).all()
+    )
+    # next_due may be NULL and NULLs break row-value comparison; fall back to start_date
+    due = func.coalesce(RecurringTransaction.next_due, RecurringTransaction.start_date)
+    recurring, next_cursor = keyset_page(
+        query, [due, RecurringTransaction.id], lambda r: (r.next_due or r.start_date, r.id),
+        cursor=cursor, limit=limit, descending=False
+    )
+    total = cached_value(user_id, ('recurring',), query.count) if wants_total() else None
     
-    return jsonify([{
+    return set_page_headers(jsonify([{
         "id": r.id,
         "name": r.name,
         "amount": r.amount,
@@ -34,7 +53,7 @@ def get_recurring_transactions():
         "next_due": r.next_due.isoformat() if r.next_due else None,
         "last_generated": r.last_generated.isoformat() if r.last_generated else None,
         "is_active": r.is_active
-    } for r in recurring]), 200
+    } for r in recurring]), next_cursor, total), 200
 
 @recurring_bp.route('/', methods=['POST'])
 @jwt_required()
@@ -77,6 +96,7 @@ def create_recurring_transaction():
                 pass
         
         db.session.add(recurring)
+        bump_data_version(user_id)
         db.session.commit()
         
         return jsonify({
@@ -136,6 +156,7 @@ def update_recurring_transaction(id):
         if 'frequency' in data or 'day_of_month' in data:
             recurring.calculate_next_due()
         
+        bump_data_version(user_id)
         db.session.commit()
         
         return jsonify({
@@ -165,6 +186,7 @@ def delete_recurring_transaction(id):
     try:
         recurring.deleted_at = datetime.utcnow()
         recurring.is_active = False
+        bump_data_version(user_id)
         db.session.commit()
         
         return jsonify({"msg": "Transacción recurrente eliminada"}), 200
@@ -201,14 +223,19 @@ def process_recurring_transactions():
         
         try:
             # Create the actual transaction
+            description = f"[Recurrente] {recurring.name}" + (f" - {recurring.description}" if recurring.description else "")
+            date = recurring.next_due or now
             tx = Transaction(
+                user_id=recurring.user_id,
                 account_id=recurring.account_id,
                 amount=recurring.amount,
-                description=f"[Recurrente] {recurring.name}" + (f" - {recurring.description}" if recurring.description else ""),
-                date=recurring.next_due or now,
-                category_id=recurring.category_id
+                description=description,
+                date=date,
+                category_id=recurring.category_id,
+                fingerprint=DuplicateService.free_fingerprint(recurring.account_id, date, recurring.amount, description)
             )
             db.session.add(tx)
+            RollupService.add_transaction(tx)
             
             # Update account balance
             account = Account.query.get(recurring.account_id)
@@ -225,6 +252,9 @@ def process_recurring_transactions():
             print(f"Error processing recurring {recurring.id}: {e}")
             continue
     
+    # Called on every dashboard load: only invalidate caches when something was due
+    if recurring_list:
+        bump_data_version(user_id)
     db.session.commit()
     
     return jsonify({
@@ -234,6 +264,7 @@ def process_recurring_transactions():
 
 @recurring_bp.route('/upcoming', methods=['GET'])
 @jwt_required()
+@cached_response(ttl=300)
 def get_upcoming_recurring():
     """Get upcoming recurring transactions for the next 30 days"""
     user_id = get_jwt_identity()
@@ -0,0 +1,119 @@
+from flask import Blueprint, request, jsonify
+from extensions import db
+from models import Rule, Category
+from services.rule_service import RuleService
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+rules_bp = Blueprint('rules', __name__, url_prefix='/rules')
+
+def _rule_json(rule, category_name=None):
+    return {
+        "id": rule.id,
+        "pattern": rule.pattern,
+        "category_id": rule.category_id,
+        "category_name": category_name,
+        "description": rule.description
+    }
+
+def _validate(user_id, data, partial=False):
+    """
+    Returns (error message or None, category): the category named by category_id,
+    or None when partial data doesn't change it.
+    """
+    if not partial or 'pattern' in data:
+        pattern = (data.get('pattern') or '').strip()
+        if not pattern:
+            return "pattern is required", None
+        if len(pattern) > 100:
+            return "pattern is too long (max 100)", None
+    category = None
+    if not partial or 'category_id' in data:
+        category = Category.query.filter_by(id=data.get('category_id'), user_id=user_id).first()
+        if not category:
+            return "Category not found", None
+    return None, category
+
+@rules_bp.route('/', methods=['GET'])
+@jwt_required()
+def get_rules():
+    """Rules in priority order (oldest first): the first matching rule wins"""
+    user_id = get_jwt_identity()
+    rows = db.session.query(Rule, Category.name)\
+        .outerjoin(Category, Category.id == Rule.category_id)\
+        .filter(Rule.user_id == user_id, Rule.deleted_at.is_(None))\
+        .order_by(Rule.id)\
+        .all()
+    return jsonify([_rule_json(rule, name) for rule, name in rows]), 200
+
+@rules_bp.route('/', methods=['POST'])
+@jwt_required()
+def create_rule():
+    """
+    Create a rule. pattern is plain text (matched anywhere, case-insensitive)
+    or a regular expression; description optionally replaces the transaction's.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json() or {}
+
+    error, category = _validate(user_id, data)
+    if error:
+        return jsonify({"msg": error}), 400
+
+    rule = Rule(
+        user_id=user_id,
+        pattern=data['pattern'].strip(),
+        category_id=data['category_id'],
+        description=data.get('description') or None
+    )
+    db.session.add(rule)
+    db.session.commit()
+    return jsonify({"msg": "Rule created", **_rule_json(rule, category.name)}), 201
+
+@rules_bp.route('/<int:id>', methods=['PUT'])
+@jwt_required()
+def update_rule(id):
+    user_id = get_jwt_identity()
+    rule = Rule.query.filter_by(id=id, user_id=user_id, deleted_at=None).first()
+    if not rule:
+        return jsonify({"msg": "Rule not found"}), 404
+
+    data = request.get_json() or {}
+    error, category = _validate(user_id, data, partial=True)
+    if error:
+        return jsonify({"msg": error}), 400
+
+    if 'pattern' in data:
+        rule.pattern = data['pattern'].strip()
+    if 'category_id' in data:
+        rule.category_id = data['category_id']
+    if 'description' in data:
+        rule.description = data['description'] or None
+    db.session.commit()
+    if category is None:
+        category = db.session.get(Category, rule.category_id)
+    return jsonify({"msg": "Rule updated", **_rule_json(rule, category.name if category else None)}), 200
+
+@rules_bp.route('/<int:id>', methods=['DELETE'])
+@jwt_required()
+def delete_rule(id):
+    user_id = get_jwt_identity()
+    rule = Rule.query.filter_by(id=id, user_id=user_id).first()
+    if not rule:
+        return jsonify({"msg": "Rule not found"}), 404
+    db.session.delete(rule)
+    db.session.commit()
+    return jsonify({"msg": "Rule deleted"}), 200
+
+@rules_bp.route('/test', methods=['POST'])
+@jwt_required()
+def test_rules():
+    """Which rule would categorize a description: {"description": "..."}"""
+    user_id = get_jwt_identity()
+    description = (request.get_json() or {}).get('description')
+    found = RuleService.get_matcher(user_id).match(description)
+    if not found:
+        return jsonify({"match": None}), 200
+    rule_id, category_id, override = found
+    return jsonify({
+        "match": {"rule_id": rule_id, "category_id": category_id, "description": override}
+    }), 200
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from extensions import db
 from models import SavingsGoal
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from cache import bump_data_version, cached_value
+from pagination import page_args, keyset_page, wants_total, set_page_headers
 from datetime import datetime
 
 savings_goals_bp = Blueprint('savings_goals', __name__, url_prefix='/savings-goals')
@@ -9,12 +11,24 @@ savings_goals_bp = Blueprint('savings_goals', __name__, url_prefix='/savings-goa
 @savings_goals_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_savings_goals():
-    """Get all savings goals for the current user"""
+    """
+    Get all savings goals for the current user.
+    Paged by keyset only when ?limit= is sent (next page in X-Next-Cursor).
+    """
     user_id = get_jwt_identity()
-    
-    goals = SavingsGoal.query.filter_by(user_id=user_id, deleted_at=None).order_by(SavingsGoal.created_at.desc()).all()
-    
-    return jsonify([{
+    try:
+        cursor, limit = page_args(default_limit=None)
+    except ValueError:
+        return jsonify({"msg": "Invalid cursor"}), 400
+    
+    query = SavingsGoal.query.filter_by(user_id=user_id, deleted_at=None)
+    goals, next_cursor = keyset_page(
+        query, [SavingsGoal.created_at, SavingsGoal.id], lambda g: (g.created_at, g.id),
+        cursor=cursor, limit=limit
+    )
+    total = cached_value(user_id, ('savings_goals',), query.count) if wants_total() else None
+    
+    return set_page_headers(jsonify([{
         "id": g.id,
         "name": g.name,
         "target_amount": g.target_amount,
@@ -25,7 +39,7 @@ def get_savings_goals():
         "is_active": g.is_active,
         "progress_percentage": g.progress_percentage,
         "days_remaining": g.days_remaining
-    } for g in goals]), 200
+    } for g in goals]), next_cursor, total), 200
 
 @savings_goals_bp.route('/', methods=['POST'])
 @jwt_required()
@@ -47,6 +61,7 @@ def create_savings_goal():
         )
         
         db.session.add(goal)
+        bump_data_version(user_id)
         db.session.commit()
         
         return jsonify({
@@ -112,6 +127,7 @@ def update_savings_goal(id):
         if 'is_active' in data:
             goal.is_active = data['is_active']
         
+        bump_data_version(user_id)
         db.session.commit()
         
         return jsonify({
@@ -140,6 +156,7 @@ def delete_savings_goal(id):
     
     try:
         goal.deleted_at = datetime.utcnow()
+        bump_data_version(user_id)
         db.session.commit()
         
         return jsonify({"msg": "Savings goal deleted"}), 200
@@ -1,12 +1,30 @@
 from flask import Blueprint, request, jsonify
 from extensions import db, limiter
 from services.transaction_service import TransactionService
-from models import Transaction
+from services.rollup_service import RollupService
+from services.duplicate_service import DuplicateService, DuplicateTransactionError
+from services.search_service import SearchService
+from services.reference_service import ReferenceService
+from services.rate_history_service import RateHistoryService
+from services.exchange_rate_service import SUPPORTED_CURRENCIES
+from models import Transaction, Account, Category
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import IntegrityError
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from cache import bump_data_version, cached_value
+from pagination import page_args, keyset_page, wants_total, set_page_headers
 from datetime import datetime
 
 transactions_bp = Blueprint('transactions', __name__, url_prefix='/transactions')
 
+def _with_names(query):
+    """Account and category names in the same SELECT instead of one lazy load per row"""
+    return query.options(
+        joinedload(Transaction.account).load_only(Account.name),
+        joinedload(Transaction.category).load_only(Category.name)
+    )
+
 @transactions_bp.route('/', methods=['POST'])
 @jwt_required()
 @limiter.limit("10 per minute")
@@ -16,6 +34,8 @@ def create_transaction():
     
     # Check for split
     splits = data.get('splits')
+    # Same account/day/amount/description as an existing transaction is rejected (409) unless confirmed
+    allow_duplicate = bool(data.get('allow_duplicate'))
     
     try:
         if splits:
@@ -28,7 +48,8 @@ def create_transaction():
                     "description": data.get('description'),
                     "date": datetime.fromisoformat(data['date']) if data.get('date') else None
                 },
-                splits_data=splits
+                splits_data=splits,
+                allow_duplicate=allow_duplicate
             )
         else:
             # Handle Regular Transaction
@@ -37,50 +58,137 @@ def create_transaction():
                 amount=data.get('amount'),
                 category_id=data.get('category_id'),
                 description=data.get('description'),
-                date=datetime.fromisoformat(data['date']) if data.get('date') else None
+                date=datetime.fromisoformat(data['date']) if data.get('date') else None,
+                allow_duplicate=allow_duplicate
             )
             db.session.commit()
             
         return jsonify({"msg": "Transaction created", "id": tx.id}), 201
         
+    except DuplicateTransactionError as e:
+        db.session.rollback()
+        return jsonify({"msg": str(e), "existing_id": e.existing_id}), 409
+    except IntegrityError:
+        # Lost a race with an identical request (double submit)
+        db.session.rollback()
+        return jsonify({"msg": str(DuplicateTransactionError())}), 409
     except ValueError as e:
         return jsonify({"msg": str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"msg": "Error creating transaction", "error": str(e)}), 500
 
+@transactions_bp.route('/batch', methods=['POST'])
+@jwt_required()
+@limiter.limit("10 per minute")
+def create_transactions_batch():
+    """
+    Bulk create: {"transactions": [{account_id, amount, category_id, description, date, splits}, ...],
+                  "skip_duplicates": false}.
+    All or nothing; the response has one result per item, in order. Items matching an
+    existing transaction fail the batch, or are skipped with skip_duplicates.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    items = data.get('transactions')
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({"msg": "transactions must be a non-empty list"}), 400
+    
+    try:
+        results, ok = TransactionService.create_batch(user_id, items, skip_duplicates=bool(data.get('skip_duplicates')))
+        if not ok:
+            db.session.rollback()
+            return jsonify({"msg": "Batch rejected, no transactions were created", "results": results}), 400
+        db.session.commit()
+        created = sum(1 for r in results if r["status"] == "created")
+        return jsonify({"msg": "Transactions created", "created": created, "results": results}), 201
+        
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"msg": str(DuplicateTransactionError())}), 409
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"msg": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"msg": "Error creating transactions", "error": str(e)}), 500
+
 @transactions_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_transactions():
+    """
+    Latest main transactions. Paged with ?cursor=&limit=; next cursor in X-Next-Cursor.
+    ?currency=EUR adds each amount converted at the rate of its date.
+    """
     user_id = get_jwt_identity()
-    from models import Account
+    try:
+        cursor, limit = page_args(default_limit=50)
+    except ValueError:
+        return jsonify({"msg": "Invalid cursor"}), 400
+    currency = request.args.get('currency', '').upper()
+    if currency and currency not in SUPPORTED_CURRENCIES:
+        return jsonify({"msg": f"Unsupported currency: {currency}"}), 400
     
-    txs = Transaction.query.join(Account).filter(Account.user_id == user_id).order_by(Transaction.date.desc()).limit(50).all()
+    # Splits are filtered in SQL so every page is full
+    query = Transaction.query.filter(
+        Transaction.user_id == user_id,
+        Transaction.parent_id.is_(None)
+    )
+    # Split counts from one grouped subquery instead of loading every tx.children
+    splits = db.session.query(Transaction.parent_id, func.count(Transaction.id).label('splits_count'))\
+        .filter(Transaction.user_id == user_id, Transaction.parent_id.isnot(None))\
+        .group_by(Transaction.parent_id)\
+        .subquery()
+    page_query = _with_names(
+        query.add_columns(func.coalesce(splits.c.splits_count, 0))
+        .outerjoin(splits, splits.c.parent_id == Transaction.id)
+    )
+    rows, next_cursor = keyset_page(
+        page_query, [Transaction.date, Transaction.id], lambda row: (row[0].date, row[0].id),
+        cursor=cursor, limit=limit
+    )
     
     result = []
-    for tx in txs:
-        if tx.parent_id is None:
-            result.append({
-                "id": tx.id,
-                "amount": tx.amount,
-                "description": tx.description,
-                "date": tx.date.isoformat(),
-                "account_id": tx.account_id,
-                "account_name": tx.account.name,
-                "category_id": tx.category_id,
-                "category_name": tx.category.name if tx.category else None,
-                "splits_count": len(tx.children)
-            })
-            
-    return jsonify(result), 200
+    for tx, splits_count in rows:
+        result.append({
+            "id": tx.id,
+            "amount": tx.amount,
+            "description": tx.description,
+            "date": tx.date.isoformat(),
+            "account_id": tx.account_id,
+            "account_name": tx.account.name,
+            "category_id": tx.category_id,
+            "category_name": tx.category.name if tx.category else None,
+            "splits_count": splits_count
+        })
+
+    if currency:
+        # Account currencies from the shared map; rates from the in-memory history
+        accounts = ReferenceService.accounts(user_id)
+        converted, rates = RateHistoryService.convert(
+            [tx.amount for tx, _ in rows],
+            [accounts[tx.account_id]["currency_code"] for tx, _ in rows],
+            currency,
+            [tx.date for tx, _ in rows]
+        )
+        for item, value, rate in zip(result, converted, rates):
+            item["currency"] = currency
+            item["converted_amount"] = round(value, 2) if value is not None else None
+            item["rate"] = rate
+    
+    total = cached_value(user_id, ('transactions',), query.count) if wants_total() else None
+    return set_page_headers(jsonify(result), next_cursor, total), 200
 
 @transactions_bp.route('/search', methods=['GET'])
 @jwt_required()
 def search_transactions():
-    """Search transactions with filters"""
+    """
+    Search transactions with filters. q matches description, category and account
+    names (word prefixes, accent-insensitive). sort=date (default) or relevance.
+    """
     user_id = get_jwt_identity()
-    from models import Account, Category
-    from sqlalchemy import or_
+    from sqlalchemy import or_, false
     
     # Get search params
     query_str = request.args.get('q', '').strip()
@@ -91,19 +199,32 @@ def search_transactions():
     account_id = request.args.get('account_id')
     category_id = request.args.get('category_id')
     tx_type = request.args.get('type')  # income, expense
-    page = int(request.args.get('page', 1))
-    per_page = int(request.args.get('per_page', 50))
+    sort = request.args.get('sort', 'date')
+    include_total = wants_total()
+    try:
+        cursor, per_page = page_args(default_limit=50, limit_param='per_page')
+    except ValueError:
+        return jsonify({"msg": "Invalid cursor"}), 400
     
     # Build query
-    query = Transaction.query.join(Account).filter(
-        Account.user_id == user_id,
+    query = Transaction.query.filter(
+        Transaction.user_id == user_id,
         Transaction.deleted_at == None,
         Transaction.parent_id == None
     )
     
-    # Text search
-    if query_str:
-        query = query.outerjoin(Category).filter(
+    # Text search: full-text index when the database has it, ILIKE scan otherwise
+    score = None
+    if query_str and SearchService.available():
+        found = SearchService.match(query_str)
+        if found is None:
+            # Only punctuation: nothing can match
+            query = query.filter(false())
+        else:
+            clause, score = found
+            query = query.filter(clause)
+    elif query_str:
+        query = query.join(Account).outerjoin(Category).filter(
             or_(
                 Transaction.description.ilike(f'%{query_str}%'),
                 Category.name.ilike(f'%{query_str}%'),
@@ -160,13 +281,24 @@ def search_transactions():
     elif tx_type == 'expense':
         query = query.filter(Transaction.amount < 0)
     
-    # Get total count
-    total = query.count()
-    
-    # Paginate
-    txs = query.order_by(Transaction.date.desc()).offset((page - 1) * per_page).limit(per_page).all()
+    # Keyset page on (date, id), or (score, id) when ranking by relevance
+    page_query = _with_names(query)
+    try:
+        if sort == 'relevance' and score is not None:
+            rows, next_cursor = keyset_page(
+                page_query.add_columns(score.label('score')), [score, Transaction.id],
+                lambda row: (row.score, row[0].id), cursor=cursor, limit=per_page
+            )
+            txs = [row[0] for row in rows]
+        else:
+            txs, next_cursor = keyset_page(
+                page_query, [Transaction.date, Transaction.id], lambda tx: (tx.date, tx.id),
+                cursor=cursor, limit=per_page
+            )
+    except ValueError:
+        return jsonify({"msg": "Invalid cursor"}), 400
     
-    return jsonify({
+    response = {
         "transactions": [{
             "id": tx.id,
             "amount": tx.amount,
@@ -177,22 +309,137 @@ def search_transactions():
             "category_id": tx.category_id,
             "category_name": tx.category.name if tx.category else None
         } for tx in txs],
-        "total": total,
-        "page": page,
         "per_page": per_page,
-        "pages": (total + per_page - 1) // per_page
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }
+    
+    # Counting every match is the expensive part; only on request, once per data version
+    if include_total:
+        filters_key = ('search',) + tuple(sorted(
+            (k, v) for k, v in request.args.items()
+            if k not in ('cursor', 'per_page', 'include_total')
+        ))
+        response["total"] = cached_value(user_id, filters_key, query.count)
+    
+    return jsonify(response), 200
+
+@transactions_bp.route('/suggest', methods=['GET'])
+@jwt_required()
+def suggest_descriptions():
+    """
+    Description autocomplete: ?prefix=alm&limit=8. Each suggestion has its usage
+    count and the category, account and amount of its most recent use.
+    """
+    from services.suggest_service import SuggestService
+    user_id = get_jwt_identity()
+    prefix = request.args.get('prefix', '')
+    limit = min(max(request.args.get('limit', 8, type=int), 1), 25)
+    return jsonify(SuggestService.suggest(user_id, prefix, limit)), 200
+
+@transactions_bp.route('/duplicates', methods=['GET'])
+@jwt_required()
+def get_duplicates():
+    """
+    Report of likely duplicate pairs.
+    Query params: account_id, start_date, end_date, days (default 2),
+    amount_tolerance (default 0), min_similarity (0-1, default 0.6)
+    """
+    from models import Account
+    user_id = get_jwt_identity()
+    
+    try:
+        start = datetime.fromisoformat(request.args['start_date']) if request.args.get('start_date') else None
+        end = datetime.fromisoformat(request.args['end_date']) if request.args.get('end_date') else None
+        pairs = DuplicateService.find_near_duplicates(
+            user_id,
+            account_id=request.args.get('account_id', type=int),
+            start=start,
+            end=end,
+            days=max(0, request.args.get('days', 2, type=int)),
+            amount_tolerance=abs(request.args.get('amount_tolerance', 0.0, type=float)),
+            min_similarity=request.args.get('min_similarity', 0.6, type=float)
+        )
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    
+    # Details of every transaction involved, one query
+    ids = {tx_id for pair in pairs for tx_id in pair["transaction_ids"]}
+    details = {}
+    if ids:
+        rows = db.session.query(
+            Transaction.id, Transaction.date, Transaction.amount, Transaction.description, Account.name
+        ).join(Account, Account.id == Transaction.account_id).filter(Transaction.id.in_(ids))
+        details = {
+            row.id: {
+                "id": row.id,
+                "date": row.date.isoformat(),
+                "amount": row.amount,
+                "description": row.description,
+                "account_name": row.name
+            }
+            for row in rows
+        }
+    
+    return jsonify({
+        "count": len(pairs),
+        "duplicates": [
+            dict(pair, transactions=[details[tx_id] for tx_id in pair["transaction_ids"] if tx_id in details])
+            for pair in pairs
+        ]
     }), 200
 
+@transactions_bp.route('/recategorize', methods=['POST'])
+@jwt_required()
+@limiter.limit("10 per minute")
+def recategorize_transactions():
+    """
+    Re-categorize existing transactions in bulk. Either apply a rule:
+        {"rule_id": 3, "overwrite": false}
+    or remap categories (e.g. merging them):
+        {"from_category_ids": [4, 7], "to_category_id": 2, "remap_rules": true}
+    Optional: account_id, start_date, end_date, dry_run (counts and a sample only).
+    """
+    from services.recategorize_service import RecategorizeService
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+
+    try:
+        filters = {
+            "account_id": data.get('account_id'),
+            "start": datetime.fromisoformat(data['start_date']) if data.get('start_date') else None,
+            "end": datetime.fromisoformat(data['end_date']) if data.get('end_date') else None,
+            "dry_run": bool(data.get('dry_run'))
+        }
+        if data.get('rule_id') is not None:
+            stats = RecategorizeService.apply_rule(
+                user_id, data['rule_id'], overwrite=bool(data.get('overwrite')), **filters
+            )
+        elif data.get('to_category_id') is not None and isinstance(data.get('from_category_ids'), list):
+            stats = RecategorizeService.remap(
+                user_id, data['from_category_ids'], data['to_category_id'],
+                remap_rules=data.get('remap_rules', True) is not False, **filters
+            )
+        else:
+            return jsonify({"msg": "Provide rule_id, or from_category_ids and to_category_id"}), 400
+    except (ValueError, TypeError) as e:
+        db.session.rollback()
+        return jsonify({"msg": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"msg": "Error re-categorizing transactions", "error": str(e)}), 500
+
+    return jsonify({"dry_run": filters["dry_run"], **stats}), 200
+
 @transactions_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def get_transaction(id):
     """Get a single transaction by ID"""
     user_id = get_jwt_identity()
-    from models import Account
     
-    tx = Transaction.query.join(Account).filter(
+    tx = _with_names(Transaction.query).filter(
         Transaction.id == id, 
-        Account.user_id == user_id
+        Transaction.user_id == user_id
     ).first()
     
     if not tx:
@@ -216,9 +463,9 @@ def update_transaction(id):
     user_id = get_jwt_identity()
     from models import Account
     
-    tx = Transaction.query.join(Account).filter(
+    tx = Transaction.query.filter(
         Transaction.id == id, 
-        Account.user_id == user_id
+        Transaction.user_id == user_id
     ).first()
     
     if not tx:
@@ -231,6 +478,9 @@ def update_transaction(id):
         old_amount = tx.amount
         old_account_id = tx.account_id
         
+        # Take the old values out of the monthly rollup; re-added below with the new ones
+        RollupService.remove_transaction(tx)
+        
         # Update fields
         if 'amount' in data:
             tx.amount = data['amount']
@@ -244,6 +494,7 @@ def update_transaction(id):
             # Verify new account belongs to user
             new_account = Account.query.filter_by(id=data['account_id'], user_id=user_id).first()
             if not new_account:
+                db.session.rollback()
                 return jsonify({"msg": "Account not found"}), 404
             
             # Revert balance from old account
@@ -262,6 +513,14 @@ def update_transaction(id):
                     # Remove old amount, add new amount
                     account.balance = account.balance - old_amount + tx.amount
         
+        # Edits never collide with themselves; identical rows get the next occurrence
+        if tx.parent_id is None and tx.transfer_id is None:
+            tx.fingerprint = DuplicateService.free_fingerprint(
+                tx.account_id, tx.date, tx.amount, tx.description, exclude_id=tx.id
+            )
+        
+        RollupService.add_transaction(tx)
+        bump_data_version(user_id)
         db.session.commit()
         return jsonify({
             "msg": "Transaction updated", 
@@ -281,10 +540,9 @@ def update_transaction(id):
 @jwt_required()
 def delete_transaction(id):
     user_id = get_jwt_identity()
-    # Ensure tx belongs to one of user's accounts
-    # Join Transaction -> Account
+    # Ensure tx belongs to the user (denormalized user_id, no Account join needed)
     from models import Account
-    tx = Transaction.query.join(Account).filter(Transaction.id == id, Account.user_id == user_id).first()
+    tx = Transaction.query.filter(Transaction.id == id, Transaction.user_id == user_id).first()
     
     if not tx:
         return jsonify({"msg": "Transaction not found"}), 404
@@ -301,6 +559,7 @@ def delete_transaction(id):
         # Since cascade doesn't include delete, we need to delete manually
         if tx.children:
             for child in tx.children:
+                RollupService.remove_transaction(child)
                 db.session.delete(child)
         
         # Revert balance: only for main transactions (parent_id is None)
@@ -310,7 +569,9 @@ def delete_transaction(id):
             account.balance -= tx.amount
         
         # Now delete the main transaction
+        RollupService.remove_transaction(tx)
         db.session.delete(tx)
+        bump_data_version(user_id)
         db.session.commit()
         return jsonify({"msg": "Transaction deleted"}), 200
     except Exception as e:
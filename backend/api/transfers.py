@@ -3,6 +3,8 @@ from extensions import db, limiter
 from services.transfer_service import TransferService
 from models import Transfer
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from cache import cached_value
+from pagination import page_args, keyset_page, wants_total, set_page_headers
 from datetime import datetime
 
 transfers_bp = Blueprint('transfers', __name__, url_prefix='/transfers')
@@ -32,22 +34,24 @@ def create_transfer():
 @jwt_required()
 def get_transfers():
     user_id = get_jwt_identity()
-    # Join with Account to verify ownership? 
-    # Simply listing all transfers where one of the accounts belongs to user
-    from models import Account
-    from sqlalchemy import or_
+    try:
+        cursor, limit = page_args(default_limit=100)
+    except ValueError:
+        return jsonify({"msg": "Invalid cursor"}), 400
     
-    # Query transfers where from_acc.user_id == me OR to_acc.user_id == me
-    transfers = Transfer.query.join(Account, Transfer.from_account_id == Account.id)\
-        .filter(Account.user_id == user_id).all()
-        
-    # Ideally should check both sides but assume single user system for now (or intra-user transfers)
+    # Transfers carry the owner's user_id (from the source account), so no Account join is needed
+    query = Transfer.query.filter(Transfer.user_id == user_id)
+    transfers, next_cursor = keyset_page(
+        query, [Transfer.date, Transfer.id], lambda t: (t.date, t.id),
+        cursor=cursor, limit=limit
+    )
+    total = cached_value(user_id, ('transfers',), query.count) if wants_total() else None
     
-    return jsonify([{
+    return set_page_headers(jsonify([{
         "id": t.id,
         "from": t.from_account_id,
         "to": t.to_account_id,
         "amount": t.amount,
         "date": t.date.isoformat(),
         "description": t.description
-    } for t in transfers]), 200
+    } for t in transfers]), next_cursor, total), 200
@@ -1,6 +1,7 @@
 from flask import Flask, jsonify
 from config import Config
 from extensions import db, migrate, ma, jwt, cors, limiter
+from cache import init_cache
 from api.auth import auth_bp
 from api.accounts import accounts_bp
 from api.categories import categories_bp
@@ -13,6 +14,8 @@ from api.budgets import budgets_bp
 from api.savings_goals import savings_goals_bp
 from api.recurring import recurring_bp
 from api.export import export_bp
+from api.imports import import_bp
+from api.rules import rules_bp
 
 def create_app(config_class=Config):
     app = Flask(__name__)
@@ -40,10 +43,12 @@ def create_app(config_class=Config):
         resources={r"/*": {
             "origins": "*",
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "allow_headers": ["Content-Type", "Authorization", "Range"],
+            "expose_headers": ["ETag", "X-Next-Cursor", "X-Total-Count", "Content-Disposition", "Content-Range", "Accept-Ranges"]
         }}
     )
     limiter.init_app(app)
+    init_cache(app)
 
     with app.app_context():
         # Import models so Alembic can detect them
@@ -65,6 +70,8 @@ def create_app(config_class=Config):
         app.register_blueprint(savings_goals_bp)
         app.register_blueprint(recurring_bp)
         app.register_blueprint(export_bp)
+        app.register_blueprint(import_bp)
+        app.register_blueprint(rules_bp)
 
     return app
 
@@ -0,0 +1,250 @@
+"""
+Per-user data version and response cache for read endpoints.
+
+Every write bumps users.data_version in the same DB transaction as the change,
+so a cached response keyed on (user, endpoint, args, version) can never be stale
+with respect to the user's data. Workers keep their own LRU, but all of them
+read the same version from the database.
+
+SharedCache is the tier shared by every worker on the host: a small SQLite file
+(WAL mode) in the instance folder holding JSON values with an expiry. It backs
+read-mostly data that workers should not each fetch on their own (exchange
+rates, per-user reference maps via shared_value()). Writes replace a key in
+one statement, so readers see either the old or the new value. If the file
+can't be used, it behaves as an always-empty cache.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, current_app, make_response
+from flask_jwt_extended import get_jwt_identity
+
+from extensions import db
+from models import User
+
+
+def bump_data_version(user_id):
+    """Invalidate cached reads for this user. Runs in the caller's DB transaction."""
+    if user_id is None:
+        return
+    User.query.filter(User.id == user_id).update(
+        {User.data_version: User.data_version + 1},
+        synchronize_session=False
+    )
+
+
+def get_data_version(user_id):
+    return db.session.query(User.data_version).filter(User.id == user_id).scalar() or 0
+
+
+class LRUCache:
+    """Thread-safe LRU bounded by entry count and total size (bytes for response bodies)."""
+
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, size=1):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+response_cache = LRUCache()
+# Small values (row counts for pagination); size counts entries
+value_cache = LRUCache(max_entries=4096, max_bytes=4096)
+
+
+class SharedCache:
+    """Cross-process key/value store with TTLs, backed by a SQLite file."""
+
+    PURGE_INTERVAL = 300  # seconds between sweeps of expired keys
+
+    def __init__(self, path=None):
+        self.path = path
+        self._local = threading.local()
+        self._last_purge = 0.0
+
+    def _conn(self):
+        # One connection per thread, reopened after a fork (gunicorn workers)
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)'
+        )
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _execute(self, sql, params=()):
+        if not self.path:
+            return None
+        try:
+            return self._conn().execute(sql, params)
+        except sqlite3.Error as e:
+            logging.getLogger(__name__).warning("Shared cache unavailable: %s", e)
+            self._local.conn = None
+            return None
+
+    def get(self, key):
+        cursor = self._execute(
+            'SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (key, time.time())
+        )
+        row = cursor.fetchone() if cursor else None
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl=None):
+        """Stores value (JSON-serializable); ttl in seconds, None keeps it until replaced."""
+        now = time.time()
+        self._execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, json.dumps(value), now + ttl if ttl else None)
+        )
+        if now - self._last_purge > self.PURGE_INTERVAL:
+            self._last_purge = now
+            self._execute('DELETE FROM cache WHERE expires_at <= ?', (now,))
+
+    def add(self, key, value, ttl):
+        """
+        Stores value only if key is absent or expired; True if this call stored it.
+        Used as a cross-worker lease. Without a usable store every caller wins.
+        """
+        now = time.time()
+        cursor = self._execute(
+            'INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at '
+            'WHERE cache.expires_at IS NOT NULL AND cache.expires_at <= ?',
+            (key, json.dumps(value), now + ttl, now)
+        )
+        return cursor.rowcount == 1 if cursor else True
+
+    def delete(self, key):
+        self._execute('DELETE FROM cache WHERE key = ?', (key,))
+
+
+shared_cache = SharedCache()
+
+
+def init_cache(app):
+    shared_cache.path = app.config.get('SHARED_CACHE_PATH') or \
+        os.path.join(app.instance_path, 'shared_cache.db')
+    os.makedirs(os.path.dirname(shared_cache.path), exist_ok=True)
+    response_cache.max_entries = app.config.get('RESPONSE_CACHE_MAX_ENTRIES', response_cache.max_entries)
+    response_cache.max_bytes = app.config.get('RESPONSE_CACHE_MAX_BYTES', response_cache.max_bytes)
+
+
+def cached_response(ttl=None, vary=None):
+    """
+    Cache a GET view per (user, endpoint, args, data version) and answer
+    If-None-Match with 304. Must be placed below @jwt_required().
+
+    ttl (seconds) is for views whose output also depends on the clock
+    (current month, "next 30 days"): the key rolls over every ttl seconds.
+    vary is a callable for other inputs that aren't user data (e.g. the
+    exchange rates version); its value becomes part of the key.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get('RESPONSE_CACHE_ENABLED', True):
+                return view(*args, **kwargs)
+
+            user_id = get_jwt_identity()
+            version = get_data_version(user_id)
+            time_bucket = int(time.time() // ttl) if ttl else 0
+
+            key = (
+                str(user_id),
+                request.endpoint,
+                tuple(sorted(request.args.items(multi=True))),
+                tuple(sorted(kwargs.items())),
+                version,
+                time_bucket,
+                vary() if vary else None
+            )
+            etag = hashlib.sha1(repr(key).encode()).hexdigest()
+
+            if etag in request.if_none_match:
+                response = make_response('', 304)
+            else:
+                entry = response_cache.get(key)
+                if entry is not None:
+                    response = make_response(entry[0])
+                    response.mimetype = entry[1]
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    body = response.get_data()
+                    response_cache.set(key, (body, response.mimetype), len(body))
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Authorization')
+            return response
+        return wrapper
+    return decorator
+
+
+def cached_value(user_id, key, compute):
+    """
+    Memoize compute() per (user, key, data version), e.g. a total row count
+    that every page of a listing would otherwise recount.
+    """
+    full_key = (str(user_id), key, get_data_version(user_id))
+    value = value_cache.get(full_key)
+    if value is None:
+        value = compute()
+        value_cache.set(full_key, value)
+    return value
+
+
+def shared_value(user_id, key, compute, ttl=3600):
+    """
+    Like cached_value(), but stored in the shared cache so every worker reuses it.
+    compute() must return a JSON-serializable value (dict keys become strings).
+    """
+    full_key = f"user:{user_id}:{key}:{get_data_version(user_id)}"
+    value = shared_cache.get(full_key)
+    if value is None:
+        value = compute()
+        shared_cache.set(full_key, value, ttl)
+    return value
@@ -16,4 +16,28 @@ class Config:
     # CORS Configuration for development
     CORS_ORIGINS = "*"  # Allow all origins in development
     CORS_METHODS = ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
-    CORS_ALLOW_HEADERS = ["Content-Type", "Authorization"]
\ No newline at end of file
+    CORS_ALLOW_HEADERS = ["Content-Type", "Authorization"]
+
+    # Per-worker response cache for read endpoints (see cache.py)
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_MAX_ENTRIES = 1024
+    RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+    # Background exports (see services/export_job_service.py): artifacts are kept
+    # this long in instance/exports. Set EXPORT_ACCEL_REDIRECT to an nginx internal
+    # location mapped to that directory to let nginx serve the downloads.
+    EXPORT_JOB_TTL_HOURS = int(os.environ.get('EXPORT_JOB_TTL_HOURS', 24))
+    EXPORT_ACCEL_REDIRECT = os.environ.get('EXPORT_ACCEL_REDIRECT')  # e.g. /protected-exports/
+
+    # Exchange rates (see services/exchange_rate_service.py): served from memory and
+    # refreshed in the background once older than the TTL; failed fetches back off
+    # exponentially between the retry bounds (seconds).
+    EXCHANGE_RATES_API_URL = os.environ.get('EXCHANGE_RATES_API_URL', 'https://api.frankfurter.app')
+    EXCHANGE_RATES_TTL = int(os.environ.get('EXCHANGE_RATES_TTL', 3600))
+    EXCHANGE_RATES_TIMEOUT = float(os.environ.get('EXCHANGE_RATES_TIMEOUT', 5))
+    EXCHANGE_RATES_RETRY_BASE = 30
+    EXCHANGE_RATES_RETRY_MAX = 3600
+
+    # Cache shared by all workers on the host (see cache.py SharedCache); defaults
+    # to instance/shared_cache.db. Must be on a local filesystem.
+    SHARED_CACHE_PATH = os.environ.get('SHARED_CACHE_PATH')
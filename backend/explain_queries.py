@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Script para revisar el plan de ejecución (EXPLAIN) de las consultas más usadas
+Ejecutar: python explain_queries.py [--user ID] [--analyze]
+"""
+import sys
+import os
+import argparse
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from extensions import db
+from models import (Account, Transaction, Transfer, Investment, InvestmentPriceHistory,
+                    ExchangeRate, RecurringTransaction, User)
+from sqlalchemy import func, select
+
+
+def hot_queries(user_id, account_id, investment_id):
+    """Consultas representativas de dashboard, cuentas, presupuestos, exportación y tasas"""
+    now = datetime.utcnow()
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    return [
+        ("accounts: transacciones de una cuenta (página)",
+         select(Transaction).filter(
+             Transaction.account_id == account_id,
+             Transaction.parent_id.is_(None),
+             Transaction.transfer_id.is_(None),
+             Transaction.date >= now - timedelta(days=90)
+         ).order_by(Transaction.date.desc()).limit(100)),
+
+        ("accounts: recálculo de balance",
+         select(func.coalesce(func.sum(Transaction.amount), 0.0)).filter(
+             Transaction.account_id == account_id,
+             Transaction.parent_id.is_(None),
+             Transaction.deleted_at.is_(None)
+         )),
+
+        ("dashboard: cashflow últimos 6 meses",
+         select(Transaction).filter(
+             Transaction.user_id == user_id,
+             Transaction.date >= now - timedelta(days=180),
+             Transaction.parent_id.is_(None)
+         ).order_by(Transaction.date.desc())),
+
+        ("budgets: gasto del mes por categoría",
+         select(func.sum(Transaction.amount)).filter(
+             Transaction.user_id == user_id,
+             Transaction.category_id == 1,
+             Transaction.date >= month_start,
+             Transaction.amount < 0,
+             Transaction.transfer_id.is_(None)
+         )),
+
+        ("export: transacciones principales no eliminadas",
+         select(Transaction).filter(
+             Transaction.user_id == user_id,
+             Transaction.deleted_at.is_(None),
+             Transaction.parent_id.is_(None)
+         ).order_by(Transaction.date.desc())),
+
+        ("transfers: transferencias del usuario",
+         select(Transfer).filter(Transfer.user_id == user_id).order_by(Transfer.date.desc())),
+
+        ("investments: holding por cuenta y símbolo",
+         select(Investment).filter_by(account_id=account_id, symbol='VOO')),
+
+        ("investments: último precio",
+         select(InvestmentPriceHistory).filter(
+             InvestmentPriceHistory.investment_id == investment_id
+         ).order_by(InvestmentPriceHistory.date.desc()).limit(1)),
+
+        ("exchange_rates: historial de un par",
+         select(ExchangeRate).filter(
+             ExchangeRate.currency_from == 'EUR',
+             ExchangeRate.currency_to == 'COP',
+             ExchangeRate.date >= now - timedelta(days=30)
+         ).order_by(ExchangeRate.date.asc())),
+
+        ("recurring: pendientes por usuario",
+         select(RecurringTransaction).filter(
+             RecurringTransaction.user_id == user_id,
+             RecurringTransaction.deleted_at.is_(None),
+             RecurringTransaction.is_active.is_(True),
+             RecurringTransaction.next_due <= now
+         )),
+    ]
+
+
+def explain(stmt, analyze=False):
+    """Ejecuta EXPLAIN sobre la sentencia con el dialecto de la base de datos activa"""
+    conn = db.session.connection()
+    dialect = conn.dialect
+    compiled = stmt.compile(dialect=dialect)
+    params = compiled.construct_params()
+
+    if dialect.name == 'postgresql':
+        prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if analyze else 'EXPLAIN '
+    elif dialect.name == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        prefix = 'EXPLAIN '
+
+    if compiled.positiontup:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    rows = conn.exec_driver_sql(prefix + str(compiled), params).fetchall()
+    # Postgres devuelve una columna de texto; SQLite devuelve (id, parent, notused, detail)
+    return [row[-1] for row in rows]
+
+
+def explain_hot_queries(user_id=None, analyze=False):
+    app = create_app()
+
+    with app.app_context():
+        if user_id is None:
+            user = User.query.order_by(User.id).first()
+            user_id = user.id if user else 1
+
+        account = Account.query.filter_by(user_id=user_id).first()
+        account_id = account.id if account else 1
+        investment = Investment.query.first()
+        investment_id = investment.id if investment else 1
+
+        print(f"🔎 Planes de ejecución ({db.engine.dialect.name}) para usuario {user_id}\n")
+
+        for title, stmt in hot_queries(user_id, account_id, investment_id):
+            print(f"{'='*60}")
+            print(f"📌 {title}")
+            print(f"{'-'*60}")
+            for line in explain(stmt, analyze=analyze):
+                print(f"   {line}")
+            print()
+
+        db.session.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Imprime el EXPLAIN de las consultas más usadas")
+    parser.add_argument('--user', type=int, default=None, help="ID de usuario a usar en los filtros")
+    parser.add_argument('--analyze', action='store_true', help="Usar EXPLAIN ANALYZE en Postgres")
+    args = parser.parse_args()
+
+    try:
+        explain_hot_queries(user_id=args.user, analyze=args.analyze)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
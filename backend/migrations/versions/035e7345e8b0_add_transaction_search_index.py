@@ -0,0 +1,152 @@
+"""Add full-text search index for transactions
+
+Revision ID: 035e7345e8b0
+Revises: 68284c811bd8
+Create Date: 2026-10-17 18:20:07.913344
+
+Postgres: search_vector tsvector column + GIN index, maintained by triggers.
+SQLite: FTS5 table transactions_fts maintained by triggers. Note that batch
+operations that recreate the transactions table drop SQLite triggers; run
+rebuild_search_index.py after such migrations.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '035e7345e8b0'
+down_revision = '68284c811bd8'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of services/search_service.py at this revision
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+        description, category, account, tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts(rowid, description, category, account) VALUES (
+            new.id, new.description,
+            (SELECT name FROM categories WHERE id = new.category_id),
+            (SELECT name FROM accounts WHERE id = new.account_id));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_update
+    AFTER UPDATE OF description, category_id, account_id ON transactions BEGIN
+        DELETE FROM transactions_fts WHERE rowid = old.id;
+        INSERT INTO transactions_fts(rowid, description, category, account) VALUES (
+            new.id, new.description,
+            (SELECT name FROM categories WHERE id = new.category_id),
+            (SELECT name FROM accounts WHERE id = new.account_id));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        DELETE FROM transactions_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS categories_fts_rename AFTER UPDATE OF name ON categories BEGIN
+        UPDATE transactions_fts SET category = new.name
+        WHERE rowid IN (SELECT id FROM transactions WHERE category_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS accounts_fts_rename AFTER UPDATE OF name ON accounts BEGIN
+        UPDATE transactions_fts SET account = new.name
+        WHERE rowid IN (SELECT id FROM transactions WHERE account_id = new.id);
+    END""",
+]
+
+SQLITE_BACKFILL = """
+    INSERT INTO transactions_fts(rowid, description, category, account)
+    SELECT t.id, t.description, c.name, a.name
+    FROM transactions t
+    LEFT JOIN categories c ON c.id = t.category_id
+    LEFT JOIN accounts a ON a.id = t.account_id
+"""
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "ALTER TABLE transactions ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """CREATE OR REPLACE FUNCTION transactions_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', unaccent(coalesce(NEW.description, ''))), 'A') ||
+            setweight(to_tsvector('simple', unaccent(coalesce(
+                (SELECT name FROM categories WHERE id = NEW.category_id), ''))), 'B') ||
+            setweight(to_tsvector('simple', unaccent(coalesce(
+                (SELECT name FROM accounts WHERE id = NEW.account_id), ''))), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS transactions_search_vector ON transactions",
+    """CREATE TRIGGER transactions_search_vector
+    BEFORE INSERT OR UPDATE OF description, category_id, account_id ON transactions
+    FOR EACH ROW EXECUTE FUNCTION transactions_search_vector()""",
+    # Renames touch the transactions so the trigger above recomputes their vectors
+    """CREATE OR REPLACE FUNCTION transactions_search_rename() RETURNS trigger AS $$
+    BEGIN
+        IF TG_TABLE_NAME = 'categories' THEN
+            UPDATE transactions SET category_id = category_id WHERE category_id = NEW.id;
+        ELSE
+            UPDATE transactions SET account_id = account_id WHERE account_id = NEW.id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS categories_search_rename ON categories",
+    """CREATE TRIGGER categories_search_rename AFTER UPDATE OF name ON categories
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name) EXECUTE FUNCTION transactions_search_rename()""",
+    "DROP TRIGGER IF EXISTS accounts_search_rename ON accounts",
+    """CREATE TRIGGER accounts_search_rename AFTER UPDATE OF name ON accounts
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name) EXECUTE FUNCTION transactions_search_rename()""",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_search_vector ON transactions USING GIN (search_vector)",
+]
+
+POSTGRES_BACKFILL = "UPDATE transactions SET description = description"
+
+# Per database URL: whether the search index exists (checked once per process)
+_available = {}
+
+
+class SearchService:
+    MAX_TERMS = 10
+
+    @staticmethod
+    def terms(query_text):
+        """Lowercase, accent-free word terms of a search string."""
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS accounts_fts_rename",
+    "DROP TRIGGER IF EXISTS categories_fts_rename",
+    "DROP TRIGGER IF EXISTS transactions_fts_delete",
+    "DROP TRIGGER IF EXISTS transactions_fts_update",
+    "DROP TRIGGER IF EXISTS transactions_fts_insert",
+    "DROP TABLE IF EXISTS transactions_fts",
+]
+
+POSTGRES_DROP = [
+    "DROP TRIGGER IF EXISTS accounts_search_rename ON accounts",
+    "DROP TRIGGER IF EXISTS categories_search_rename ON categories",
+    "DROP TRIGGER IF EXISTS transactions_search_vector ON transactions",
+    "DROP FUNCTION IF EXISTS transactions_search_rename()",
+    "DROP FUNCTION IF EXISTS transactions_search_vector()",
+    "DROP INDEX IF EXISTS ix_transactions_search_vector",
+    "ALTER TABLE transactions DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for statement in POSTGRES_DDL:
+            op.execute(statement)
+        op.execute(POSTGRES_BACKFILL)
+    elif dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+        op.execute(SQLITE_BACKFILL)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for statement in POSTGRES_DROP:
+            op.execute(statement)
+    elif dialect == 'sqlite':
+        for statement in SQLITE_DROP:
+            op.execute(statement)
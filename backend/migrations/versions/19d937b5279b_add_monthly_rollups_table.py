@@ -0,0 +1,65 @@
+"""Add monthly_rollups table
+
+Revision ID: 19d937b5279b
+Revises: fe92c23672a1
+Create Date: 2026-10-17 11:41:07.218455
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '19d937b5279b'
+down_revision = 'fe92c23672a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('monthly_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('month', sa.String(length=7), nullable=False),
+    sa.Column('is_transfer', sa.Boolean(), nullable=False),
+    sa.Column('is_split', sa.Boolean(), nullable=False),
+    sa.Column('income', sa.Float(), nullable=False),
+    sa.Column('expense', sa.Float(), nullable=False),
+    sa.Column('income_count', sa.Integer(), nullable=False),
+    sa.Column('expense_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('monthly_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_monthly_rollups_key', ['user_id', 'account_id', 'category_id', 'month', 'is_transfer', 'is_split'], unique=False)
+        batch_op.create_index('ix_monthly_rollups_user_id_month', ['user_id', 'month'], unique=False)
+
+    # Backfill from existing transactions (same shape as RollupService.rebuild)
+    if op.get_bind().dialect.name == 'postgresql':
+        month = "to_char(date, 'YYYY-MM')"
+    else:
+        month = "strftime('%Y-%m', date)"
+
+    op.execute(
+        "INSERT INTO monthly_rollups (user_id, account_id, category_id, month, is_transfer, is_split, "
+        "income, expense, income_count, expense_count) "
+        f"SELECT user_id, account_id, category_id, {month}, transfer_id IS NOT NULL, parent_id IS NOT NULL, "
+        "SUM(CASE WHEN amount > 0 THEN amount ELSE 0.0 END), "
+        "SUM(CASE WHEN amount > 0 THEN 0.0 ELSE -amount END), "
+        "SUM(CASE WHEN amount > 0 THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN amount > 0 THEN 0 ELSE 1 END) "
+        "FROM transactions WHERE deleted_at IS NULL "
+        f"GROUP BY user_id, account_id, category_id, {month}, transfer_id IS NOT NULL, parent_id IS NOT NULL"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('monthly_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_monthly_rollups_user_id_month')
+        batch_op.drop_index('ix_monthly_rollups_key')
+
+    op.drop_table('monthly_rollups')
@@ -0,0 +1,95 @@
+"""Add fingerprint to transactions for duplicate detection
+
+Revision ID: 68284c811bd8
+Revises: e692dc724bc2
+Create Date: 2026-10-17 16:02:41.518230
+
+"""
+import hashlib
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '68284c811bd8'
+down_revision = 'e692dc724bc2'
+branch_labels = None
+depends_on = None
+
+UPDATE_BATCH_SIZE = 5000
+
+transactions = sa.table(
+    'transactions',
+    sa.column('id', sa.Integer),
+    sa.column('account_id', sa.Integer),
+    sa.column('date', sa.DateTime),
+    sa.column('amount', sa.Float),
+    sa.column('description', sa.String),
+    sa.column('parent_id', sa.Integer),
+    sa.column('transfer_id', sa.Integer),
+    sa.column('fingerprint', sa.String),
+)
+
+
+# Frozen copy of DuplicateService.fingerprint at the time of this migration
+def fingerprint(account_id, date, amount, description, occurrence=1):
+    text = unicodedata.normalize('NFKD', description or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    key = f"{account_id}|{date:%Y-%m-%d}|{int(round(float(amount) * 100))}|{' '.join(re.findall(r'[a-z0-9]+', text))}"
+    if occurrence > 1:
+        key += f"|{occurrence}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def backfill_fingerprints():
+    """Existing identical rows get occurrence numbers, so the unique index can be built"""
+    conn = op.get_bind()
+    account_ids = [row[0] for row in conn.execute(sa.select(transactions.c.account_id).distinct())]
+
+    for account_id in account_ids:
+        rows = conn.execute(
+            sa.select(transactions.c.id, transactions.c.date, transactions.c.amount, transactions.c.description)
+            .where(
+                transactions.c.account_id == account_id,
+                transactions.c.parent_id.is_(None),
+                transactions.c.transfer_id.is_(None),
+                transactions.c.date.isnot(None)
+            )
+            .order_by(transactions.c.date, transactions.c.id)
+        ).all()
+
+        seen = {}
+        updates = []
+        for tx_id, date, amount, description in rows:
+            base = fingerprint(account_id, date, amount, description)
+            occurrence = seen.get(base, 0) + 1
+            seen[base] = occurrence
+            updates.append({
+                "tx_id": tx_id,
+                "fp": base if occurrence == 1 else fingerprint(account_id, date, amount, description, occurrence)
+            })
+
+        stmt = transactions.update()\
+            .where(transactions.c.id == sa.bindparam('tx_id'))\
+            .values(fingerprint=sa.bindparam('fp'))
+        for start in range(0, len(updates), UPDATE_BATCH_SIZE):
+            conn.execute(stmt, updates[start:start + UPDATE_BATCH_SIZE])
+
+
+def upgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fingerprint', sa.String(length=40), nullable=True))
+
+    backfill_fingerprints()
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_transactions_account_id_fingerprint', ['account_id', 'fingerprint'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_account_id_fingerprint')
+        batch_op.drop_column('fingerprint')
@@ -0,0 +1,49 @@
+"""Unique monthly rollup buckets
+
+Revision ID: 6a7a748734b4
+Revises: b413ba860000
+Create Date: 2026-10-18 09:12:41.208315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a7a748734b4'
+down_revision = 'b413ba860000'
+branch_labels = None
+depends_on = None
+
+BUCKET = "user_id, account_id, coalesce(category_id, 0), month, is_transfer, is_split"
+SAME_BUCKET = (
+    "d.user_id = monthly_rollups.user_id AND d.account_id = monthly_rollups.account_id "
+    "AND coalesce(d.category_id, 0) = coalesce(monthly_rollups.category_id, 0) "
+    "AND d.month = monthly_rollups.month AND d.is_transfer = monthly_rollups.is_transfer "
+    "AND d.is_split = monthly_rollups.is_split"
+)
+
+
+def upgrade():
+    # Merge buckets duplicated by concurrent first writes into their oldest row
+    op.execute(
+        "UPDATE monthly_rollups SET "
+        f"income = (SELECT SUM(d.income) FROM monthly_rollups d WHERE {SAME_BUCKET}), "
+        f"expense = (SELECT SUM(d.expense) FROM monthly_rollups d WHERE {SAME_BUCKET}), "
+        f"income_count = (SELECT SUM(d.income_count) FROM monthly_rollups d WHERE {SAME_BUCKET}), "
+        f"expense_count = (SELECT SUM(d.expense_count) FROM monthly_rollups d WHERE {SAME_BUCKET}) "
+        f"WHERE id IN (SELECT MIN(id) FROM monthly_rollups GROUP BY {BUCKET} HAVING COUNT(*) > 1)"
+    )
+    op.execute(f"DELETE FROM monthly_rollups WHERE id NOT IN (SELECT MIN(id) FROM monthly_rollups GROUP BY {BUCKET})")
+
+    with op.batch_alter_table('monthly_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_monthly_rollups_key')
+    op.create_index('uq_monthly_rollups_key', 'monthly_rollups', [
+        'user_id', 'account_id', sa.text('coalesce(category_id, 0)'), 'month', 'is_transfer', 'is_split'
+    ], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_monthly_rollups_key', table_name='monthly_rollups')
+    with op.batch_alter_table('monthly_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_monthly_rollups_key', ['user_id', 'account_id', 'category_id', 'month', 'is_transfer', 'is_split'], unique=False)
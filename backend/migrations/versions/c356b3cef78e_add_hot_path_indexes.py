@@ -0,0 +1,71 @@
+"""Add indexes for transaction, transfer, price and rate hot paths
+
+Revision ID: c356b3cef78e
+Revises: 33068e09b0ca
+Create Date: 2026-10-17 09:12:41.502731
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c356b3cef78e'
+down_revision = '33068e09b0ca'
+branch_labels = None
+depends_on = None
+
+# Partial index predicate for "main, not deleted" transactions
+MAIN_TX_WHERE = sa.text('parent_id IS NULL AND deleted_at IS NULL')
+
+
+def upgrade():
+    with op.batch_alter_table('accounts', schema=None) as batch_op:
+        batch_op.create_index('ix_accounts_user_id', ['user_id'], unique=False)
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_transactions_account_id_date', ['account_id', 'date'], unique=False)
+        batch_op.create_index('ix_transactions_category_id_date', ['category_id', 'date'], unique=False)
+        batch_op.create_index('ix_transactions_parent_id', ['parent_id'], unique=False)
+        batch_op.create_index('ix_transactions_transfer_id', ['transfer_id'], unique=False)
+        batch_op.create_index('ix_transactions_main_account_id_date', ['account_id', 'date'], unique=False,
+                              postgresql_where=MAIN_TX_WHERE, sqlite_where=MAIN_TX_WHERE)
+        batch_op.create_index('ix_transactions_main_category_id_date', ['category_id', 'date'], unique=False,
+                              postgresql_where=MAIN_TX_WHERE, sqlite_where=MAIN_TX_WHERE)
+
+    with op.batch_alter_table('investments', schema=None) as batch_op:
+        batch_op.create_index('ix_investments_account_id_symbol', ['account_id', 'symbol'], unique=False)
+
+    with op.batch_alter_table('investment_price_history', schema=None) as batch_op:
+        batch_op.create_index('ix_investment_price_history_investment_id_date', ['investment_id', 'date'], unique=False)
+
+    with op.batch_alter_table('exchange_rates', schema=None) as batch_op:
+        batch_op.create_index('ix_exchange_rates_pair_date', ['currency_from', 'currency_to', 'date'], unique=False)
+
+    with op.batch_alter_table('recurring_transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_recurring_transactions_user_id_next_due', ['user_id', 'next_due'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('recurring_transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_recurring_transactions_user_id_next_due')
+
+    with op.batch_alter_table('exchange_rates', schema=None) as batch_op:
+        batch_op.drop_index('ix_exchange_rates_pair_date')
+
+    with op.batch_alter_table('investment_price_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_investment_price_history_investment_id_date')
+
+    with op.batch_alter_table('investments', schema=None) as batch_op:
+        batch_op.drop_index('ix_investments_account_id_symbol')
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_main_category_id_date')
+        batch_op.drop_index('ix_transactions_main_account_id_date')
+        batch_op.drop_index('ix_transactions_transfer_id')
+        batch_op.drop_index('ix_transactions_parent_id')
+        batch_op.drop_index('ix_transactions_category_id_date')
+        batch_op.drop_index('ix_transactions_account_id_date')
+
+    with op.batch_alter_table('accounts', schema=None) as batch_op:
+        batch_op.drop_index('ix_accounts_user_id')
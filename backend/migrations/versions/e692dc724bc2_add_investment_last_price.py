@@ -0,0 +1,37 @@
+"""Add last_price and last_price_date to investments
+
+Revision ID: e692dc724bc2
+Revises: c7e510412330
+Create Date: 2026-10-17 14:08:30.915262
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e692dc724bc2'
+down_revision = 'c7e510412330'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('investments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_price', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('last_price_date', sa.DateTime(), nullable=True))
+
+    # Backfill from the latest price history row of each holding
+    op.execute(
+        "UPDATE investments SET "
+        "last_price = (SELECT h.price FROM investment_price_history h "
+        "  WHERE h.investment_id = investments.id ORDER BY h.date DESC, h.id DESC LIMIT 1), "
+        "last_price_date = (SELECT MAX(h.date) FROM investment_price_history h "
+        "  WHERE h.investment_id = investments.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('investments', schema=None) as batch_op:
+        batch_op.drop_column('last_price_date')
+        batch_op.drop_column('last_price')
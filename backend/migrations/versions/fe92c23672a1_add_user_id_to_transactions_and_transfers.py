@@ -0,0 +1,63 @@
+"""Add denormalized user_id to transactions and transfers
+
+Revision ID: fe92c23672a1
+Revises: c356b3cef78e
+Create Date: 2026-10-17 10:03:18.774120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fe92c23672a1'
+down_revision = 'c356b3cef78e'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def backfill_user_id(table, account_column):
+    """Copy accounts.user_id into table.user_id in id ranges to keep each UPDATE short"""
+    conn = op.get_bind()
+    max_id = conn.execute(sa.text(f"SELECT MAX(id) FROM {table}")).scalar() or 0
+
+    for start in range(0, max_id + 1, BACKFILL_BATCH_SIZE):
+        conn.execute(sa.text(
+            f"UPDATE {table} SET user_id = ("
+            f"  SELECT accounts.user_id FROM accounts WHERE accounts.id = {table}.{account_column}"
+            f") WHERE id >= :start AND id < :end AND user_id IS NULL"
+        ), {"start": start, "end": start + BACKFILL_BATCH_SIZE})
+
+
+def upgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('user_id', sa.Integer(), nullable=True))
+    with op.batch_alter_table('transfers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('user_id', sa.Integer(), nullable=True))
+
+    backfill_user_id('transactions', 'account_id')
+    backfill_user_id('transfers', 'from_account_id')
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_transactions_user_id_users', 'users', ['user_id'], ['id'])
+    with op.batch_alter_table('transfers', schema=None) as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_transfers_user_id_users', 'users', ['user_id'], ['id'])
+
+    op.create_index('ix_transactions_user_id_date', 'transactions', ['user_id', sa.text('date DESC')], unique=False)
+    op.create_index('ix_transfers_user_id_date', 'transfers', ['user_id', sa.text('date DESC')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_transfers_user_id_date', table_name='transfers')
+    op.drop_index('ix_transactions_user_id_date', table_name='transactions')
+
+    with op.batch_alter_table('transfers', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_transfers_user_id_users', type_='foreignkey')
+        batch_op.drop_column('user_id')
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_transactions_user_id_users', type_='foreignkey')
+        batch_op.drop_column('user_id')
@@ -37,6 +37,8 @@ class User(BaseModel):
     password_hash = db.Column(db.String(255), nullable=False)
     reset_token = db.Column(db.String(100), nullable=True)
     reset_token_expires = db.Column(db.DateTime, nullable=True)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0') # Bumped on every write (see cache.py)
+    base_currency = db.Column(db.String(3), nullable=True) # Dashboard currency, None = COP
     
     def generate_reset_token(self):
         """Generate a password reset token valid for 1 hour"""
@@ -71,6 +73,9 @@ class User(BaseModel):
 
 class Account(BaseModel):
     __tablename__ = 'accounts'
+    __table_args__ = (
+        db.Index('ix_accounts_user_id', 'user_id'),
+    )
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
     type = db.Column(db.Enum(AccountType), nullable=False)
@@ -99,6 +104,23 @@ class Category(BaseModel):
 
 class Transaction(BaseModel):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        db.Index('ix_transactions_account_id_date', 'account_id', 'date'),
+        db.Index('ix_transactions_category_id_date', 'category_id', 'date'),
+        db.Index('ix_transactions_parent_id', 'parent_id'),
+        db.Index('ix_transactions_transfer_id', 'transfer_id'),
+        # Exact duplicate guard (see services/duplicate_service.py); NULL for splits and transfers
+        db.Index('ix_transactions_account_id_fingerprint', 'account_id', 'fingerprint', unique=True),
+        # Partial indexes for "main, not deleted" reads
+        db.Index('ix_transactions_main_account_id_date', 'account_id', 'date',
+                 postgresql_where=db.text('parent_id IS NULL AND deleted_at IS NULL'),
+                 sqlite_where=db.text('parent_id IS NULL AND deleted_at IS NULL')),
+        db.Index('ix_transactions_main_category_id_date', 'category_id', 'date',
+                 postgresql_where=db.text('parent_id IS NULL AND deleted_at IS NULL'),
+                 sqlite_where=db.text('parent_id IS NULL AND deleted_at IS NULL')),
+    )
+    # Denormalized owner (same as account.user_id) so user reads skip the Account join
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
     amount = db.Column(db.Float, nullable=False) # Negative for expense, Positive for income
     description = db.Column(db.String(200))
@@ -113,16 +135,60 @@ class Transaction(BaseModel):
     # Polymorphic links (Transfer, Investment operation) could be done here or handled by service logic
     transfer_id = db.Column(db.Integer, db.ForeignKey('transfers.id'), nullable=True)
 
+    # sha1 of (account, day, amount in minor units, normalized description[, occurrence])
+    fingerprint = db.Column(db.String(40), nullable=True)
+
 class Transfer(BaseModel):
     __tablename__ = 'transfers'
+    # Denormalized owner (same as from_account.user_id)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     from_account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
     to_account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
     amount = db.Column(db.Float, nullable=False)
     date = db.Column(db.DateTime, default=datetime.utcnow)
     description = db.Column(db.String(200))
 
+# "This user's transactions/transfers ordered by date" (declared after the class to use .desc())
+db.Index('ix_transactions_user_id_date', Transaction.user_id, Transaction.date.desc())
+db.Index('ix_transfers_user_id_date', Transfer.user_id, Transfer.date.desc())
+
+class MonthlyRollup(db.Model):
+    """
+    Per-month income/expense sums and counts for each (user, account, category).
+    Maintained in the same DB transaction as the Transaction rows by RollupService;
+    rebuild with rebuild_rollups.py.
+    """
+    __tablename__ = 'monthly_rollups'
+    __table_args__ = (
+        db.Index('ix_monthly_rollups_user_id_month', 'user_id', 'month'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)
+    month = db.Column(db.String(7), nullable=False) # 'YYYY-MM'
+    is_transfer = db.Column(db.Boolean, nullable=False, default=False)
+    is_split = db.Column(db.Boolean, nullable=False, default=False) # Split child rows (parent_id set)
+
+    income = db.Column(db.Float, nullable=False, default=0.0)
+    expense = db.Column(db.Float, nullable=False, default=0.0) # Positive
+    income_count = db.Column(db.Integer, nullable=False, default=0)
+    expense_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def bucket_key(cls):
+        """Columns of the unique bucket index (NULL category folded into 0 so it collides)."""
+        return (cls.user_id, cls.account_id, db.func.coalesce(cls.category_id, db.literal_column('0')),
+                cls.month, cls.is_transfer, cls.is_split)
+
+# One row per bucket, so RollupService can upsert into it (declared after the class to use an expression)
+db.Index('uq_monthly_rollups_key', *MonthlyRollup.bucket_key(), unique=True)
+
 class Investment(BaseModel):
     __tablename__ = 'investments'
+    __table_args__ = (
+        db.Index('ix_investments_account_id_symbol', 'account_id', 'symbol'),
+    )
     account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
     symbol = db.Column(db.String(20), nullable=False)
     name = db.Column(db.String(100))
@@ -133,20 +199,39 @@ class Investment(BaseModel):
     quantity = db.Column(db.Float, default=0.0)
     avg_buy_price = db.Column(db.Float, default=0.0)
     
-    price_history = db.relationship('InvestmentPriceHistory', backref='investment', lazy=True)
+    # Latest known price, maintained by InvestmentService.record_price
+    last_price = db.Column(db.Float, nullable=True)
+    last_price_date = db.Column(db.DateTime, nullable=True)
+    
+    price_history = db.relationship('InvestmentPriceHistory', backref='investment', lazy=True,
+                                    order_by='InvestmentPriceHistory.date')
 
     @property
     def total_cost(self):
         return self.quantity * self.avg_buy_price
 
+    @property
+    def current_price(self):
+        return self.last_price if self.last_price is not None else self.avg_buy_price
+
+    @property
+    def current_value(self):
+        return self.quantity * self.current_price
+
 class InvestmentPriceHistory(BaseModel):
     __tablename__ = 'investment_price_history'
+    __table_args__ = (
+        db.Index('ix_investment_price_history_investment_id_date', 'investment_id', 'date'),
+    )
     investment_id = db.Column(db.Integer, db.ForeignKey('investments.id'), nullable=False)
     price = db.Column(db.Float, nullable=False)
     date = db.Column(db.DateTime, default=datetime.utcnow)
 
 class ExchangeRate(BaseModel):
     __tablename__ = 'exchange_rates'
+    __table_args__ = (
+        db.Index('ix_exchange_rates_pair_date', 'currency_from', 'currency_to', 'date'),
+    )
     currency_from = db.Column(db.String(3), nullable=False)
     currency_to = db.Column(db.String(3), nullable=False)
     rate = db.Column(db.Float, nullable=False)
@@ -197,6 +282,9 @@ class SavingsGoal(BaseModel):
 
 class RecurringTransaction(BaseModel):
     __tablename__ = 'recurring_transactions'
+    __table_args__ = (
+        db.Index('ix_recurring_transactions_user_id_next_due', 'user_id', 'next_due'),
+    )
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)
@@ -253,3 +341,27 @@ class RecurringTransaction(BaseModel):
         if not self.next_due:
             return True
         return datetime.utcnow() >= self.next_due
+
+class ExportJob(BaseModel):
+    """
+    A background export (see services/export_job_service.py). The artifact lives in
+    instance/exports/<file_name> until expires_at.
+    """
+    __tablename__ = 'export_jobs'
+    __table_args__ = (
+        db.Index('ix_export_jobs_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_export_jobs_expires_at', 'expires_at'),
+    )
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # transactions, accounts, full-report
+    params = db.Column(db.Text)  # JSON of the export filters
+    compress = db.Column(db.Boolean, nullable=False, default=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    file_name = db.Column(db.String(100))
+    size = db.Column(db.BigInteger)
+    error = db.Column(db.String(500))
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime)
+    worker = db.Column(db.String(100))  # host:pid of the worker whose pool holds the job
+    heartbeat_at = db.Column(db.DateTime)  # touched by that worker while the job is pending or running
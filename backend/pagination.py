@@ -0,0 +1,104 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are read with WHERE (col1, col2) < (last1, last2) ORDER BY col1, col2 LIMIT n
+instead of OFFSET, so page 500 costs the same as page 1 and rows inserted while
+the user scrolls don't shift the following pages. The last key column must be
+unique (the id) so the ordering is total.
+
+The cursor handed to clients is opaque: base64url of the last row's key values.
+"""
+import base64
+import json
+from datetime import datetime, date
+
+from flask import request
+from sqlalchemy import tuple_
+
+
+def encode_cursor(values):
+    payload = []
+    for value in values:
+        if isinstance(value, datetime):
+            value = {"dt": value.isoformat()}
+        elif isinstance(value, date):
+            value = {"d": value.isoformat()}
+        payload.append(value)
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(payload, list):
+        raise ValueError("Invalid cursor")
+
+    values = []
+    for value in payload:
+        if isinstance(value, dict):
+            if "dt" in value:
+                value = datetime.fromisoformat(value["dt"])
+            elif "d" in value:
+                value = date.fromisoformat(value["d"])
+            else:
+                raise ValueError("Invalid cursor")
+        values.append(value)
+    return values
+
+
+def page_args(default_limit=50, max_limit=500, limit_param='limit'):
+    """
+    Reads ?cursor= and ?limit= from the request.
+    Returns (cursor_values or None, limit). Raises ValueError on a bad cursor.
+    With default_limit=None the list is unpaged (limit None) unless ?limit= is sent.
+    """
+    limit = request.args.get(limit_param, default_limit, type=int) or default_limit
+    if limit is not None:
+        limit = max(1, min(limit, max_limit))
+    cursor = request.args.get('cursor')
+    return (decode_cursor(cursor) if cursor else None), limit
+
+
+def wants_total():
+    return request.args.get('include_total', 'false').lower() == 'true'
+
+
+def keyset_page(query, columns, key, cursor=None, limit=50, descending=True):
+    """
+    Fetches one page of `query` ordered by `columns`.
+
+    key(item) must return the values of `columns` for a fetched item; the last
+    item's key becomes the next cursor. Returns (items, next_cursor), with
+    next_cursor None on the last page. limit=None fetches every row after the cursor.
+    """
+    if cursor is not None:
+        if len(cursor) != len(columns):
+            raise ValueError("Invalid cursor")
+        row_key = tuple_(*columns)
+        query = query.filter(row_key < tuple_(*cursor) if descending else row_key > tuple_(*cursor))
+
+    order = [c.desc() for c in columns] if descending else [c.asc() for c in columns]
+    if limit is None:
+        return query.order_by(*order).all(), None
+    # One extra row tells whether there is a next page without counting
+    items = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(key(items[-1]))
+    return items, next_cursor
+
+
+def set_page_headers(response, next_cursor, total=None):
+    """For endpoints that return a bare JSON list: the cursor travels in headers."""
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    if total is not None:
+        response.headers['X-Total-Count'] = str(total)
+    return response
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Script para reconstruir la tabla de resúmenes mensuales (monthly_rollups)
+Ejecutar: python rebuild_rollups.py [--user ID]
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from extensions import db
+from models import MonthlyRollup, Transaction
+from services.rollup_service import RollupService
+from sqlalchemy import func
+
+def rebuild_rollups(user_id=None):
+    """Reconstruye los resúmenes mensuales a partir de las transacciones"""
+    app = create_app()
+
+    with app.app_context():
+        scope = f"usuario {user_id}" if user_id is not None else "todos los usuarios"
+        print(f"📊 Reconstruyendo resúmenes mensuales para {scope}...\n")
+
+        rows = RollupService.rebuild(user_id=user_id)
+        db.session.commit()
+
+        # Verificación: la suma de los resúmenes debe coincidir con las transacciones
+        tx_query = db.session.query(func.count(Transaction.id), func.coalesce(func.sum(Transaction.amount), 0.0))\
+            .filter(Transaction.deleted_at.is_(None))
+        rollup_query = db.session.query(
+            func.coalesce(func.sum(MonthlyRollup.income_count + MonthlyRollup.expense_count), 0),
+            func.coalesce(func.sum(MonthlyRollup.income - MonthlyRollup.expense), 0.0)
+        )
+        if user_id is not None:
+            tx_query = tx_query.filter(Transaction.user_id == user_id)
+            rollup_query = rollup_query.filter(MonthlyRollup.user_id == user_id)
+
+        tx_count, tx_sum = tx_query.one()
+        rollup_count, rollup_sum = rollup_query.one()
+
+        print(f"\n{'='*60}")
+        print(f"📈 Resumen:")
+        print(f"   Filas de resumen escritas: {rows}")
+        print(f"   Transacciones:  {tx_count} (suma ${tx_sum:,.2f})")
+        print(f"   En resúmenes:   {rollup_count} (suma ${rollup_sum:,.2f})")
+        print(f"{'='*60}\n")
+
+        if tx_count == rollup_count and abs(tx_sum - rollup_sum) < 0.01:
+            print("✅ ¡Resúmenes reconstruidos exitosamente!")
+        else:
+            print("⚠️ Los totales no coinciden, revisa las transacciones.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstruye la tabla monthly_rollups")
+    parser.add_argument('--user', type=int, default=None, help="Reconstruir solo para este usuario")
+    args = parser.parse_args()
+
+    try:
+        rebuild_rollups(user_id=args.user)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
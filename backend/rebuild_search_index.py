@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Script para recrear el índice de búsqueda de transacciones (FTS5 en SQLite,
+tsvector en Postgres) y sus triggers, y reindexar todas las transacciones.
+Útil si una migración recreó la tabla transactions (SQLite pierde los triggers).
+Ejecutar: python rebuild_search_index.py
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from extensions import db
+from models import Transaction
+from services.search_service import SearchService
+
+def rebuild_search_index():
+    """Crea (si falta) y reconstruye el índice de búsqueda"""
+    app = create_app()
+
+    with app.app_context():
+        print(f"🔎 Reconstruyendo índice de búsqueda ({SearchService.dialect()})...\n")
+
+        SearchService.install(rebuild=True)
+        db.session.commit()
+
+        count = db.session.query(Transaction.id).count()
+        print(f"✅ Índice reconstruido: {count} transacciones indexadas")
+
+if __name__ == "__main__":
+    try:
+        rebuild_search_index()
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
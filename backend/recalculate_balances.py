@@ -1,79 +1,69 @@
 #!/usr/bin/env python3
 """
 Script para recalcular balances de todas las cuentas
-Ejecutar: python recalculate_balances.py
+Ejecutar: python recalculate_balances.py [--user ID] [--chunk-size N] [--dry-run]
 """
 import sys
 import os
+import argparse
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app
 from extensions import db
-from models import Account, Transaction
-from sqlalchemy import func
+from models import Account
+from services.balance_service import BalanceService
 
-def recalculate_all_balances():
+def recalculate_all_balances(user_id=None, chunk_size=5000, dry_run=False):
     """Recalcula los balances de todas las cuentas basándose en transacciones"""
     app = create_app()
-    
+
     with app.app_context():
-        # Obtener todas las cuentas activas
-        accounts = Account.query.filter_by(deleted_at=None).all()
-        
-        print(f"📊 Recalculando balances para {len(accounts)} cuentas...\n")
-        
-        updated_count = 0
+        # Contar cuentas activas
+        accounts_query = Account.query.filter_by(deleted_at=None)
+        if user_id is not None:
+            accounts_query = accounts_query.filter_by(user_id=user_id)
+        account_count = accounts_query.count()
+
+        mode = " (simulación, sin guardar)" if dry_run else ""
+        print(f"📊 Recalculando balances para {account_count} cuentas{mode}...\n")
+
+        # Un agregado GROUP BY account_id por bloque de cuentas; solo se tocan las desfasadas
+        updated = BalanceService.recalculate(user_id=user_id, chunk_size=chunk_size, dry_run=dry_run)
         total_difference = 0
-        
-        for account in accounts:
-            # Calcular balance correcto: suma de todas las transacciones principales
-            result = db.session.query(
-                func.coalesce(func.sum(Transaction.amount), 0.0)
-            ).filter(
-                Transaction.account_id == account.id,
-                Transaction.parent_id.is_(None),  # Solo transacciones principales
-                Transaction.deleted_at.is_(None)   # No incluir eliminadas
-            ).scalar()
-            
-            old_balance = account.balance
-            new_balance = float(result) if result else 0.0
-            difference = new_balance - old_balance
-            
-            # Actualizar balance si hay diferencia
-            if abs(difference) > 0.01:
-                account.balance = new_balance
-                updated_count += 1
-                total_difference += abs(difference)
-                
-                print(f"✅ {account.name} (ID: {account.id})")
-                print(f"   Balance anterior: ${old_balance:,.2f}")
-                print(f"   Balance nuevo:    ${new_balance:,.2f}")
-                print(f"   Diferencia:       ${difference:+,.2f}\n")
-            else:
-                print(f"✓ {account.name} (ID: {account.id}) - Balance correcto: ${new_balance:,.2f}")
-        
-        # Guardar cambios
-        db.session.commit()
-        
+
+        for account in updated:
+            total_difference += abs(account['difference'])
+            print(f"✅ {account['name']} (ID: {account['id']})")
+            print(f"   Balance anterior: ${account['old_balance'] or 0:,.2f}")
+            print(f"   Balance nuevo:    ${account['new_balance']:,.2f}")
+            print(f"   Diferencia:       ${account['difference']:+,.2f}\n")
+
         print(f"\n{'='*60}")
         print(f"📈 Resumen:")
-        print(f"   Cuentas revisadas: {len(accounts)}")
-        print(f"   Cuentas actualizadas: {updated_count}")
-        print(f"   Diferencia total corregida: ${total_difference:,.2f}")
+        print(f"   Cuentas revisadas: {account_count}")
+        print(f"   Cuentas {'por actualizar' if dry_run else 'actualizadas'}: {len(updated)}")
+        print(f"   Diferencia total {'detectada' if dry_run else 'corregida'}: ${total_difference:,.2f}")
         print(f"{'='*60}\n")
-        
-        if updated_count > 0:
+
+        if dry_run:
+            db.session.rollback()
+            print("ℹ️ Simulación: no se guardaron cambios.")
+        elif updated:
             print("✅ ¡Balances recalculados exitosamente!")
         else:
             print("✓ Todos los balances ya estaban correctos.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcula los balances de las cuentas a partir de sus transacciones")
+    parser.add_argument('--user', type=int, default=None, help="Solo las cuentas de este usuario")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="Cuentas por bloque (memoria acotada)")
+    parser.add_argument('--dry-run', action='store_true', help="Solo reportar diferencias, sin guardar")
+    args = parser.parse_args()
+
     try:
-        recalculate_all_balances()
+        recalculate_all_balances(user_id=args.user, chunk_size=args.chunk_size, dry_run=args.dry_run)
     except Exception as e:
         print(f"\n❌ Error: {e}")
         sys.exit(1)
-
-
@@ -0,0 +1,97 @@
+from extensions import db
+from models import Account, Transaction
+from cache import bump_data_version
+from sqlalchemy import func, and_, update, select
+
+class BalanceService:
+    DRIFT_TOLERANCE = 0.01
+
+    @staticmethod
+    def _totals(account_ids=None, id_range=None):
+        """
+        Correct balance per account: sum of main (non-split), non-deleted transactions.
+        Accounts without transactions get 0.
+        """
+        total = func.coalesce(func.sum(Transaction.amount), 0.0)
+        query = select(Account.id.label('account_id'), total.label('total'))\
+            .select_from(Account)\
+            .outerjoin(Transaction, and_(
+                Transaction.account_id == Account.id,
+                Transaction.parent_id.is_(None),
+                Transaction.deleted_at.is_(None)
+            ))\
+            .group_by(Account.id)
+        if account_ids is not None:
+            query = query.where(Account.id.in_(account_ids))
+        if id_range is not None:
+            query = query.where(Account.id.between(*id_range))
+        return query.subquery()
+
+    @staticmethod
+    def _find_drift(user_id, id_range):
+        totals = BalanceService._totals(id_range=id_range)
+        query = select(
+            Account.id, Account.user_id, Account.name, Account.balance, totals.c.total
+        ).join(totals, totals.c.account_id == Account.id)\
+            .where(
+                Account.deleted_at.is_(None),
+                func.abs(func.coalesce(Account.balance, 0.0) - totals.c.total) > BalanceService.DRIFT_TOLERANCE
+            ).order_by(Account.id)
+        if user_id is not None:
+            query = query.where(Account.user_id == user_id)
+        return db.session.execute(query).all()
+
+    @staticmethod
+    def _apply(drifted):
+        if db.session.get_bind().dialect.name == 'postgresql':
+            # Single UPDATE ... FROM (aggregate) for the drifted accounts
+            totals = BalanceService._totals(account_ids=[row.id for row in drifted])
+            db.session.execute(
+                update(Account)
+                .where(Account.id == totals.c.account_id)
+                .values(balance=totals.c.total)
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            # executemany UPDATE by primary key
+            db.session.execute(
+                update(Account),
+                [{"id": row.id, "balance": row.total} for row in drifted]
+            )
+
+    @staticmethod
+    def recalculate(user_id=None, chunk_size=5000, dry_run=False):
+        """
+        Recomputes account balances from transactions with set-based queries,
+        walking accounts in id chunks so memory stays bounded.
+        Returns only the accounts whose balance drifted. Commits per chunk unless dry_run.
+        """
+        id_query = db.session.query(func.min(Account.id), func.max(Account.id))
+        if user_id is not None:
+            id_query = id_query.filter(Account.user_id == user_id)
+        min_id, max_id = id_query.one()
+
+        updated = []
+        if min_id is None:
+            return updated
+
+        for start in range(min_id, max_id + 1, chunk_size):
+            drifted = BalanceService._find_drift(user_id, (start, start + chunk_size - 1))
+            if not drifted:
+                continue
+
+            updated.extend({
+                "id": row.id,
+                "name": row.name,
+                "old_balance": row.balance,
+                "new_balance": float(row.total),
+                "difference": float(row.total) - (row.balance or 0.0)
+            } for row in drifted)
+
+            if not dry_run:
+                BalanceService._apply(drifted)
+                for affected_user in {row.user_id for row in drifted}:
+                    bump_data_version(affected_user)
+                db.session.commit()
+
+        return updated
@@ -0,0 +1,213 @@
+import calendar
+from datetime import datetime
+
+from sqlalchemy import func, case
+
+from extensions import db
+from models import Account, AccountType, Budget, Investment, MonthlyRollup
+from services.rollup_service import RollupService
+from services.reference_service import ReferenceService
+from services.exchange_rate_service import ExchangeRateService
+from services.rate_history_service import RateHistoryService
+
+class DashboardService:
+    @staticmethod
+    def account_rates(user_id, base_currency):
+        """
+        {account_id: rate to base_currency} of the user's accounts, one rate per
+        currency from the current rate matrix. Accounts whose currency has no rate
+        are left out.
+        """
+        matrix = ExchangeRateService.get_matrix()
+        by_currency = {}
+        rates = {}
+        for account_id, account in ReferenceService.accounts(user_id).items():
+            code = account["currency_code"]
+            if code not in by_currency:
+                try:
+                    by_currency[code] = 1.0 if code == base_currency else matrix.rate(code, base_currency)
+                except KeyError:
+                    by_currency[code] = None
+            if by_currency[code] is not None:
+                rates[account_id] = by_currency[code]
+        return rates
+
+    @staticmethod
+    def _totals(user_id, column, since, base_currency=None, include_splits=False):
+        """
+        {column value: (income, expense)} in column order, for the months starting
+        with the month of `since`. With base_currency the rollups are summed per
+        account and converted at the account currency's rate (see account_rates);
+        without it each account's own currency is added as is.
+        """
+        group_by = (column,) if base_currency is None else (column, MonthlyRollup.account_id)
+        rows = RollupService.totals(
+            user_id,
+            group_by=group_by,
+            start_month=since.strftime('%Y-%m'),
+            include_splits=include_splits
+        )
+        if base_currency is None:
+            return {key: (float(inc), float(exp)) for key, inc, exp, _ in rows}
+
+        rates = DashboardService.account_rates(user_id, base_currency)
+        totals = {}
+        for key, account_id, inc, exp, _ in rows:
+            income, expense = totals.get(key, (0.0, 0.0))
+            rate = rates.get(account_id)
+            if rate is not None:
+                income, expense = income + float(inc) * rate, expense + float(exp) * rate
+            totals[key] = (income, expense)
+        return totals
+
+    @staticmethod
+    def month_end(month):
+        """Last day of a 'YYYY-MM' month."""
+        year, number = map(int, month.split('-'))
+        return datetime(year, number, calendar.monthrange(year, number)[1])
+
+    @staticmethod
+    def cashflow_by_month(user_id, since, base_currency=None):
+        """
+        Returns [{"month": "YYYY-MM", "income": x, "expense": y}, ...] sorted by month,
+        read from the monthly rollups (whole months, starting with the month of `since`).
+        With base_currency, past months are converted at the stored rate of their last
+        day (RateHistoryService) and the current month at the current rates, like the
+        other current-month figures.
+        """
+        if base_currency is None:
+            totals = DashboardService._totals(user_id, MonthlyRollup.month, since)
+            return [{"month": m, "income": inc, "expense": exp} for m, (inc, exp) in totals.items()]
+
+        rows = RollupService.totals(
+            user_id,
+            group_by=(MonthlyRollup.month, MonthlyRollup.account_id),
+            start_month=since.strftime('%Y-%m')
+        )
+        current_month = datetime.utcnow().strftime('%Y-%m')
+        current_rates = DashboardService.account_rates(user_id, base_currency)
+        accounts = ReferenceService.accounts(user_id)
+        # Month ends computed once per month, rates looked up in one batch
+        month_ends = {month: DashboardService.month_end(month) for month, *_ in rows if month != current_month}
+        past = [k for k, row in enumerate(rows) if row[0] != current_month]
+        past_rates = RateHistoryService.get().rates_at(
+            [accounts.get(rows[k][1], {}).get("currency_code") for k in past],
+            [base_currency] * len(past),
+            [month_ends[rows[k][0]] for k in past]
+        )
+        rates = dict(zip(past, past_rates))
+
+        totals = {}
+        for k, (month, account_id, inc, exp, _) in enumerate(rows):
+            income, expense = totals.get(month, (0.0, 0.0))
+            rate = current_rates.get(account_id) if month == current_month else rates[k]
+            if rate is not None:
+                income, expense = income + float(inc) * rate, expense + float(exp) * rate
+            totals[month] = (income, expense)
+        return [{"month": m, "income": inc, "expense": exp} for m, (inc, exp) in totals.items()]
+
+    @staticmethod
+    def totals_by_category(user_id, since, include_splits=False, base_currency=None):
+        """
+        Returns {category_id: (income, expense)} for the months starting with the month of `since`,
+        in base_currency if given. With include_splits, split children are counted under their
+        own categories.
+        """
+        return DashboardService._totals(user_id, MonthlyRollup.category_id, since, base_currency, include_splits)
+
+    @staticmethod
+    def month_summary(user_id, month_start, top_n=5, base_currency=None):
+        """
+        Current month income/expense, top expense categories and budget status,
+        all derived from one per-category rollup query. With base_currency the
+        amounts are converted to it and budget limits are read as amounts in it.
+        """
+        by_category = DashboardService.totals_by_category(user_id, month_start, base_currency=base_currency)
+        budgets = Budget.query.filter_by(user_id=user_id).all()
+
+        names = ReferenceService.category_names(user_id)
+
+        monthly_income = sum(inc for inc, _ in by_category.values())
+        monthly_expense = sum(exp for _, exp in by_category.values())
+
+        # Top expenses by category name
+        expenses_by_name = {}
+        for cat_id, (_, exp) in by_category.items():
+            if exp <= 0:
+                continue
+            name = names.get(cat_id, "Uncategorized") if cat_id else "Uncategorized"
+            expenses_by_name[name] = expenses_by_name.get(name, 0) + exp
+
+        top_expenses = sorted(expenses_by_name.items(), key=lambda x: x[1], reverse=True)[:top_n]
+
+        budget_status = []
+        for b in budgets:
+            actual = by_category.get(b.category_id, (0.0, 0.0))[1]
+            budget_status.append({
+                "category": names.get(b.category_id, "Unknown"),
+                "limit": b.amount,
+                "actual": actual,
+                "utilization": (actual / b.amount) * 100 if b.amount > 0 else 0
+            })
+
+        return {
+            "income": monthly_income,
+            "expense": monthly_expense,
+            "top_expenses": [{"category": k, "amount": v} for k, v in top_expenses],
+            "budget_status": budget_status
+        }
+
+    @staticmethod
+    def net_worth(user_id, base_currency):
+        """
+        Net worth, liquidity, debt and portfolio value in base_currency. Balances
+        and holdings are summed per currency in SQL and each currency is converted
+        once with the current rate matrix. Currencies without a rate are reported
+        in the breakdown but left out of the converted totals.
+        """
+        balances = db.session.query(
+            Account.currency_code,
+            func.coalesce(func.sum(case((Account.type.notin_([AccountType.CREDIT, AccountType.INVESTMENT]),
+                                         Account.balance), else_=0.0)), 0.0),
+            func.coalesce(func.sum(case((Account.type == AccountType.INVESTMENT, Account.balance), else_=0.0)), 0.0),
+            func.coalesce(func.sum(case(((Account.type == AccountType.CREDIT) & (Account.balance < 0),
+                                         -Account.balance), else_=0.0)), 0.0)
+        ).filter(Account.user_id == user_id).group_by(Account.currency_code).all()
+
+        # Holdings at the maintained last price, or avg buy if none
+        holdings = db.session.query(
+            Account.currency_code,
+            func.coalesce(func.sum(Investment.quantity * func.coalesce(Investment.last_price, Investment.avg_buy_price)), 0.0),
+            func.coalesce(func.sum(Investment.quantity * Investment.avg_buy_price), 0.0)
+        ).join(Account).filter(Account.user_id == user_id).group_by(Account.currency_code).all()
+
+        by_currency = {}
+        for code, liquidity, invested_cash, debt in balances:
+            by_currency[code] = {"currency": code, "liquidity": liquidity, "invested_cash": invested_cash,
+                                 "debt": debt, "portfolio_value": 0.0, "invested_cost": 0.0}
+        for code, value, cost in holdings:
+            entry = by_currency.setdefault(code, {"currency": code, "liquidity": 0.0, "invested_cash": 0.0,
+                                                  "debt": 0.0, "portfolio_value": 0.0, "invested_cost": 0.0})
+            entry["portfolio_value"], entry["invested_cost"] = value, cost
+
+        matrix = ExchangeRateService.get_matrix()
+        totals = dict.fromkeys(("liquidity", "invested_cash", "debt", "portfolio_value", "invested_cost"), 0.0)
+        breakdown = []
+        for code in sorted(by_currency, key=lambda c: (c is None, c or '')):
+            entry = by_currency[code]
+            entry["net_worth"] = entry["liquidity"] + entry["invested_cash"] + entry["portfolio_value"] - entry["debt"]
+            try:
+                rate = 1.0 if code == base_currency else matrix.rate(code, base_currency)
+            except KeyError:
+                rate = None
+            entry["rate"] = rate
+            entry["net_worth_converted"] = entry["net_worth"] * rate if rate is not None else None
+            if rate is not None:
+                for key in totals:
+                    totals[key] += entry[key] * rate
+            breakdown.append(entry)
+
+        totals["net_worth"] = totals["liquidity"] + totals["invested_cash"] + totals["portfolio_value"] - totals["debt"]
+        totals["currency"] = base_currency
+        totals["by_currency"] = breakdown
+        return totals
@@ -0,0 +1,177 @@
+"""
+Duplicate detection for transactions.
+
+Exact: every main (non-split, non-transfer) transaction stores a fingerprint of
+(account, day, amount in minor units, normalized description) with a unique
+index per account. Identical rows that are really distinct (two equal coffees on
+the same day) get an occurrence number in the fingerprint, so re-importing the
+same statement maps each row onto the same fingerprint again.
+
+Fuzzy: find_near_duplicates() sorts by (account, date) and only compares rows
+inside a sliding ±N-day window, then filters on the amount window and
+description similarity, instead of comparing every pair.
+"""
+import hashlib
+import re
+import unicodedata
+from datetime import timedelta
+from difflib import SequenceMatcher
+
+from extensions import db
+from models import Transaction
+
+
+class DuplicateTransactionError(ValueError):
+    def __init__(self, existing_id=None):
+        super().__init__("Possible duplicate transaction")
+        self.existing_id = existing_id
+
+
+class DuplicateService:
+    MAX_OCCURRENCES = 50
+    IN_CHUNK = 500
+
+    @staticmethod
+    def normalize_description(text):
+        """Lowercase, without accents or punctuation, single spaces."""
+        text = unicodedata.normalize('NFKD', text or '')
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+        return ' '.join(re.findall(r'[a-z0-9]+', text))
+
+    @staticmethod
+    def minor_units(amount):
+        return int(round(float(amount) * 100))
+
+    @staticmethod
+    def fingerprint(account_id, date, amount, description, occurrence=1):
+        key = f"{account_id}|{date:%Y-%m-%d}|{DuplicateService.minor_units(amount)}|" \
+              f"{DuplicateService.normalize_description(description)}"
+        if occurrence > 1:
+            key += f"|{occurrence}"
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    @staticmethod
+    def existing(account_ids, fingerprints):
+        """Fingerprints (of the given set) already stored for these accounts."""
+        fingerprints = list(fingerprints)
+        found = set()
+        for i in range(0, len(fingerprints), DuplicateService.IN_CHUNK):
+            chunk = fingerprints[i:i + DuplicateService.IN_CHUNK]
+            found.update(row.fingerprint for row in db.session.query(Transaction.fingerprint).filter(
+                Transaction.account_id.in_(account_ids),
+                Transaction.fingerprint.in_(chunk)
+            ))
+        return found
+
+    @staticmethod
+    def fingerprint_rows(rows, seen=None):
+        """
+        Sets row['fingerprint'] on dicts with account_id, date, amount, description.
+        Identical rows within the list get increasing occurrence numbers; pass the
+        same `seen` dict to keep counting across several lists (chunks of one file).
+        """
+        seen = {} if seen is None else seen
+        for row in rows:
+            base = DuplicateService.fingerprint(row['account_id'], row['date'], row['amount'], row.get('description'))
+            occurrence = seen.get(base, 0) + 1
+            seen[base] = occurrence
+            row['fingerprint'] = base if occurrence == 1 else DuplicateService.fingerprint(
+                row['account_id'], row['date'], row['amount'], row.get('description'), occurrence
+            )
+        return rows
+
+    @staticmethod
+    def free_fingerprint(account_id, date, amount, description, exclude_id=None):
+        """First occurrence fingerprint not used by another transaction of the account (one query)."""
+        candidates = [
+            DuplicateService.fingerprint(account_id, date, amount, description, n)
+            for n in range(1, DuplicateService.MAX_OCCURRENCES + 1)
+        ]
+        query = db.session.query(Transaction.fingerprint).filter(
+            Transaction.account_id == account_id,
+            Transaction.fingerprint.in_(candidates)
+        )
+        if exclude_id is not None:
+            query = query.filter(Transaction.id != exclude_id)
+        used = {row.fingerprint for row in query}
+        for candidate in candidates:
+            if candidate not in used:
+                return candidate
+        raise DuplicateTransactionError()
+
+    @staticmethod
+    def check(account_id, date, amount, description):
+        """Fingerprint for a new transaction; raises DuplicateTransactionError if it already exists."""
+        fp = DuplicateService.fingerprint(account_id, date, amount, description)
+        existing_id = db.session.query(Transaction.id).filter(
+            Transaction.account_id == account_id,
+            Transaction.fingerprint == fp
+        ).scalar()
+        if existing_id is not None:
+            raise DuplicateTransactionError(existing_id)
+        return fp
+
+    @staticmethod
+    def similarity(a, b):
+        if a == b:
+            return 1.0
+        if not a or not b:
+            return 0.0
+        return SequenceMatcher(None, a, b).ratio()
+
+    @staticmethod
+    def find_near_duplicates(user_id, account_id=None, start=None, end=None, days=2,
+                             amount_tolerance=0.0, min_similarity=0.6, limit=500):
+        """
+        Pairs of main transactions in the same account within `days` of each other,
+        amounts within amount_tolerance and descriptions at least min_similarity alike.
+        Returns a list of dicts sorted by score (most likely duplicates first).
+        """
+        query = db.session.query(
+            Transaction.id, Transaction.account_id, Transaction.date,
+            Transaction.amount, Transaction.description
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.parent_id.is_(None),
+            Transaction.transfer_id.is_(None),
+            Transaction.deleted_at.is_(None)
+        )
+        if account_id is not None:
+            query = query.filter(Transaction.account_id == account_id)
+        if start is not None:
+            query = query.filter(Transaction.date >= start - timedelta(days=days))
+        if end is not None:
+            query = query.filter(Transaction.date <= end + timedelta(days=days))
+
+        rows = [
+            (r.account_id, DuplicateService.minor_units(r.amount), r.date, r.id,
+             DuplicateService.normalize_description(r.description), r.amount)
+            for r in query.order_by(Transaction.account_id, Transaction.date, Transaction.id)
+        ]
+        # Sorted-window blocking: rows come sorted by (account, date); each row is only
+        # compared with the following rows of the same account at most `days` later
+        tolerance = DuplicateService.minor_units(amount_tolerance)
+        max_gap = timedelta(days=days)
+
+        pairs = []
+        for i, (acc, minor, date, tx_id, desc, amount) in enumerate(rows):
+            for j in range(i + 1, len(rows)):
+                other_acc, other_minor, other_date, other_id, other_desc, other_amount = rows[j]
+                gap = other_date - date
+                if other_acc != acc or gap > max_gap:
+                    break
+                if abs(other_minor - minor) > tolerance:
+                    continue
+                score = DuplicateService.similarity(desc, other_desc)
+                if score < min_similarity:
+                    continue
+                pairs.append({
+                    "transaction_ids": sorted((tx_id, other_id)),
+                    "account_id": acc,
+                    "amount_difference": round(abs(other_amount - amount), 2),
+                    "days_apart": gap.days,
+                    "similarity": round(score, 3)
+                })
+
+        pairs.sort(key=lambda p: (-p["similarity"], p["days_apart"], p["amount_difference"]))
+        return pairs[:limit]
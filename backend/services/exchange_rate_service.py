@@ -0,0 +1,241 @@
+"""
+Exchange rates served stale-while-revalidate.
+
+Requests always get the last known rates immediately (the fallback table until
+the first successful fetch). When those are older than EXCHANGE_RATES_TTL a
+background thread refreshes them from the Frankfurter API. The rates and
+their refresh state live in the shared cache (cache.shared_cache), so a
+refresh done by one gunicorn worker is served by all of them, and a lease
+in the same store lets only one worker on the host fetch at a time; within
+a worker, concurrent requests share the single in-flight refresh. A failed
+fetch is remembered: no new attempt is made until a backoff that doubles with
+each consecutive failure (EXCHANGE_RATES_RETRY_BASE .. EXCHANGE_RATES_RETRY_MAX)
+has passed, so an unreachable API costs one background timeout per backoff
+window instead of one per request. HTTP calls reuse a pooled requests.Session.
+
+Only the EUR-based rates are stored; each worker builds the conversion matrix
+(services/rate_matrix.py) once per new set of rates.
+
+EXCHANGE_RATES_API_URL can point to a local stub server for testing.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+import requests
+from flask import current_app, has_app_context
+from requests.adapters import HTTPAdapter
+
+from cache import shared_cache
+from services.rate_matrix import RateMatrix
+
+# Supported currencies
+SUPPORTED_CURRENCIES = ['COP', 'EUR', 'USD', 'CZK']
+
+# Fallback rates per EUR (realistic rates as of 2024), used until the API answers
+# and for any currency missing from its response
+FALLBACK_EUR_RATES = {
+    'USD': 1.08,             # 1 EUR = 1.08 USD
+    'CZK': 25.3              # 1 EUR = 25.3 CZK
+}
+
+# Currencies NOT supported by Frankfurter API (ECB doesn't track them),
+# triangulated from a reference rate against a supported currency
+UNSUPPORTED_BY_API = ['COP']
+ANCHOR_RATES = {
+    'COP': ('USD', 4200)     # 1 USD ≈ 4200 COP
+}
+
+DEFAULT_SETTINGS = {
+    'EXCHANGE_RATES_API_URL': 'https://api.frankfurter.app',
+    'EXCHANGE_RATES_TTL': 3600,
+    'EXCHANGE_RATES_TIMEOUT': 5,
+    'EXCHANGE_RATES_RETRY_BASE': 30,
+    'EXCHANGE_RATES_RETRY_MAX': 3600
+}
+
+STATE_KEY = 'exchange_rates'
+LEASE_KEY = 'exchange_rates:refresh'
+
+_lock = threading.Lock()
+_session = None
+_inflight = None  # threading.Event of this worker's running refresh, if any
+_matrix = (None, None)  # (eur_rates it was built from, RateMatrix)
+# Last state seen by this worker; used when the shared cache is unavailable
+_state = {
+    'eur_rates': None,     # live rates per EUR, None until the first fetch
+    'last_updated': None,  # ISO UTC time of the last successful fetch
+    'fresh_until': 0.0,    # epoch seconds until which the rates are fresh
+    'retry_at': 0.0,       # epoch seconds before which no fetch is attempted
+    'failures': 0,         # consecutive failed fetches
+    'last_error': None
+}
+
+
+class ExchangeRateService:
+
+    @staticmethod
+    def settings():
+        config = current_app.config if has_app_context() else {}
+        return {key: config.get(key, default) for key, default in DEFAULT_SETTINGS.items()}
+
+    @staticmethod
+    def session():
+        """Shared HTTP session (keep-alive connection pool, no automatic retries)."""
+        global _session
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+            return _session
+
+    @staticmethod
+    def fetch_live_rates(settings, base='EUR'):
+        """Rates relative to base from the Frankfurter API. Raises on any failure."""
+        response = ExchangeRateService.session().get(
+            f"{settings['EXCHANGE_RATES_API_URL'].rstrip('/')}/latest",
+            params={'from': base},
+            timeout=settings['EXCHANGE_RATES_TIMEOUT']
+        )
+        response.raise_for_status()
+        rates = response.json().get('rates')
+        if not rates:
+            raise ValueError("Empty rates in API response")
+        return rates
+
+    @staticmethod
+    def live_eur_rates(eur_rates):
+        """The supported currencies out of an API response."""
+        return {code: eur_rates[code] for code in SUPPORTED_CURRENCIES if eur_rates.get(code)}
+
+    @staticmethod
+    def _load():
+        global _state
+        state = shared_cache.get(STATE_KEY)
+        if state is not None:
+            _state = state
+        return _state
+
+    @staticmethod
+    def _save(**changes):
+        """Applies changes to the current shared state and publishes it."""
+        global _state
+        _state = dict(ExchangeRateService._load(), **changes)
+        shared_cache.set(STATE_KEY, _state)
+
+    @staticmethod
+    def _refresh(settings, done):
+        """Body of the refresh thread: fetch, then publish the rates or back off."""
+        try:
+            eur_rates = ExchangeRateService.live_eur_rates(ExchangeRateService.fetch_live_rates(settings, 'EUR'))
+        except Exception as e:
+            failures = ExchangeRateService._load()['failures'] + 1
+            delay = min(settings['EXCHANGE_RATES_RETRY_MAX'],
+                        settings['EXCHANGE_RATES_RETRY_BASE'] * 2 ** (failures - 1))
+            ExchangeRateService._save(failures=failures, retry_at=time.time() + delay,
+                                      last_error=str(e)[:200])
+            print(f"Error fetching rates (retry in {delay}s): {e}")
+        else:
+            ExchangeRateService._save(
+                eur_rates=eur_rates,
+                last_updated=datetime.utcnow().isoformat(),
+                fresh_until=time.time() + settings['EXCHANGE_RATES_TTL'],
+                retry_at=0.0,
+                failures=0,
+                last_error=None
+            )
+        finally:
+            global _inflight
+            shared_cache.delete(LEASE_KEY)
+            with _lock:
+                _inflight = None
+            done.set()
+
+    @staticmethod
+    def _start_refresh(settings):
+        """
+        Starts a refresh unless one is running in this worker (returns its Event)
+        or another worker holds the lease (returns None).
+        """
+        global _inflight
+        with _lock:
+            if _inflight is None:
+                if not shared_cache.add(LEASE_KEY, os.getpid(), settings['EXCHANGE_RATES_TIMEOUT'] + 5):
+                    return None
+                _inflight = threading.Event()
+                threading.Thread(target=ExchangeRateService._refresh, args=(settings, _inflight),
+                                 name='exchange-rate-refresh', daemon=True).start()
+            return _inflight
+
+    @staticmethod
+    def get_matrix():
+        """
+        RateMatrix of the last known rates, without waiting; schedules a refresh
+        when they are stale.
+        """
+        global _matrix
+        state = ExchangeRateService._load()
+        now = time.time()
+        if now >= state['fresh_until'] and now >= state['retry_at']:
+            ExchangeRateService._start_refresh(ExchangeRateService.settings())
+
+        eur_rates = state.get('eur_rates') or {}
+        built_from, matrix = _matrix
+        if matrix is None or built_from != eur_rates:
+            matrix = RateMatrix.triangulated(SUPPORTED_CURRENCIES, eur_rates, ANCHOR_RATES, FALLBACK_EUR_RATES)
+            _matrix = (eur_rates, matrix)
+        return matrix
+
+    @staticmethod
+    def get_rates():
+        """All supported pairs as {'COP_EUR': 0.00022, 'EUR_COP': 4500, ...}."""
+        return ExchangeRateService.get_matrix().pairs()
+
+    @staticmethod
+    def refresh(wait=True):
+        """
+        Forces a refresh (joining one already running in any worker) and waits for
+        it up to the API timeout. Respects the failure backoff. Returns True if
+        live rates were fetched.
+        """
+        settings = ExchangeRateService.settings()
+        state = ExchangeRateService._load()
+        previous = state['last_updated']
+        if time.time() < state['retry_at']:
+            return False
+        done = ExchangeRateService._start_refresh(settings)
+        if wait:
+            deadline = time.monotonic() + settings['EXCHANGE_RATES_TIMEOUT'] + 1
+            if done is not None:
+                done.wait(settings['EXCHANGE_RATES_TIMEOUT'] + 1)
+            else:
+                # Another worker is fetching: wait for its lease to go
+                while time.monotonic() < deadline and shared_cache.get(LEASE_KEY) is not None:
+                    time.sleep(0.1)
+        last_updated = ExchangeRateService._load()['last_updated']
+        return last_updated is not None and last_updated != previous
+
+    @staticmethod
+    def status():
+        """Freshness metadata of the served rates."""
+        state = ExchangeRateService._load()
+        now = time.time()
+        return {
+            'last_updated': datetime.fromisoformat(state['last_updated']) if state['last_updated'] else None,
+            'stale': now >= state['fresh_until'],
+            'retry_in': max(0, round(state['retry_at'] - now)) if state['failures'] else None,
+            'error': state['last_error']
+        }
+
+    @staticmethod
+    def version():
+        """Changes whenever new rates are published (for cache keys)."""
+        return ExchangeRateService._load()['last_updated']
+
+    @staticmethod
+    def is_live():
+        return ExchangeRateService._load()['last_updated'] is not None
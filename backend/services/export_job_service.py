@@ -0,0 +1,235 @@
+"""
+Background export jobs.
+
+POST /export/jobs records an ExportJob and hands it to a small thread pool in
+the worker that received it, so the request returns at once and a client
+timeout no longer throws the work away. The job streams the same generators
+as the synchronous exports (ExportService) into instance/exports, optionally
+gzip-compressed, writing to a .part file that is renamed when complete.
+Job state lives in the database, so any worker can answer status and
+download requests.
+
+Jobs expire EXPORT_JOB_TTL_HOURS after finishing: cleanup() deletes expired files
+and rows. It runs at most once a minute per worker, piggybacking on job requests.
+
+Each job records the worker (host:pid) whose pool holds it. While that worker
+lives, a heartbeat thread touches heartbeat_at of its pending and running jobs
+every HEARTBEAT_INTERVAL, so a job waiting behind MAX_WORKERS others or running
+a long export is never mistaken for a dead one. cleanup() fails only jobs whose
+heartbeat is older than STALE_AFTER (their worker died or was restarted).
+"""
+import gzip
+import json
+import os
+import secrets
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func
+
+from extensions import db
+from models import ExportJob
+from services.export_service import ExportService
+
+_executor = None
+_executor_lock = threading.Lock()
+_heartbeat = None  # thread keeping this worker's jobs alive
+_last_cleanup = 0.0
+
+
+class ExportJobService:
+    KINDS = ('transactions', 'accounts', 'full-report')
+    MAX_WORKERS = 2
+    CLEANUP_INTERVAL = 60  # seconds
+    HEARTBEAT_INTERVAL = 30  # seconds
+    STALE_AFTER = timedelta(minutes=5)  # without a heartbeat
+
+    @staticmethod
+    def export_dir(app=None):
+        app = app or current_app
+        path = os.path.join(app.instance_path, 'exports')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def artifact_path(job, app=None):
+        return os.path.join(ExportJobService.export_dir(app), job.file_name) if job.file_name else None
+
+    @staticmethod
+    def download_name(job):
+        if job.kind == 'full-report':
+            year, month = ExportService.report_period(json.loads(job.params or '{}'))
+            name = f"reporte_financiero_{ExportService.period_label(year, month).replace('/', '-')}"
+        elif job.kind == 'accounts':
+            name = f"cuentas_{job.created_at:%Y%m%d}"
+        else:
+            name = f"transacciones_{job.created_at:%Y%m%d}"
+        return name + ('.csv.gz' if job.compress else '.csv')
+
+    @staticmethod
+    def _chunks(job):
+        params = json.loads(job.params or '{}')
+        if job.kind == 'transactions':
+            return ExportService.transactions_csv(job.user_id, **ExportService.transaction_filters(params))
+        if job.kind == 'accounts':
+            return ExportService.accounts_csv(job.user_id)
+        year, month = ExportService.report_period(params)
+        return ExportService.full_report_csv(job.user_id, year=year, month=month)
+
+    @staticmethod
+    def worker_id():
+        """Identifies this worker process (computed per call: gunicorn forks workers)."""
+        return f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+    @staticmethod
+    def heartbeat():
+        """Marks this worker's pending and running jobs as alive. Commits."""
+        touched = ExportJob.query.filter(
+            ExportJob.worker == ExportJobService.worker_id(),
+            ExportJob.status.in_(('pending', 'running'))
+        ).update({ExportJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        return touched
+
+    @staticmethod
+    def _beat(app):
+        """Body of the heartbeat thread; lives as long as the worker process."""
+        while True:
+            time.sleep(ExportJobService.HEARTBEAT_INTERVAL)
+            with app.app_context():
+                try:
+                    ExportJobService.heartbeat()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("Export job heartbeat failed")
+                finally:
+                    db.session.remove()
+
+    @staticmethod
+    def _submit(app, job_id):
+        global _executor, _heartbeat
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=ExportJobService.MAX_WORKERS,
+                                               thread_name_prefix='export-job')
+            if _heartbeat is None:
+                _heartbeat = threading.Thread(target=ExportJobService._beat, args=(app,),
+                                              name='export-job-heartbeat', daemon=True)
+                _heartbeat.start()
+        _executor.submit(ExportJobService.run, app, job_id)
+
+    @staticmethod
+    def create(user_id, kind, params=None, compress=False):
+        """Validates and queues an export. Returns the committed ExportJob."""
+        if kind not in ExportJobService.KINDS:
+            raise ValueError(f"Unknown export kind '{kind}'")
+        params = params or {}
+        # Same validation as the synchronous endpoints, before queuing
+        if kind == 'transactions':
+            try:
+                ExportService.transaction_filters(params)
+            except (TypeError, ValueError):
+                raise ValueError("Invalid account_id or category_id")
+
+        ExportJobService.cleanup()
+        job = ExportJob(user_id=user_id, kind=kind, params=json.dumps(params), compress=bool(compress),
+                        worker=ExportJobService.worker_id(), heartbeat_at=datetime.utcnow())
+        db.session.add(job)
+        db.session.commit()
+        ExportJobService._submit(current_app._get_current_object(), job.id)
+        return job
+
+    @staticmethod
+    def run(app, job_id):
+        """Generates the artifact of a job (runs in the pool, in its own app context)."""
+        with app.app_context():
+            job = db.session.get(ExportJob, job_id)
+            if job is None or job.status != 'pending':
+                return
+            job.status = 'running'
+            job.started_at = job.heartbeat_at = datetime.utcnow()
+            db.session.commit()
+
+            file_name = f"{job.id}-{secrets.token_hex(8)}.csv" + ('.gz' if job.compress else '')
+            path = os.path.join(ExportJobService.export_dir(app), file_name)
+            partial = path + '.part'
+            try:
+                if job.compress:
+                    output = gzip.open(partial, 'wt', encoding='utf-8', newline='')
+                else:
+                    output = open(partial, 'w', encoding='utf-8', newline='')
+                with output:
+                    for chunk in ExportJobService._chunks(job):
+                        output.write(chunk)
+                os.replace(partial, path)
+
+                job.file_name = file_name
+                job.size = os.path.getsize(path)
+                job.status = 'done'
+            except Exception as e:
+                db.session.rollback()
+                if os.path.exists(partial):
+                    os.remove(partial)
+                job = db.session.get(ExportJob, job_id)
+                job.status = 'failed'
+                job.error = str(e)[:500]
+                app.logger.exception("Export job %s failed", job_id)
+            job.finished_at = datetime.utcnow()
+            job.expires_at = job.finished_at + timedelta(hours=app.config['EXPORT_JOB_TTL_HOURS'])
+            db.session.commit()
+
+    @staticmethod
+    def status(job):
+        data = {
+            "id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "compress": job.compress,
+            "created_at": job.created_at.isoformat(),
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+            "expires_at": job.expires_at.isoformat() if job.expires_at else None,
+            "size": job.size,
+            "error": job.error
+        }
+        if job.status == 'done':
+            data["download_url"] = f"/export/jobs/{job.id}/download"
+            data["file_name"] = ExportJobService.download_name(job)
+        return data
+
+    @staticmethod
+    def delete(job):
+        """Removes a job and its artifact. Does not commit."""
+        path = ExportJobService.artifact_path(job)
+        if path and os.path.exists(path):
+            os.remove(path)
+        db.session.delete(job)
+
+    @staticmethod
+    def cleanup(force=False):
+        """
+        Deletes expired artifacts and fails pending or running jobs whose worker
+        stopped sending heartbeats (throttled per worker).
+        """
+        global _last_cleanup
+        if not force and time.monotonic() - _last_cleanup < ExportJobService.CLEANUP_INTERVAL:
+            return 0
+        _last_cleanup = time.monotonic()
+
+        now = datetime.utcnow()
+        expired = ExportJob.query.filter(ExportJob.expires_at.isnot(None), ExportJob.expires_at < now).all()
+        for job in expired:
+            ExportJobService.delete(job)
+        # Jobs queued before heartbeats existed fall back to when they last changed state
+        last_seen = func.coalesce(ExportJob.heartbeat_at, ExportJob.started_at, ExportJob.created_at)
+        ExportJob.query.filter(
+            ExportJob.status.in_(('pending', 'running')),
+            last_seen < now - ExportJobService.STALE_AFTER
+        ).update({ExportJob.status: 'failed', ExportJob.error: 'Export interrupted', ExportJob.finished_at: now,
+                  ExportJob.expires_at: now + timedelta(hours=current_app.config['EXPORT_JOB_TTL_HOURS'])},
+                 synchronize_session=False)
+        db.session.commit()
+        return len(expired)
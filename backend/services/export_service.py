@@ -0,0 +1,226 @@
+"""
+CSV exports as generators of text chunks.
+
+Transactions are read with a column projection (account and category names
+joined in SQL) and yield_per, so rows stream from a server-side cursor and
+memory stays flat whatever the export size. The header is yielded before the
+query runs, so the first byte goes out immediately.
+"""
+import csv
+import io
+from datetime import datetime
+
+from sqlalchemy import extract
+
+from extensions import db
+from models import Transaction, Account, Category, MonthlyRollup
+from services.rollup_service import RollupService
+from services.reference_service import ReferenceService
+
+
+class ExportService:
+    YIELD_PER = 1000
+    ROWS_PER_CHUNK = 500
+
+    @staticmethod
+    def _type_label(amount, transfer_id):
+        if transfer_id:
+            return 'Transferencia'
+        return 'Ingreso' if amount > 0 else 'Gasto'
+
+    @staticmethod
+    def transaction_filters(args):
+        """
+        transactions_query() filters from a query string or JSON mapping: start_date,
+        end_date, account_id, category_id, type. Unparseable dates are ignored (as the
+        export always did); a non-numeric account/category id raises ValueError.
+        """
+        filters = {}
+        for param, key in (('start_date', 'start'), ('end_date', 'end')):
+            try:
+                if args.get(param):
+                    filters[key] = datetime.fromisoformat(str(args[param]))
+            except ValueError:
+                pass
+        for param in ('account_id', 'category_id'):
+            if args.get(param):
+                filters[param] = int(args[param])
+        if args.get('type') in ('income', 'expense'):
+            filters['tx_type'] = args['type']
+        return filters
+
+    @staticmethod
+    def report_period(args):
+        """(year, month) of the full report; month is optional, invalid values are dropped."""
+        try:
+            year = int(args.get('year') or datetime.now().year)
+        except ValueError:
+            return None, None
+        try:
+            month = int(args['month']) if args.get('month') else None
+        except ValueError:
+            month = None
+        return year, month
+
+    @staticmethod
+    def transactions_query(user_id, start=None, end=None, account_id=None, category_id=None,
+                           tx_type=None, year=None, month=None):
+        """Main transactions, newest first, as (date, description, amount, transfer_id, account, category, id)."""
+        query = db.session.query(
+            Transaction.date,
+            Transaction.description,
+            Transaction.amount,
+            Transaction.transfer_id,
+            Account.name,
+            Category.name,
+            Transaction.id
+        ).join(Account, Account.id == Transaction.account_id)\
+         .outerjoin(Category, Category.id == Transaction.category_id)\
+         .filter(
+            Transaction.user_id == user_id,
+            Transaction.deleted_at.is_(None),
+            Transaction.parent_id.is_(None)  # Only main transactions
+        )
+
+        if start is not None:
+            query = query.filter(Transaction.date >= start)
+        if end is not None:
+            query = query.filter(Transaction.date <= end)
+        if year is not None:
+            query = query.filter(extract('year', Transaction.date) == year)
+        if month is not None:
+            query = query.filter(extract('month', Transaction.date) == month)
+        if account_id is not None:
+            query = query.filter(Transaction.account_id == account_id)
+        if category_id is not None:
+            query = query.filter(Transaction.category_id == category_id)
+        if tx_type == 'income':
+            query = query.filter(Transaction.amount > 0)
+        elif tx_type == 'expense':
+            query = query.filter(Transaction.amount < 0)
+
+        return query.order_by(Transaction.date.desc(), Transaction.id.desc())\
+            .execution_options(yield_per=ExportService.YIELD_PER)
+
+    @staticmethod
+    def _csv_chunks(rows):
+        """Writes rows (lists) as CSV, yielding the text every ROWS_PER_CHUNK rows."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        pending = 0
+        for row in rows:
+            writer.writerow(row)
+            pending += 1
+            if pending >= ExportService.ROWS_PER_CHUNK:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    @staticmethod
+    def transactions_csv(user_id, with_id=True, **filters):
+        """Generator of CSV text for the filtered transactions (see transactions_query)."""
+        header = ['Fecha', 'Descripción', 'Monto', 'Tipo', 'Cuenta', 'Categoría']
+        if with_id:
+            header.append('ID')
+        yield from ExportService._csv_chunks([header])
+
+        def rows():
+            for date, description, amount, transfer_id, account_name, category_name, tx_id in \
+                    ExportService.transactions_query(user_id, **filters):
+                row = [
+                    date.strftime('%Y-%m-%d') if date else '',
+                    description or '',
+                    amount,
+                    ExportService._type_label(amount, transfer_id),
+                    account_name or '',
+                    category_name or 'Sin categoría'
+                ]
+                if with_id:
+                    row.append(tx_id)
+                yield row
+
+        yield from ExportService._csv_chunks(rows())
+
+    @staticmethod
+    def accounts_csv(user_id):
+        """Generator of the accounts summary CSV."""
+        type_labels = {
+            'cash': 'Efectivo',
+            'bank': 'Banco',
+            'credit': 'Crédito',
+            'investment': 'Inversión'
+        }
+        yield from ExportService._csv_chunks([['Nombre', 'Tipo', 'Institución', 'Moneda', 'Saldo', 'ID']])
+
+        accounts = db.session.query(
+            Account.name, Account.type, Account.institution, Account.currency_code, Account.balance, Account.id
+        ).filter(Account.user_id == user_id, Account.deleted_at.is_(None))
+        yield from ExportService._csv_chunks(
+            [
+                name,
+                type_labels.get(acc_type.value, acc_type.value) if acc_type else '',
+                institution or '',
+                currency_code,
+                balance,
+                acc_id
+            ]
+            for name, acc_type, institution, currency_code, balance, acc_id in accounts
+        )
+
+    @staticmethod
+    def full_report_csv(user_id, year=None, month=None):
+        """
+        Generator of the full report: summary and per-category totals (from the
+        monthly rollups) followed by the streamed transaction detail.
+        """
+        start_month = end_month = None
+        if year is not None:
+            start_month, end_month = f"{year:04d}-01", f"{year:04d}-12"
+            if month is not None:
+                start_month = end_month = f"{year:04d}-{month:02d}"
+
+        # Summary and per-category totals (main transactions, transfers included)
+        rollup_rows = RollupService.totals(
+            user_id,
+            group_by=(MonthlyRollup.category_id,),
+            start_month=start_month,
+            end_month=end_month,
+            include_transfers=True
+        )
+        category_names = ReferenceService.category_names(user_id)
+
+        total_income = sum(income for _, income, _, _ in rollup_rows)
+        total_expense = sum(expense for _, _, expense, _ in rollup_rows)
+
+        by_category = {}
+        for cat_id, income, expense, _ in rollup_rows:
+            cat_name = category_names.get(cat_id, 'Sin categoría')
+            if cat_name not in by_category:
+                by_category[cat_name] = {'income': 0, 'expense': 0}
+            by_category[cat_name]['income'] += income
+            by_category[cat_name]['expense'] += expense
+
+        summary = [
+            ['=== RESUMEN FINANCIERO ==='],
+            ['Período', ExportService.period_label(year, month)],
+            ['Total Ingresos', total_income],
+            ['Total Gastos', total_expense],
+            ['Balance Neto', total_income - total_expense],
+            [],
+            ['=== POR CATEGORÍA ==='],
+            ['Categoría', 'Ingresos', 'Gastos', 'Neto']
+        ]
+        for cat_name, values in sorted(by_category.items()):
+            summary.append([cat_name, values['income'], values['expense'], values['income'] - values['expense']])
+        summary += [[], ['=== DETALLE DE TRANSACCIONES ===']]
+        yield from ExportService._csv_chunks(summary)
+
+        yield from ExportService.transactions_csv(user_id, with_id=False, year=year, month=month)
+
+    @staticmethod
+    def period_label(year=None, month=None):
+        year = year if year is not None else datetime.now().year
+        return f"{year}" if not month else f"{month}/{year}"
@@ -0,0 +1,304 @@
+"""
+Bank statement import (CSV and OFX).
+
+Parsers are generators over the uploaded stream: one row in memory at a time,
+so a 100k-line statement costs the same memory as a 10-line one. Rows are
+written in chunks through TransactionService.create_batch (bulk INSERT, one
+balance UPDATE per chunk), which also categorizes them with the user's rules.
+"""
+import csv
+import io
+import math
+import re
+import time
+import unicodedata
+from datetime import datetime
+
+from extensions import db
+from models import Account
+from services.transaction_service import TransactionService
+from services.duplicate_service import DuplicateService
+
+# Column mapping per bank export. Each field lists the accepted header names
+# (compared without accents/case); use 'debit'/'credit' instead of 'amount'
+# when the bank splits withdrawals and deposits in two columns.
+BANK_PROFILES = {
+    'generic': {
+        'name': 'Genérico (fecha, descripción, valor)',
+        'delimiter': ',',
+        'encoding': 'utf-8-sig',
+        'date': ['date', 'fecha'],
+        'description': ['description', 'descripcion', 'concepto'],
+        'amount': ['amount', 'valor', 'monto'],
+        'date_formats': ['%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d'],
+        'decimal': '.'
+    },
+    'bancolombia': {
+        'name': 'Bancolombia',
+        'delimiter': ',',
+        'encoding': 'latin-1',
+        'date': ['fecha'],
+        'description': ['descripcion', 'descripción'],
+        'amount': ['valor'],
+        'date_formats': ['%Y/%m/%d', '%d/%m/%Y', '%Y%m%d'],
+        'decimal': '.'
+    },
+    'davivienda': {
+        'name': 'Davivienda',
+        'delimiter': ';',
+        'encoding': 'latin-1',
+        'date': ['fecha', 'fecha de sistema'],
+        'description': ['descripcion', 'descripcion motivo', 'transaccion'],
+        'debit': ['debito', 'valor debito'],
+        'credit': ['credito', 'valor credito'],
+        'date_formats': ['%d/%m/%Y', '%Y-%m-%d'],
+        'decimal': ','
+    },
+    'nequi': {
+        'name': 'Nequi',
+        'delimiter': ',',
+        'encoding': 'utf-8-sig',
+        'date': ['fecha del movimiento', 'fecha'],
+        'description': ['descripcion'],
+        'amount': ['valor'],
+        'date_formats': ['%d/%m/%Y', '%Y-%m-%d'],
+        'decimal': '.'
+    }
+}
+
+OFX_TAG = re.compile(r'<(/?[A-Za-z0-9.]+)>([^<\r\n]*)')
+
+
+def _normalize_header(value):
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(ch for ch in value if not unicodedata.combining(ch))
+    return ' '.join(value.lower().split())
+
+
+def _parse_amount(value, decimal='.', required=True):
+    """Amount of a cell; a blank cell is an error, or None when not required."""
+    value = (value or '').strip().replace('$', '').replace(' ', '')
+    if not value:
+        if required:
+            raise ValueError("Missing amount")
+        return None
+    negative = value.startswith('(') and value.endswith(')')
+    value = value.strip('()')
+    if decimal == ',':
+        value = value.replace('.', '').replace(',', '.')
+    else:
+        value = value.replace(',', '')
+    amount = float(value)
+    # float() takes "nan"/"inf"; fingerprints also need the amount in cents to be finite
+    if not math.isfinite(amount * 100):
+        raise ValueError(f"Invalid amount '{value}'")
+    return -amount if negative else amount
+
+
+def _parse_date(value, formats):
+    value = (value or '').strip()
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return datetime.fromisoformat(value)
+
+
+def parse_csv(stream, profile):
+    """
+    Yields (line_number, row dict or None, error or None) for a binary CSV stream.
+    Row dicts have date, amount and description.
+    """
+    text = io.TextIOWrapper(stream, encoding=profile.get('encoding', 'utf-8-sig'), errors='replace', newline='')
+    reader = csv.reader(text, delimiter=profile.get('delimiter', ','))
+
+    header = next(reader, None)
+    if header is None:
+        return
+    positions = {_normalize_header(name): i for i, name in enumerate(header)}
+
+    def column(field):
+        for name in profile.get(field) or []:
+            position = positions.get(_normalize_header(name))
+            if position is not None:
+                return position
+        return None
+
+    date_col = column('date')
+    description_col = column('description')
+    amount_col = column('amount')
+    debit_col, credit_col = column('debit'), column('credit')
+    if date_col is None or (amount_col is None and debit_col is None and credit_col is None):
+        raise ValueError("The file does not match the selected bank profile (missing date or amount column)")
+
+    decimal = profile.get('decimal', '.')
+    formats = profile.get('date_formats', [])
+
+    for line_number, record in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in record):
+            continue
+        try:
+            def cell(position):
+                return record[position] if position is not None and position < len(record) else ''
+
+            if amount_col is not None:
+                amount = _parse_amount(cell(amount_col), decimal)
+            else:
+                # One side of the pair is normally blank, but not both
+                credit = _parse_amount(cell(credit_col), decimal, required=False)
+                debit = _parse_amount(cell(debit_col), decimal, required=False)
+                if credit is None and debit is None:
+                    raise ValueError("Missing amount")
+                amount = (credit or 0.0) - (debit or 0.0)
+
+            yield line_number, {
+                "date": _parse_date(cell(date_col), formats),
+                "amount": amount,
+                "description": cell(description_col).strip() or None
+            }, None
+        except (ValueError, IndexError) as e:
+            yield line_number, None, str(e)
+
+
+def parse_ofx(stream):
+    """
+    Yields (line_number, row dict or None, error or None) for each <STMTTRN> in an
+    OFX/QFX stream. Handles both SGML (OFX 1.x, unclosed tags) and XML (OFX 2.x).
+    """
+    text = io.TextIOWrapper(stream, encoding='latin-1', errors='replace')
+    current = None
+    start_line = 0
+
+    for line_number, line in enumerate(text, start=1):
+        for tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                current, start_line = {}, line_number
+            elif tag == '/STMTTRN' and current is not None:
+                try:
+                    posted = re.match(r'\d{8}(\d{6})?', current.get('DTPOSTED', ''))
+                    if not posted:
+                        raise ValueError("Missing or invalid DTPOSTED")
+                    date = datetime.strptime(posted.group(0), '%Y%m%d%H%M%S' if posted.group(1) else '%Y%m%d')
+                    description = ' - '.join(v for v in (current.get('NAME'), current.get('MEMO')) if v) or None
+                    yield start_line, {
+                        "date": date,
+                        "amount": _parse_amount(current.get('TRNAMT'), ',' if ',' in current.get('TRNAMT', '') else '.'),
+                        "description": description
+                    }, None
+                except ValueError as e:
+                    yield start_line, None, str(e)
+                current = None
+            elif current is not None and not tag.startswith('/'):
+                current[tag] = value.strip()
+
+
+class ImportService:
+    MAX_ERRORS = 50
+
+    @staticmethod
+    def import_statement(user_id, account_id, stream, fmt='csv', profile='generic', chunk_size=2000, progress=None):
+        """
+        Imports a statement into an account, committing every chunk_size rows.
+        Rows that fail to parse are skipped and reported (first MAX_ERRORS), rows
+        already stored (same fingerprint) are skipped as duplicates, and near
+        duplicates in the imported date range are counted for review.
+        progress(stats) is called after every chunk. Returns the final stats.
+
+        Chunks already committed stay stored if a later one fails: the import
+        stops there and the stats returned so far get an "error" entry with the
+        line and message of the failing row, or the first line of the chunk for
+        an unexpected error (stats["imported"] counts only the committed rows).
+        The same happens if the file can't be read past some point after rows
+        were stored; before that, the error is raised and nothing is stored.
+        """
+        account = Account.query.filter_by(id=account_id, user_id=user_id, deleted_at=None).first()
+        if not account:
+            raise ValueError("Account not found")
+
+        if fmt in ('ofx', 'qfx'):
+            rows = parse_ofx(stream)
+        elif fmt == 'csv':
+            if profile not in BANK_PROFILES:
+                raise ValueError(f"Unknown bank profile '{profile}'")
+            rows = parse_csv(stream, BANK_PROFILES[profile])
+        else:
+            raise ValueError(f"Unsupported format '{fmt}'")
+
+        chunk_size = max(1, min(chunk_size, TransactionService.MAX_BATCH_SIZE))
+        stats = {"rows": 0, "imported": 0, "categorized": 0, "skipped": 0, "duplicates": 0,
+                 "possible_duplicates": 0, "errors": [], "elapsed": 0.0, "rows_per_second": 0.0}
+        started = time.monotonic()
+        # Identical rows of one file count as distinct occurrences across chunks
+        occurrences = {}
+        first_date = last_date = None
+
+        def flush(chunk, lines):
+            """Stores a chunk; False (with stats["error"] set) if it was rolled back."""
+            try:
+                results, ok = TransactionService.create_batch(
+                    user_id, chunk, skip_duplicates=True, occurrences=occurrences
+                )
+                if ok:
+                    db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                stats["error"] = {"line": lines[0], "msg": str(e)}
+                return False
+            if not ok:
+                db.session.rollback()
+                failed = next(r for r in results if r["status"] == "error")
+                stats["error"] = {"line": lines[failed["index"]], "msg": failed["msg"]}
+                return False
+            duplicates = sum(1 for r in results if r["status"] == "duplicate")
+            stats["categorized"] += sum(1 for r in results if r.get("categorized"))
+            stats["duplicates"] += duplicates
+            stats["imported"] += len(chunk) - duplicates
+            stats["elapsed"] = round(time.monotonic() - started, 3)
+            stats["rows_per_second"] = round(stats["rows"] / stats["elapsed"], 1) if stats["elapsed"] else 0.0
+            if progress:
+                progress(stats)
+            return True
+
+        chunk, lines = [], []
+        last_line = 0
+        try:
+            for line_number, row, error in rows:
+                last_line = line_number
+                stats["rows"] += 1
+                if error:
+                    stats["skipped"] += 1
+                    if len(stats["errors"]) < ImportService.MAX_ERRORS:
+                        stats["errors"].append({"line": line_number, "msg": error})
+                    continue
+
+                row["account_id"] = account.id
+                first_date = min(first_date or row["date"], row["date"])
+                last_date = max(last_date or row["date"], row["date"])
+                chunk.append(row)
+                lines.append(line_number)
+
+                if len(chunk) >= chunk_size:
+                    if not flush(chunk, lines):
+                        break
+                    chunk, lines = [], []
+        except Exception as e:
+            # The file broke off (e.g. a malformed CSV quote) after earlier chunks were stored
+            if not stats["imported"]:
+                raise
+            if not chunk or flush(chunk, lines):
+                stats["error"] = {"line": last_line + 1, "msg": str(e)}
+            chunk = []
+
+        if chunk and "error" not in stats:
+            flush(chunk, lines)
+
+        if stats["imported"]:
+            stats["possible_duplicates"] = len(DuplicateService.find_near_duplicates(
+                user_id, account_id=account.id, start=first_date, end=last_date
+            ))
+
+        stats["elapsed"] = round(time.monotonic() - started, 3)
+        stats["rows_per_second"] = round(stats["rows"] / stats["elapsed"], 1) if stats["elapsed"] else 0.0
+        return stats
@@ -4,6 +4,24 @@ from services.transaction_service import TransactionService
 from datetime import datetime
 
 class InvestmentService:
+    @staticmethod
+    def record_price(inv, price, date=None):
+        """
+        Adds a price history point and keeps inv.last_price on the most recent one.
+        """
+        date = date or datetime.utcnow()
+        history = InvestmentPriceHistory(
+            investment=inv,
+            price=price,
+            date=date
+        )
+        db.session.add(history)
+        
+        if inv.last_price_date is None or date >= inv.last_price_date:
+            inv.last_price = price
+            inv.last_price_date = date
+        return history
+
     @staticmethod
     def buy_asset(account_id, symbol, quantity, price, date=None, asset_type=AssetType.STOCK, name=None):
         if quantity <= 0 or price < 0:
@@ -15,7 +33,8 @@ class InvestmentService:
             account_id=account_id,
             amount=-cost,
             description=f"Buy {symbol} ({quantity} @ {price})",
-            date=date
+            date=date,
+            allow_duplicate=True
         )
         
         # Update or Create Investment Holding
@@ -39,12 +58,7 @@ class InvestmentService:
             db.session.add(inv)
             
         # Record Price History
-        history = InvestmentPriceHistory(
-            investment=inv,
-            price=price,
-            date=date or datetime.utcnow()
-        )
-        db.session.add(history)
+        InvestmentService.record_price(inv, price, date)
         
         db.session.commit()
         return inv
@@ -61,7 +75,8 @@ class InvestmentService:
             account_id=account_id,
             amount=revenue,
             description=f"Sell {symbol} ({quantity} @ {price})",
-            date=date
+            date=date,
+            allow_duplicate=True
         )
         
         # Update Holding
@@ -71,12 +86,7 @@ class InvestmentService:
         # If quantity 0, keep record but maybe mark inactive? For now just 0.
         
         # Record Price History (Market price at sell time)
-        history = InvestmentPriceHistory(
-            investment=inv,
-            price=price,
-            date=date or datetime.utcnow()
-        )
-        db.session.add(history)
+        InvestmentService.record_price(inv, price, date)
         
         db.session.commit()
         return inv
@@ -0,0 +1,141 @@
+"""
+As-of exchange rates from the stored snapshots (exchange_rates rows).
+
+Each pair's history is held as two parallel arrays sorted by day: the day
+ordinal and the rate of the latest snapshot of that day (array('d'), so NumPy
+can view them without copying). All pairs are loaded with one ordered query
+over ix_exchange_rates_pair_date and kept per worker until the table changes
+(checked with one aggregate query per use, not per lookup).
+
+rate_at() is a bisect: the rate of the latest snapshot on or before the day.
+Days before the first snapshot use the first one. A pair without history is
+read through its inverse, and then from the current rate matrix. rates_at()
+resolves a whole list of lookups grouped by pair, with numpy.searchsorted when
+NumPy is installed, so converting N transactions costs O(N log n) and no
+queries beyond the version check.
+"""
+import threading
+from array import array
+from bisect import bisect_right
+
+from sqlalchemy import func
+
+from extensions import db
+from models import ExchangeRate
+from services.exchange_rate_service import ExchangeRateService
+
+try:
+    import numpy as np
+except ImportError:  # same results, with bisect per lookup
+    np = None
+
+_lock = threading.Lock()
+_history = (None, None)  # (table version, RateHistory)
+
+
+class RateHistory:
+
+    def __init__(self, rows):
+        """rows: (currency_from, currency_to, date, rate) ordered by pair and date."""
+        self.series = {}
+        for from_currency, to_currency, date, rate in rows:
+            days, rates = self.series.setdefault((from_currency, to_currency), (array('d'), array('d')))
+            day = date.toordinal()
+            if days and days[-1] == day:
+                rates[-1] = rate  # keep the day's latest snapshot
+            else:
+                days.append(day)
+                rates.append(rate)
+        self.fallback = None  # RateMatrix for pairs without history
+
+    def __len__(self):
+        return sum(len(days) for days, _ in self.series.values())
+
+    def _series(self, from_currency, to_currency):
+        """(days, rates, inverse) of a pair, or None without history."""
+        series = self.series.get((from_currency, to_currency))
+        if series is not None:
+            return series + (False,)
+        series = self.series.get((to_currency, from_currency))
+        if series is not None:
+            return series + (True,)
+        return None
+
+    def rate_at(self, from_currency, to_currency, date):
+        """Rate of the pair on the day of date. KeyError for an unknown currency."""
+        if from_currency == to_currency:
+            return 1.0
+        found = self._series(from_currency, to_currency)
+        if found is None:
+            return self.fallback.rate(from_currency, to_currency)
+        days, rates, inverse = found
+        rate = rates[max(bisect_right(days, date.toordinal()) - 1, 0)]
+        return 1 / rate if inverse else rate
+
+    def rates_at(self, from_codes, to_codes, dates):
+        """rate_at() for parallel lists; None for items with an unknown currency."""
+        result = [None] * len(dates)
+        positions_by_pair = {}
+        for k, pair in enumerate(zip(from_codes, to_codes)):
+            positions_by_pair.setdefault(pair, []).append(k)
+
+        for (from_currency, to_currency), positions in positions_by_pair.items():
+            found = self._series(from_currency, to_currency) if from_currency != to_currency else None
+            if found is None:
+                try:
+                    rate = self.rate_at(from_currency, to_currency, None)
+                except KeyError:
+                    rate = None
+                for k in positions:
+                    result[k] = rate
+                continue
+
+            days, rates, inverse = found
+            targets = [dates[k].toordinal() for k in positions]
+            if np is not None:
+                indexes = np.maximum(np.searchsorted(np.frombuffer(days), targets, side='right') - 1, 0)
+                values = np.frombuffer(rates)[indexes]
+                values = (1 / values if inverse else values).tolist()
+            else:
+                values = [rates[max(bisect_right(days, day) - 1, 0)] for day in targets]
+                if inverse:
+                    values = [1 / value for value in values]
+            for k, value in zip(positions, values):
+                result[k] = value
+        return result
+
+
+class RateHistoryService:
+
+    @staticmethod
+    def _version():
+        return tuple(db.session.query(func.max(ExchangeRate.id), func.count(ExchangeRate.id)).one())
+
+    @staticmethod
+    def get():
+        """The RateHistory of this worker, reloaded if exchange_rates changed."""
+        global _history
+        version = RateHistoryService._version()
+        loaded_version, history = _history
+        if history is None or loaded_version != version:
+            with _lock:
+                loaded_version, history = _history
+                if history is None or loaded_version != version:
+                    rows = db.session.query(
+                        ExchangeRate.currency_from, ExchangeRate.currency_to, ExchangeRate.date, ExchangeRate.rate
+                    ).filter(ExchangeRate.date.isnot(None))\
+                     .order_by(ExchangeRate.currency_from, ExchangeRate.currency_to, ExchangeRate.date)
+                    history = RateHistory(rows)
+                    _history = (version, history)
+        history.fallback = ExchangeRateService.get_matrix()
+        return history
+
+    @staticmethod
+    def convert(amounts, from_codes, to_currency, dates):
+        """
+        Converts each amount from its currency to to_currency at the rate of its
+        date. Returns (converted, rates); None where a currency is unknown.
+        """
+        rates = RateHistoryService.get().rates_at(from_codes, [to_currency] * len(amounts), dates)
+        converted = [amount * rate if rate is not None else None for amount, rate in zip(amounts, rates)]
+        return converted, rates
@@ -0,0 +1,91 @@
+"""
+Exchange rates as a dense N×N matrix indexed by currency code.
+
+matrix[i][j] is how many units of currency j one unit of currency i buys. It
+is built in one step from a vector of rates per EUR (the outer product of
+1/v and v), so every cross rate comes from the same snapshot and there is no
+per-pair bookkeeping. Currencies the rate source doesn't cover (COP) are
+triangulated from an anchor rate against a covered currency.
+
+Batch conversion maps the currency codes to matrix indexes once per distinct
+code and converts all amounts in one vectorized operation. NumPy is used when
+installed; otherwise the same arithmetic runs in plain Python.
+"""
+try:
+    import numpy as np
+except ImportError:  # same results, without vectorization
+    np = None
+
+
+class RateMatrix:
+
+    def __init__(self, per_eur):
+        """per_eur: {code: units of the currency per 1 EUR}, EUR included."""
+        self.currencies = tuple(sorted(per_eur))
+        self.index = {code: i for i, code in enumerate(self.currencies)}
+        values = [float(per_eur[code]) for code in self.currencies]
+        if np is not None:
+            vector = np.array(values)
+            self.matrix = np.outer(1.0 / vector, vector)
+        else:
+            self.matrix = [[to_value / from_value for to_value in values] for from_value in values]
+
+    @classmethod
+    def triangulated(cls, currencies, eur_rates, anchors, defaults=None):
+        """
+        Matrix over `currencies` from EUR-based rates. Codes missing from
+        eur_rates come from defaults, then from anchors {code: (via, units per via)}.
+        Raises ValueError if a currency can't be priced.
+        """
+        per_eur = {'EUR': 1.0}
+        for code in currencies:
+            rate = eur_rates.get(code) or (defaults or {}).get(code)
+            if rate:
+                per_eur[code] = rate
+        for code, (via, units) in anchors.items():
+            if code in currencies and code not in per_eur and via in per_eur:
+                per_eur[code] = per_eur[via] * units
+        missing = [code for code in currencies if code not in per_eur]
+        if missing:
+            raise ValueError(f"No rate for {', '.join(missing)}")
+        return cls({code: per_eur[code] for code in set(currencies) | {'EUR'}})
+
+    def rate(self, from_currency, to_currency):
+        """Rate between two codes; KeyError for an unknown code."""
+        return float(self.matrix[self.index[from_currency]][self.index[to_currency]])
+
+    def pairs(self):
+        """All off-diagonal pairs as {'COP_EUR': 0.00022, ...}."""
+        return {
+            f"{from_code}_{to_code}": self.rate(from_code, to_code)
+            for from_code in self.currencies
+            for to_code in self.currencies
+            if from_code != to_code
+        }
+
+    def _indexes(self, codes):
+        """Matrix indexes of a sequence of codes (one dict lookup per distinct code)."""
+        lookup = {}
+        for code in set(codes):
+            if code not in self.index:
+                raise KeyError(code)
+            lookup[code] = self.index[code]
+        if np is not None:
+            unique, inverse = np.unique(np.asarray(codes, dtype=str), return_inverse=True)
+            return np.array([lookup[code] for code in unique.tolist()], dtype=np.intp)[inverse]
+        return [lookup[code] for code in codes]
+
+    def convert(self, amounts, from_codes, to_codes):
+        """
+        Converts amounts[k] from from_codes[k] to to_codes[k]. Returns
+        (converted, rates) as lists of floats; KeyError for an unknown code.
+        """
+        if not amounts:
+            return [], []
+        rows = self._indexes(from_codes)
+        cols = self._indexes(to_codes)
+        if np is not None:
+            rates = self.matrix[rows, cols]
+            return (np.asarray(amounts, dtype=float) * rates).tolist(), rates.tolist()
+        rates = [self.matrix[i][j] for i, j in zip(rows, cols)]
+        return [amount * rate for amount, rate in zip(amounts, rates)], rates
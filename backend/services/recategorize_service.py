@@ -0,0 +1,196 @@
+"""
+Retroactive re-categorization of existing transactions.
+
+Applying a rule or merging categories can touch years of history, so the work
+runs as set-based UPDATE ... WHERE id IN (...) statements over keyset chunks of
+ids, committing after every chunk to keep locks short. Each chunk's transaction
+also moves the chunk's amounts between monthly rollup buckets and bumps
+data_version, so a run that fails or dies halfway leaves rollups and cached
+reads consistent with the chunks already committed.
+"""
+from sqlalchemy import func, or_, exists, update
+from sqlalchemy.orm import aliased
+
+from extensions import db
+from models import Transaction, Category, Rule
+from services.rollup_service import RollupService
+from services.rule_service import RuleService
+from cache import bump_data_version
+
+
+class RecategorizeService:
+    CHUNK_SIZE = 1000
+    SAMPLE_SIZE = 20
+
+    @staticmethod
+    def _filtered(query, user_id, account_id=None, start=None, end=None):
+        query = query.filter(Transaction.user_id == user_id, Transaction.deleted_at.is_(None))
+        if account_id is not None:
+            query = query.filter(Transaction.account_id == account_id)
+        if start is not None:
+            query = query.filter(Transaction.date >= start)
+        if end is not None:
+            query = query.filter(Transaction.date <= end)
+        return query
+
+    @staticmethod
+    def _sample_row(row, category_id, description=None):
+        return {
+            "id": row.id,
+            "date": row.date.isoformat(),
+            "amount": row.amount,
+            "description": row.description,
+            "old_category_id": row.category_id,
+            "new_category_id": category_id,
+            "new_description": description or row.description
+        }
+
+    @staticmethod
+    def _move(user_id, ids, condition, values):
+        """
+        Updates the rows of ids that still satisfy condition (locked first, so
+        rows edited meanwhile are left alone) and moves their rollup
+        contributions to the new category, in one transaction. Returns the count.
+        """
+        rows = db.session.query(
+            Transaction.id, Transaction.user_id, Transaction.account_id, Transaction.category_id,
+            Transaction.date, Transaction.amount, Transaction.transfer_id, Transaction.parent_id
+        ).filter(
+            Transaction.id.in_(ids), Transaction.deleted_at.is_(None), condition
+        ).with_for_update().all()
+        if rows:
+            db.session.execute(
+                update(Transaction).where(Transaction.id.in_([row.id for row in rows])).values(values)
+                .execution_options(synchronize_session=False)
+            )
+            old = [dict(row._mapping) for row in rows]
+            RollupService.add_rows(old, sign=-1)
+            RollupService.add_rows([dict(row, category_id=values[Transaction.category_id]) for row in old])
+            bump_data_version(user_id)
+        db.session.commit()
+        return len(rows)
+
+    @staticmethod
+    def apply_rule(user_id, rule_id, overwrite=False, account_id=None, start=None, end=None,
+                   dry_run=False, chunk_size=CHUNK_SIZE, sample_size=SAMPLE_SIZE):
+        """
+        Applies a rule to existing main transactions (no transfers, no split parents).
+        Only uncategorized ones unless overwrite is set. Rule priority is respected:
+        rows that an older rule also matches are left to that rule.
+        Returns {"matched", "updated", "sample"}; dry_run writes nothing.
+        """
+        user_id = int(user_id)
+        rule = db.session.query(Rule).join(Category, Category.id == Rule.category_id).filter(
+            Rule.id == rule_id, Rule.user_id == user_id, Rule.deleted_at.is_(None),
+            Category.user_id == user_id
+        ).first()
+        if not rule:
+            raise ValueError("Rule not found")
+        matcher = RuleService.get_matcher(user_id)
+        target, override = rule.category_id, rule.description
+
+        child = aliased(Transaction)
+        query = RecategorizeService._filtered(
+            db.session.query(Transaction.id, Transaction.date, Transaction.amount,
+                             Transaction.description, Transaction.category_id),
+            user_id, account_id, start, end
+        ).filter(
+            Transaction.parent_id.is_(None),
+            Transaction.transfer_id.is_(None),
+            Transaction.description.isnot(None),
+            ~exists().where(child.parent_id == Transaction.id)
+        )
+        # Guard checked again when the chunk is written so rows edited meanwhile are left alone
+        if overwrite:
+            guard = or_(Transaction.category_id.is_(None), Transaction.category_id != target)
+        else:
+            guard = Transaction.category_id.is_(None)
+        query = query.filter(guard)
+
+        values = {Transaction.category_id: target}
+        if override:
+            values[Transaction.description] = override
+
+        stats = {"matched": 0, "updated": 0, "sample": []}
+        last_id = 0
+        while True:
+            rows = query.filter(Transaction.id > last_id).order_by(Transaction.id).limit(chunk_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            ids = []
+            for row in rows:
+                found = matcher.match(row.description)
+                if not found or found[0] != rule.id:
+                    continue
+                ids.append(row.id)
+                if len(stats["sample"]) < sample_size:
+                    stats["sample"].append(RecategorizeService._sample_row(row, target, override))
+            stats["matched"] += len(ids)
+
+            if ids and not dry_run:
+                stats["updated"] += RecategorizeService._move(user_id, ids, guard, values)
+
+        return stats
+
+    @staticmethod
+    def remap(user_id, from_category_ids, to_category_id, account_id=None, start=None, end=None,
+              remap_rules=True, dry_run=False, chunk_size=CHUNK_SIZE, sample_size=SAMPLE_SIZE):
+        """
+        Moves transactions (split children included) from some categories into another,
+        e.g. to merge categories. Rules pointing at the old categories follow unless
+        remap_rules is off. Returns {"matched", "updated", "by_category", "rules", "sample"}.
+        """
+        user_id = int(user_id)
+        from_ids = {int(c) for c in from_category_ids} - {int(to_category_id)}
+        if not from_ids:
+            raise ValueError("from_category_ids must include a category other than the target")
+        owned = {row.id for row in db.session.query(Category.id).filter(
+            Category.user_id == user_id, Category.id.in_(from_ids | {int(to_category_id)})
+        )}
+        missing = (from_ids | {int(to_category_id)}) - owned
+        if missing:
+            raise ValueError(f"Category {min(missing)} not found")
+
+        def base(*columns):
+            return RecategorizeService._filtered(
+                db.session.query(*columns), user_id, account_id, start, end
+            ).filter(Transaction.category_id.in_(from_ids))
+
+        # Counts and sample straight from SQL; no row scan needed for a preview
+        by_category = {
+            category_id: count for category_id, count in
+            base(Transaction.category_id, func.count(Transaction.id)).group_by(Transaction.category_id)
+        }
+        sample_rows = base(
+            Transaction.id, Transaction.date, Transaction.amount, Transaction.description, Transaction.category_id
+        ).order_by(Transaction.date.desc(), Transaction.id.desc()).limit(sample_size).all()
+        rules_query = Rule.query.filter(Rule.user_id == user_id, Rule.category_id.in_(from_ids))
+
+        stats = {
+            "matched": sum(by_category.values()),
+            "updated": 0,
+            "by_category": {str(c): by_category.get(c, 0) for c in sorted(from_ids)},
+            "rules": rules_query.count() if remap_rules else 0,
+            "sample": [RecategorizeService._sample_row(row, int(to_category_id)) for row in sample_rows]
+        }
+        if dry_run:
+            return stats
+
+        last_id = 0
+        while True:
+            ids = [row.id for row in base(Transaction.id).filter(Transaction.id > last_id)
+                   .order_by(Transaction.id).limit(chunk_size)]
+            if not ids:
+                break
+            last_id = ids[-1]
+            stats["updated"] += RecategorizeService._move(
+                user_id, ids, Transaction.category_id.in_(from_ids), {Transaction.category_id: int(to_category_id)}
+            )
+
+        if remap_rules and stats["rules"]:
+            stats["rules"] = rules_query.update({Rule.category_id: int(to_category_id)}, synchronize_session=False)
+            bump_data_version(user_id)
+            db.session.commit()
+        return stats
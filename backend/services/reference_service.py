@@ -0,0 +1,45 @@
+"""
+Per-user reference maps (categories, accounts) from the shared cache.
+
+Names and types of a user's categories and accounts are needed by many views
+but change rarely. They are read once per data version and shared by all
+workers (cache.shared_value), so resolving names doesn't need a join or a
+query per view. Maps include every row of the user, as the relationships they
+replace did.
+"""
+from extensions import db
+from models import Category, Account
+from cache import shared_value
+
+
+class ReferenceService:
+    TTL = 3600
+
+    @staticmethod
+    def categories(user_id):
+        """{category_id: {"name", "type"}} of the user."""
+        def compute():
+            rows = db.session.query(Category.id, Category.name, Category.type)\
+                .filter(Category.user_id == user_id).order_by(Category.id).all()
+            return [list(row) for row in rows]
+        rows = shared_value(user_id, 'categories', compute, ReferenceService.TTL)
+        return {cat_id: {"name": name, "type": type_} for cat_id, name, type_ in rows}
+
+    @staticmethod
+    def accounts(user_id):
+        """{account_id: {"name", "type", "institution", "currency_code"}} of the user."""
+        def compute():
+            rows = db.session.query(
+                Account.id, Account.name, Account.type, Account.institution, Account.currency_code
+            ).filter(Account.user_id == user_id).order_by(Account.id).all()
+            return [[acc_id, name, acc_type.value if acc_type else None, institution, currency_code]
+                    for acc_id, name, acc_type, institution, currency_code in rows]
+        rows = shared_value(user_id, 'accounts', compute, ReferenceService.TTL)
+        return {
+            acc_id: {"name": name, "type": acc_type, "institution": institution, "currency_code": currency_code}
+            for acc_id, name, acc_type, institution, currency_code in rows
+        }
+
+    @staticmethod
+    def category_names(user_id):
+        return {cat_id: cat["name"] for cat_id, cat in ReferenceService.categories(user_id).items()}
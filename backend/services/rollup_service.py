@@ -0,0 +1,209 @@
+from extensions import db
+from models import MonthlyRollup, Transaction
+from sqlalchemy import func, case, insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+class RollupService:
+    @staticmethod
+    def month_key(column):
+        """
+        SQL expression that buckets a datetime column as 'YYYY-MM'.
+        """
+        if db.session.get_bind().dialect.name == 'postgresql':
+            return func.to_char(column, 'YYYY-MM')
+        return func.strftime('%Y-%m', column)
+
+    @staticmethod
+    def _key(user_id, account_id, category_id, date, transfer_id, parent_id):
+        return (user_id, account_id, category_id, date.strftime('%Y-%m'),
+                transfer_id is not None, parent_id is not None)
+
+    @staticmethod
+    def _apply(key, income, expense, income_count, expense_count):
+        user_id, account_id, category_id, month, is_transfer, is_split = key
+        dialect = db.session.get_bind().dialect.name
+        if dialect not in ('postgresql', 'sqlite'):
+            return RollupService._apply_without_upsert(key, income, expense, income_count, expense_count)
+
+        # Atomic upsert on the unique bucket index: concurrent first writes to the
+        # same bucket add up in one row instead of each inserting their own
+        dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = dialect_insert(MonthlyRollup).values(
+            user_id=user_id,
+            account_id=account_id,
+            category_id=category_id,
+            month=month,
+            is_transfer=is_transfer,
+            is_split=is_split,
+            income=income,
+            expense=expense,
+            income_count=income_count,
+            expense_count=expense_count
+        )
+        table = MonthlyRollup.__table__
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(MonthlyRollup.bucket_key()),
+            set_={
+                'income': table.c.income + stmt.excluded.income,
+                'expense': table.c.expense + stmt.excluded.expense,
+                'income_count': table.c.income_count + stmt.excluded.income_count,
+                'expense_count': table.c.expense_count + stmt.excluded.expense_count
+            }
+        )
+        db.session.execute(stmt)
+
+    @staticmethod
+    def _apply_without_upsert(key, income, expense, income_count, expense_count):
+        """Increment, then insert if the bucket doesn't exist yet (the unique index rejects a racing insert)."""
+        user_id, account_id, category_id, month, is_transfer, is_split = key
+        updated = MonthlyRollup.query.filter(
+            MonthlyRollup.user_id == user_id,
+            MonthlyRollup.account_id == account_id,
+            MonthlyRollup.category_id.is_(None) if category_id is None else MonthlyRollup.category_id == category_id,
+            MonthlyRollup.month == month,
+            MonthlyRollup.is_transfer == is_transfer,
+            MonthlyRollup.is_split == is_split
+        ).update({
+            MonthlyRollup.income: MonthlyRollup.income + income,
+            MonthlyRollup.expense: MonthlyRollup.expense + expense,
+            MonthlyRollup.income_count: MonthlyRollup.income_count + income_count,
+            MonthlyRollup.expense_count: MonthlyRollup.expense_count + expense_count
+        }, synchronize_session=False)
+
+        if not updated:
+            db.session.add(MonthlyRollup(
+                user_id=user_id,
+                account_id=account_id,
+                category_id=category_id,
+                month=month,
+                is_transfer=is_transfer,
+                is_split=is_split,
+                income=income,
+                expense=expense,
+                income_count=income_count,
+                expense_count=expense_count
+            ))
+
+    @staticmethod
+    def add_transaction(tx, sign=1):
+        """
+        Adds (sign=1) or removes (sign=-1) a transaction's contribution to its monthly rollup.
+        Runs in the caller's DB transaction; does not commit.
+        """
+        is_income = tx.amount > 0
+        income = tx.amount if is_income else 0.0
+        expense = 0.0 if is_income else -tx.amount
+
+        key = RollupService._key(tx.user_id, tx.account_id, tx.category_id, tx.date, tx.transfer_id, tx.parent_id)
+        RollupService._apply(
+            key,
+            sign * income,
+            sign * expense,
+            sign if is_income else 0,
+            0 if is_income else sign
+        )
+
+    @staticmethod
+    def add_rows(rows, sign=1):
+        """
+        Bulk version of add_transaction for rows written without the ORM (dicts with
+        user_id, account_id, category_id, date, amount, transfer_id, parent_id);
+        sign=-1 removes them. Sums them per rollup bucket first, so the cost is one
+        statement per bucket.
+        """
+        deltas = {}
+        for row in rows:
+            key = RollupService._key(
+                row['user_id'], row['account_id'], row.get('category_id'), row['date'],
+                row.get('transfer_id'), row.get('parent_id')
+            )
+            delta = deltas.setdefault(key, [0.0, 0.0, 0, 0])
+            if row['amount'] > 0:
+                delta[0] += row['amount']
+                delta[2] += 1
+            else:
+                delta[1] -= row['amount']
+                delta[3] += 1
+
+        for key, (income, expense, income_count, expense_count) in deltas.items():
+            RollupService._apply(key, sign * income, sign * expense, sign * income_count, sign * expense_count)
+
+    @staticmethod
+    def remove_transaction(tx):
+        RollupService.add_transaction(tx, sign=-1)
+
+    @staticmethod
+    def rebuild(user_id=None):
+        """
+        Recomputes rollups from the transactions table with one INSERT ... SELECT ... GROUP BY.
+        Returns the number of rollup rows written. Does not commit.
+        """
+        delete_query = MonthlyRollup.query
+        if user_id is not None:
+            delete_query = delete_query.filter(MonthlyRollup.user_id == user_id)
+        delete_query.delete(synchronize_session=False)
+
+        month = RollupService.month_key(Transaction.date)
+        is_income = Transaction.amount > 0
+        is_transfer = Transaction.transfer_id.isnot(None)
+        is_split = Transaction.parent_id.isnot(None)
+
+        select_stmt = db.select(
+            Transaction.user_id,
+            Transaction.account_id,
+            Transaction.category_id,
+            month,
+            is_transfer,
+            is_split,
+            func.sum(case((is_income, Transaction.amount), else_=0.0)),
+            func.sum(case((is_income, 0.0), else_=-Transaction.amount)),
+            func.sum(case((is_income, 1), else_=0)),
+            func.sum(case((is_income, 0), else_=1))
+        ).where(
+            Transaction.deleted_at.is_(None)
+        ).group_by(
+            Transaction.user_id, Transaction.account_id, Transaction.category_id,
+            month, is_transfer, is_split
+        )
+        if user_id is not None:
+            select_stmt = select_stmt.where(Transaction.user_id == user_id)
+
+        result = db.session.execute(insert(MonthlyRollup).from_select([
+            'user_id', 'account_id', 'category_id', 'month', 'is_transfer', 'is_split',
+            'income', 'expense', 'income_count', 'expense_count'
+        ], select_stmt))
+        return result.rowcount
+
+    @staticmethod
+    def totals(user_id, group_by=(), start_month=None, end_month=None, account_id=None,
+               category_id=None, include_transfers=False, include_splits=False, account_ids=None):
+        """
+        Sums rollups for a user, grouped by the given MonthlyRollup columns.
+        Months are 'YYYY-MM' strings (inclusive bounds).
+        Returns rows of (*group_by values, income, expense, count).
+        """
+        query = db.session.query(
+            *group_by,
+            func.coalesce(func.sum(MonthlyRollup.income), 0.0),
+            func.coalesce(func.sum(MonthlyRollup.expense), 0.0),
+            func.coalesce(func.sum(MonthlyRollup.income_count + MonthlyRollup.expense_count), 0)
+        ).filter(MonthlyRollup.user_id == user_id)
+
+        if start_month:
+            query = query.filter(MonthlyRollup.month >= start_month)
+        if end_month:
+            query = query.filter(MonthlyRollup.month <= end_month)
+        if account_id is not None:
+            query = query.filter(MonthlyRollup.account_id == account_id)
+        if account_ids is not None:
+            query = query.filter(MonthlyRollup.account_id.in_(account_ids))
+        if category_id is not None:
+            query = query.filter(MonthlyRollup.category_id == category_id)
+        if not include_transfers:
+            query = query.filter(MonthlyRollup.is_transfer.is_(False))
+        if not include_splits:
+            query = query.filter(MonthlyRollup.is_split.is_(False))
+
+        if group_by:
+            query = query.group_by(*group_by).order_by(*group_by)
+        return query.all()
@@ -0,0 +1,179 @@
+"""
+Auto-categorization rules.
+
+All of a user's rules are compiled into one RuleMatcher: plain-text patterns go
+into an Aho-Corasick automaton and real regexes into one combined alternation
+of lookaheads, so matching a description is a single pass whatever the number
+of rules. Matching is case-insensitive and the oldest matching rule (lowest id)
+wins.
+
+Matchers are cached per user and rebuilt when the rules signature (count, ids,
+last update) read from the database changes, so every worker sees edits.
+"""
+import re
+from collections import deque
+
+from sqlalchemy import func
+
+from extensions import db
+from models import Rule, Category
+from cache import LRUCache
+
+REGEX_CHARS = set('.^$*+?{}[]\\|()')
+BACKREFERENCE = re.compile(r'\\[1-9]')
+
+
+class AhoCorasick:
+    """Multi-substring matcher: one pass over the text finds every pattern it contains."""
+
+    def __init__(self, patterns):
+        # patterns: iterable of (text, value); text is matched as-is (lowercase it first)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for text, value in patterns:
+            state = 0
+            for ch in text:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(value)
+
+        # Failure links, breadth first; outputs of the fallback state are inherited
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def search(self, text):
+        """Values of every pattern occurring in text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        found = []
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.extend(out[state])
+        return found
+
+
+class RuleMatcher:
+    def __init__(self, rules):
+        """rules: iterable of (rule_id, pattern, category_id, description override)."""
+        self.rules = {}
+        literals = []
+        regexes = []
+        for rule_id, pattern, category_id, override in rules:
+            if not pattern:
+                continue
+            self.rules[rule_id] = (category_id, override)
+            if REGEX_CHARS.isdisjoint(pattern):
+                literals.append((pattern.lower(), rule_id))
+                continue
+            try:
+                re.compile(f'(?:{pattern})')
+                regexes.append((rule_id, pattern))
+            except re.error:
+                # Not a valid regex: treat it as plain text
+                literals.append((pattern.lower(), rule_id))
+
+        self._automaton = AhoCorasick(literals) if literals else None
+        # One alternation of zero-width lookaheads, one named group per rule, ordered
+        # by priority. Lookaheads consume nothing, so the scan tries every position
+        # and a match of one rule never hides an overlapping match of an older one;
+        # at each position the oldest rule matching there is reported.
+        self._regex = None
+        self._separate = []
+        if regexes:
+            try:
+                if any(BACKREFERENCE.search(pattern) for _, pattern in regexes):
+                    # Numbered backreferences would point at the wrapper groups
+                    raise re.error("numbered backreference")
+                self._regex = re.compile(
+                    '|'.join(f'(?=(?P<r{rule_id}>{pattern}))' for rule_id, pattern in sorted(regexes)),
+                    re.IGNORECASE
+                )
+            except re.error:
+                # Patterns that can't share one regex (e.g. clashing group names)
+                self._separate = [(rule_id, re.compile(pattern, re.IGNORECASE)) for rule_id, pattern in sorted(regexes)]
+
+    def __len__(self):
+        return len(self.rules)
+
+    def match(self, description):
+        """Returns (rule_id, category_id, description override) of the winning rule, or None."""
+        if not description or not self.rules:
+            return None
+        candidates = []
+        if self._automaton:
+            candidates.extend(self._automaton.search(description.lower()))
+        if self._regex:
+            for m in self._regex.finditer(description):
+                candidates.append(int(m.lastgroup[1:]))
+        for rule_id, regex in self._separate:
+            if regex.search(description):
+                candidates.append(rule_id)
+                break
+        if not candidates:
+            return None
+        rule_id = min(candidates)
+        category_id, override = self.rules[rule_id]
+        return rule_id, category_id, override
+
+    def apply(self, row):
+        """
+        Categorizes a dict with description (and category_id) in place when it has no
+        category yet. Returns the rule id applied, or None.
+        """
+        if row.get('category_id') is not None:
+            return None
+        found = self.match(row.get('description'))
+        if not found:
+            return None
+        rule_id, category_id, override = found
+        row['category_id'] = category_id
+        if override:
+            row['description'] = override
+        return rule_id
+
+
+_matchers = LRUCache(max_entries=512, max_bytes=512)
+
+
+class RuleService:
+    @staticmethod
+    def _signature(user_id):
+        return db.session.query(
+            func.count(Rule.id), func.max(Rule.id), func.sum(Rule.id), func.max(Rule.updated_at)
+        ).filter(Rule.user_id == user_id).one()
+
+    @staticmethod
+    def get_matcher(user_id):
+        """Compiled matcher for the user's active rules (cached; one small query to validate)."""
+        user_id = int(user_id)
+        signature = tuple(RuleService._signature(user_id))
+        cached = _matchers.get(user_id)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        rows = db.session.query(Rule.id, Rule.pattern, Rule.category_id, Rule.description)\
+            .join(Category, Category.id == Rule.category_id)\
+            .filter(Rule.user_id == user_id, Rule.deleted_at.is_(None), Category.user_id == user_id)\
+            .order_by(Rule.id)\
+            .all()
+        matcher = RuleMatcher(rows)
+        _matchers.set(user_id, (signature, matcher))
+        return matcher
@@ -0,0 +1,187 @@
+"""
+Full-text search over transactions (description, category name, account name).
+
+Postgres: transactions.search_vector (tsvector, GIN index) filled by a trigger
+with unaccent()ed text. SQLite: an FTS5 table, transactions_fts, with rowid =
+transaction id, kept in sync by triggers on transactions, categories and
+accounts. Both are created by migration 035e7345e8b0; rebuild_search_index.py
+recreates them (e.g. after a batch migration recreated the transactions table,
+which drops SQLite triggers).
+
+Queries are normalized here the same way (lowercase, no accents), every term
+is a prefix match and all terms must match: "educ basi" finds "Educación básica".
+Databases without the index (e.g. built with db.create_all) fall back to ILIKE.
+"""
+import re
+import unicodedata
+
+from sqlalchemy import text, func, literal_column, select
+
+from extensions import db
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+        description, category, account, tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts(rowid, description, category, account) VALUES (
+            new.id, new.description,
+            (SELECT name FROM categories WHERE id = new.category_id),
+            (SELECT name FROM accounts WHERE id = new.account_id));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_update
+    AFTER UPDATE OF description, category_id, account_id ON transactions BEGIN
+        DELETE FROM transactions_fts WHERE rowid = old.id;
+        INSERT INTO transactions_fts(rowid, description, category, account) VALUES (
+            new.id, new.description,
+            (SELECT name FROM categories WHERE id = new.category_id),
+            (SELECT name FROM accounts WHERE id = new.account_id));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        DELETE FROM transactions_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS categories_fts_rename AFTER UPDATE OF name ON categories BEGIN
+        UPDATE transactions_fts SET category = new.name
+        WHERE rowid IN (SELECT id FROM transactions WHERE category_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS accounts_fts_rename AFTER UPDATE OF name ON accounts BEGIN
+        UPDATE transactions_fts SET account = new.name
+        WHERE rowid IN (SELECT id FROM transactions WHERE account_id = new.id);
+    END""",
+]
+
+SQLITE_BACKFILL = """
+    INSERT INTO transactions_fts(rowid, description, category, account)
+    SELECT t.id, t.description, c.name, a.name
+    FROM transactions t
+    LEFT JOIN categories c ON c.id = t.category_id
+    LEFT JOIN accounts a ON a.id = t.account_id
+"""
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "ALTER TABLE transactions ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """CREATE OR REPLACE FUNCTION transactions_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', unaccent(coalesce(NEW.description, ''))), 'A') ||
+            setweight(to_tsvector('simple', unaccent(coalesce(
+                (SELECT name FROM categories WHERE id = NEW.category_id), ''))), 'B') ||
+            setweight(to_tsvector('simple', unaccent(coalesce(
+                (SELECT name FROM accounts WHERE id = NEW.account_id), ''))), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS transactions_search_vector ON transactions",
+    """CREATE TRIGGER transactions_search_vector
+    BEFORE INSERT OR UPDATE OF description, category_id, account_id ON transactions
+    FOR EACH ROW EXECUTE FUNCTION transactions_search_vector()""",
+    # Renames touch the transactions so the trigger above recomputes their vectors
+    """CREATE OR REPLACE FUNCTION transactions_search_rename() RETURNS trigger AS $$
+    BEGIN
+        IF TG_TABLE_NAME = 'categories' THEN
+            UPDATE transactions SET category_id = category_id WHERE category_id = NEW.id;
+        ELSE
+            UPDATE transactions SET account_id = account_id WHERE account_id = NEW.id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS categories_search_rename ON categories",
+    """CREATE TRIGGER categories_search_rename AFTER UPDATE OF name ON categories
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name) EXECUTE FUNCTION transactions_search_rename()""",
+    "DROP TRIGGER IF EXISTS accounts_search_rename ON accounts",
+    """CREATE TRIGGER accounts_search_rename AFTER UPDATE OF name ON accounts
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name) EXECUTE FUNCTION transactions_search_rename()""",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_search_vector ON transactions USING GIN (search_vector)",
+]
+
+POSTGRES_BACKFILL = "UPDATE transactions SET description = description"
+
+# Per database URL: whether the search index exists (checked once per process)
+_available = {}
+
+
+class SearchService:
+    MAX_TERMS = 10
+
+    @staticmethod
+    def terms(query_text):
+        """Lowercase, accent-free word terms of a search string."""
+        value = unicodedata.normalize('NFKD', query_text or '')
+        value = ''.join(ch for ch in value if not unicodedata.combining(ch)).lower()
+        return re.findall(r'[^\W_]+', value)[:SearchService.MAX_TERMS]
+
+    @staticmethod
+    def dialect():
+        return db.session.get_bind().dialect.name
+
+    @staticmethod
+    def available():
+        bind = db.session.get_bind()
+        key = str(bind.url)
+        if key not in _available:
+            if bind.dialect.name == 'postgresql':
+                found = db.session.execute(text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_name = 'transactions' AND column_name = 'search_vector'"
+                )).first()
+            elif bind.dialect.name == 'sqlite':
+                found = db.session.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'"
+                )).first()
+            else:
+                found = None
+            _available[key] = found is not None
+        return _available[key]
+
+    @staticmethod
+    def match(query_text):
+        """
+        (filter clause, relevance score expression) for Transaction queries, or None
+        when the string has no terms. Higher scores are better matches.
+        """
+        from models import Transaction
+
+        terms = SearchService.terms(query_text)
+        if not terms:
+            return None
+
+        if SearchService.dialect() == 'postgresql':
+            tsquery = func.to_tsquery('simple', ' & '.join(f'{term}:*' for term in terms))
+            vector = literal_column('transactions.search_vector')
+            return vector.op('@@')(tsquery), func.ts_rank(vector, tsquery)
+
+        # FTS5: implicit AND of quoted prefix terms; bm25() is lower for better matches
+        fts = literal_column('transactions_fts')
+        matches = select(
+            literal_column('rowid').label('id'),
+            (-func.bm25(fts)).label('score')
+        ).select_from(text('transactions_fts')).where(
+            fts.op('MATCH')(' '.join(f'"{term}"*' for term in terms))
+        ).subquery()
+        # "+ 0" keeps SQLite from probing the FTS table once per transaction row:
+        # the match set drives the join and transactions are looked up by id
+        return Transaction.id == matches.c.id + 0, matches.c.score
+
+    @staticmethod
+    def install(rebuild=False):
+        """
+        Creates the index and triggers for the current database if missing; with
+        rebuild, re-indexes every transaction. Does not commit.
+        """
+        dialect = SearchService.dialect()
+        if dialect == 'postgresql':
+            for statement in POSTGRES_DDL:
+                db.session.execute(text(statement))
+            if rebuild:
+                db.session.execute(text(POSTGRES_BACKFILL))
+        elif dialect == 'sqlite':
+            for statement in SQLITE_DDL:
+                db.session.execute(text(statement))
+            if rebuild:
+                db.session.execute(text("DELETE FROM transactions_fts"))
+                db.session.execute(text(SQLITE_BACKFILL))
+        else:
+            raise ValueError(f"Full-text search is not supported on {dialect}")
+        _available.pop(str(db.session.get_bind().url), None)
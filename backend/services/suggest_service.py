@@ -0,0 +1,152 @@
+"""
+Description autocomplete for transaction entry.
+
+Each user gets a SuggestionIndex: a sorted array of normalized descriptions
+(bisect finds the prefix range) and, per description, how often it was used
+and the category/account/amount of its most recent use. Indexes are built
+lazily on the first lookup and kept in an LRU across users, together with
+the user's data_version (bumped on every write, see cache.py) and a signature
+of the indexed rows: their count and latest updated_at. A lookup with an
+unchanged data_version uses the index as is. After a write, the signature of
+the rows up to the last indexed id tells inserts from edits: if it still
+matches, only the transactions created since are read (a primary key range);
+if an indexed row was edited or deleted, the index is rebuilt.
+"""
+import heapq
+import threading
+from bisect import bisect_left
+
+from extensions import db
+from models import Transaction
+from sqlalchemy import func
+
+from cache import LRUCache, get_data_version
+from services.duplicate_service import DuplicateService
+
+
+class SuggestionIndex:
+    MEMO_PREFIX_LENGTH = 3
+
+    def __init__(self):
+        self.keys = []       # sorted normalized descriptions
+        self.new_keys = []   # added since the last merge()
+        self.memo = {}       # (prefix, limit) -> results, for short prefixes that span many keys
+        self.entries = {}    # key -> [description, count, date, category_id, account_id, amount]
+        self.last_id = 0
+        self.version = None    # data_version the index is current with
+        self.signature = None  # (count, max updated_at) of the user's transactions up to last_id
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, tx_id, description, date, category_id, account_id, amount):
+        key = DuplicateService.normalize_description(description)
+        if key:
+            self.memo = {}
+            entry = self.entries.get(key)
+            if entry is None:
+                self.new_keys.append(key)
+                self.entries[key] = [description, 1, date, category_id, account_id, amount]
+            else:
+                entry[1] += 1
+                if date >= entry[2]:
+                    entry[0], entry[2], entry[3], entry[4], entry[5] = description, date, category_id, account_id, amount
+        self.last_id = max(self.last_id, tx_id)
+
+    def merge(self):
+        """Sorts keys added since the last merge into the array (one timsort run merge)."""
+        if self.new_keys:
+            self.keys = sorted(self.keys + self.new_keys)
+            self.new_keys = []
+            self.memo = {}
+
+    def lookup(self, prefix, limit=8):
+        """Most frequent descriptions starting with prefix (then most recent)."""
+        prefix = DuplicateService.normalize_description(prefix)
+        if not prefix:
+            return []
+        memo = self.memo
+        if (prefix, limit) in memo:
+            return memo[(prefix, limit)]
+        start = bisect_left(self.keys, prefix)
+        # Keys sharing the prefix are contiguous; \uffff sorts after any continuation
+        end = bisect_left(self.keys, prefix + '\uffff', start)
+        best = heapq.nlargest(
+            limit, (self.entries[key] for key in self.keys[start:end]),
+            key=lambda entry: (entry[1], entry[2])
+        )
+        results = [{
+            "description": description,
+            "count": count,
+            "last_used": date.isoformat(),
+            "category_id": category_id,
+            "account_id": account_id,
+            "amount": amount
+        } for description, count, date, category_id, account_id, amount in best]
+        if len(prefix) <= self.MEMO_PREFIX_LENGTH:
+            memo[(prefix, limit)] = results
+        return results
+
+
+# Sized by number of distinct descriptions across cached users
+_indexes = LRUCache(max_entries=256, max_bytes=2_000_000)
+
+
+class SuggestService:
+    BUILD_BATCH = 5000
+
+    @staticmethod
+    def _rows(user_id, after_id=0, until_id=None):
+        """Main, non-transfer transactions of the user with after_id < id <= until_id, oldest id first."""
+        query = db.session.query(
+            Transaction.id, Transaction.description, Transaction.date,
+            Transaction.category_id, Transaction.account_id, Transaction.amount
+        )
+        if until_id is not None:
+            query = query.filter(Transaction.id <= until_id)
+        return query.filter(
+            Transaction.id > after_id,
+            Transaction.user_id == user_id,
+            Transaction.parent_id.is_(None),
+            Transaction.transfer_id.is_(None),
+            Transaction.deleted_at.is_(None),
+            Transaction.description.isnot(None)
+        ).order_by(Transaction.id).execution_options(yield_per=SuggestService.BUILD_BATCH)
+
+    @staticmethod
+    def _signature(user_id, until_id=None):
+        """(max id, count, max updated_at) of all the user's transactions, or of those up to until_id."""
+        query = db.session.query(
+            func.max(Transaction.id), func.count(Transaction.id), func.max(Transaction.updated_at)
+        ).filter(Transaction.user_id == user_id)
+        if until_id is not None:
+            query = query.filter(Transaction.id <= until_id)
+        max_id, count, updated = query.one()
+        return max_id or 0, (count, updated)
+
+    @staticmethod
+    def get_index(user_id):
+        """The user's index, built on first use and brought up to date after writes."""
+        user_id = int(user_id)
+        version = get_data_version(user_id)
+        index = _indexes.get(user_id)
+        if index is not None and index.version == version:
+            return index
+        if index is not None and SuggestService._signature(user_id, index.last_id)[1] != index.signature:
+            index = None  # an indexed row was edited or deleted
+        if index is None:
+            index = SuggestionIndex()
+        with index.lock:
+            # Signature first: anything written after it changes data_version again
+            max_id, signature = SuggestService._signature(user_id)
+            for row in SuggestService._rows(user_id, index.last_id, max_id):
+                index.add(*row)
+            index.merge()
+            index.last_id, index.signature, index.version = max_id, signature, version
+        _indexes.set(user_id, index, size=max(1, len(index)))
+        return index
+
+    @staticmethod
+    def suggest(user_id, prefix, limit=8):
+        return SuggestService.get_index(user_id).lookup(prefix, limit)
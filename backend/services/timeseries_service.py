@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
+from extensions import db
+from models import Transaction, MonthlyRollup
+from services.rollup_service import RollupService
+from sqlalchemy import func, case
+
+class TimeSeriesService:
+    GRANULARITIES = ('day', 'week', 'month')
+    MAX_PERIODS = 1000
+
+    @staticmethod
+    def bucket_start(value, granularity):
+        """First instant of the bucket (day, ISO week starting Monday, month) containing value."""
+        day = datetime(value.year, value.month, value.day)
+        if granularity == 'week':
+            return day - timedelta(days=day.weekday())
+        if granularity == 'month':
+            return day.replace(day=1)
+        return day
+
+    @staticmethod
+    def _step(granularity):
+        if granularity == 'week':
+            return timedelta(weeks=1)
+        if granularity == 'month':
+            return relativedelta(months=1)
+        return timedelta(days=1)
+
+    @staticmethod
+    def period_key(value, granularity):
+        return value.strftime('%Y-%m' if granularity == 'month' else '%Y-%m-%d')
+
+    @staticmethod
+    def bucket_key(column, granularity):
+        """
+        SQL expression with the same key as period_key(): date_trunc on Postgres,
+        strftime on SQLite (weeks roll back to Monday).
+        """
+        if db.session.get_bind().dialect.name == 'postgresql':
+            fmt = 'YYYY-MM' if granularity == 'month' else 'YYYY-MM-DD'
+            return func.to_char(func.date_trunc(granularity, column), fmt)
+        if granularity == 'week':
+            return func.strftime('%Y-%m-%d', column, 'weekday 0', '-6 days')
+        return func.strftime('%Y-%m' if granularity == 'month' else '%Y-%m-%d', column)
+
+    @staticmethod
+    def periods(start, end, granularity):
+        """Dense list of period keys covering [start, end]. Raises ValueError if too long."""
+        step = TimeSeriesService._step(granularity)
+        current = TimeSeriesService.bucket_start(start, granularity)
+        keys = []
+        while current <= end:
+            keys.append(TimeSeriesService.period_key(current, granularity))
+            if len(keys) > TimeSeriesService.MAX_PERIODS:
+                raise ValueError(f"Too many periods (max {TimeSeriesService.MAX_PERIODS})")
+            current += step
+        return keys
+
+    @staticmethod
+    def _grouped(user_id, account_ids, start, end, granularity):
+        """Rows of (account_id, period key, income, expense, count) for main, non-transfer transactions."""
+        if granularity == 'month':
+            # Whole months are already summed in the rollups
+            return RollupService.totals(
+                user_id,
+                group_by=(MonthlyRollup.account_id, MonthlyRollup.month),
+                start_month=start.strftime('%Y-%m'),
+                end_month=end.strftime('%Y-%m'),
+                account_ids=account_ids
+            )
+
+        bucket = TimeSeriesService.bucket_key(Transaction.date, granularity)
+        range_start = TimeSeriesService.bucket_start(start, granularity)
+        range_end = TimeSeriesService.bucket_start(end, granularity) + TimeSeriesService._step(granularity)
+        return db.session.query(
+            Transaction.account_id,
+            bucket,
+            func.coalesce(func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)), 0),
+            func.coalesce(func.sum(case((Transaction.amount <= 0, -Transaction.amount), else_=0)), 0),
+            func.count(Transaction.id)
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.account_id.in_(account_ids),
+            Transaction.date >= range_start,
+            Transaction.date < range_end,
+            Transaction.parent_id.is_(None),
+            Transaction.transfer_id.is_(None)
+        ).group_by(Transaction.account_id, bucket).all()
+
+    @staticmethod
+    def series(user_id, account_ids, start, end, granularity='day'):
+        """
+        Gap-filled income/expense/net/transactions per account, as parallel arrays
+        aligned with the returned periods (empty periods are 0):
+
+            {"periods": [...], "accounts": {account_id: {"income": [...], "expense": [...],
+                                                         "net": [...], "transactions": [...]}}}
+
+        One grouped query for all accounts. Raises ValueError on bad arguments.
+        """
+        if granularity not in TimeSeriesService.GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(TimeSeriesService.GRANULARITIES)}")
+        if start > end:
+            raise ValueError("start must be before end")
+
+        periods = TimeSeriesService.periods(start, end, granularity)
+        index = {key: i for i, key in enumerate(periods)}
+        size = len(periods)
+
+        accounts = {}
+        for account_id in account_ids:
+            accounts[account_id] = {
+                "income": [0.0] * size,
+                "expense": [0.0] * size,
+                "net": [0.0] * size,
+                "transactions": [0] * size
+            }
+
+        for account_id, key, income, expense, count in TimeSeriesService._grouped(
+                user_id, account_ids, start, end, granularity):
+            i = index.get(key)
+            if i is None or account_id not in accounts:
+                continue
+            data = accounts[account_id]
+            data["income"][i] = float(income)
+            data["expense"][i] = float(expense)
+            data["net"][i] = float(income) - float(expense)
+            data["transactions"][i] = count
+
+        return {"periods": periods, "accounts": accounts}
@@ -1,30 +1,60 @@
 from extensions import db, limiter
-from models import Transaction, Account, AccountType
+from models import Transaction, Account, AccountType, Category
+from services.rollup_service import RollupService
+from services.duplicate_service import DuplicateService, DuplicateTransactionError
+from services.rule_service import RuleService
+from cache import bump_data_version
+from sqlalchemy import insert, update, bindparam
 from datetime import datetime
+import math
 
 class TransactionService:
+    MAX_BATCH_SIZE = 5000
+
     @staticmethod
-    def create_transaction(account_id, amount, category_id=None, description=None, date=None, parent_id=None):
+    def create_transaction(account_id, amount, category_id=None, description=None, date=None, parent_id=None,
+                           transfer_id=None, allow_duplicate=False, auto_categorize=True):
         """
-        Creates a transaction and updates the account balance.
+        Creates a transaction and updates the account balance and monthly rollup.
         If parent_id is provided, it's a split transaction.
+        Without a category, the user's rules pick one (and may rewrite the description).
+        Raises DuplicateTransactionError if the same main transaction already exists,
+        unless allow_duplicate is set.
         """
         # Validate Account
         account = Account.query.get(account_id)
         if not account:
             raise ValueError("Account not found")
 
+        date = date or datetime.utcnow()
+        fingerprint = None
+        if parent_id is None and transfer_id is None:
+            if allow_duplicate:
+                fingerprint = DuplicateService.free_fingerprint(account_id, date, amount, description)
+            else:
+                fingerprint = DuplicateService.check(account_id, date, amount, description)
+
+        if auto_categorize and category_id is None and transfer_id is None:
+            row = {"description": description, "category_id": None}
+            if RuleService.get_matcher(account.user_id).apply(row):
+                category_id, description = row["category_id"], row["description"]
+
         # Create Transaction
         tx = Transaction(
+            user_id=account.user_id,
             account_id=account_id,
             amount=amount,
             category_id=category_id,
             description=description,
-            date=date or datetime.utcnow(),
-            parent_id=parent_id
+            date=date,
+            parent_id=parent_id,
+            transfer_id=transfer_id,
+            fingerprint=fingerprint
         )
         
         db.session.add(tx)
+        RollupService.add_transaction(tx)
+        bump_data_version(account.user_id)
         
         # Update Balance (Transactional)
         # Only update balance if this is a main transaction (not a split child)
@@ -34,7 +64,7 @@ class TransactionService:
         return tx
 
     @staticmethod
-    def create_split_transaction(user_id, main_tx_data, splits_data):
+    def create_split_transaction(user_id, main_tx_data, splits_data, allow_duplicate=False):
         """
         main_tx_data: dict with account_id, amount, description, date
         splits_data: list of dicts with amount, category_id, description
@@ -45,7 +75,9 @@ class TransactionService:
             amount=main_tx_data['amount'],
             description=main_tx_data.get('description'),
             date=main_tx_data.get('date'),
-            category_id=None 
+            category_id=None,
+            allow_duplicate=allow_duplicate,
+            auto_categorize=False
         )
         
         db.session.flush() # Get ID
@@ -66,3 +98,154 @@ class TransactionService:
             
         db.session.commit()
         return main_tx
+
+    @staticmethod
+    def _parse_batch_item(item, account_ids, category_ids):
+        """Validates one batch item. Returns (main row dict, list of split dicts) or raises ValueError."""
+        if not isinstance(item, dict):
+            raise ValueError("Item must be an object")
+
+        def parse_amount(value):
+            if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+                raise ValueError("Invalid amount")
+            try:
+                amount = float(value)
+            except ValueError:
+                raise ValueError("Invalid amount")
+            # float() takes "nan"/"inf"; fingerprints also need the amount in cents to be finite
+            if not math.isfinite(amount * 100):
+                raise ValueError("Invalid amount")
+            return amount
+
+        def check_category(category_id):
+            if category_id is not None and category_id not in category_ids:
+                raise ValueError(f"Category {category_id} not found")
+            return category_id
+
+        account_id = item.get('account_id')
+        if account_id not in account_ids:
+            raise ValueError("Account not found")
+
+        date = item.get('date') or datetime.utcnow()
+        main = {
+            "account_id": account_id,
+            "amount": parse_amount(item.get('amount')),
+            "category_id": check_category(item.get('category_id')),
+            "description": item.get('description'),
+            "date": date if isinstance(date, datetime) else datetime.fromisoformat(date)
+        }
+
+        splits = item.get('splits') or []
+        if not isinstance(splits, list):
+            raise ValueError("splits must be a list")
+        if splits:
+            main["category_id"] = None
+        children = [{
+            "account_id": account_id,
+            "amount": parse_amount(split.get('amount')),
+            "category_id": check_category(split.get('category_id')),
+            "description": split.get('description'),
+            "date": main["date"]
+        } for split in splits]
+
+        return main, children
+
+    @staticmethod
+    def create_batch(user_id, items, skip_duplicates=False, occurrences=None):
+        """
+        Creates many transactions (optionally with splits) in one DB transaction:
+        one ownership query, bulk INSERTs, one balance UPDATE per account and one
+        rollup update per month/category bucket.
+
+        Returns (results, ok). results has one entry per item, in order. If any item
+        is invalid nothing is written and ok is False. Items that already exist
+        (same fingerprint) are errors too, or are left out with status "duplicate"
+        when skip_duplicates is set. occurrences is the counter shared by chunks
+        of one import (see DuplicateService.fingerprint_rows). Does not commit.
+        """
+        user_id = int(user_id)
+        if len(items) > TransactionService.MAX_BATCH_SIZE:
+            raise ValueError(f"Batch too large (max {TransactionService.MAX_BATCH_SIZE})")
+
+        # Ownership of every referenced account and category, one query each
+        wanted_accounts = {item.get('account_id') for item in items if isinstance(item, dict)}
+        account_ids = {row.id for row in db.session.query(Account.id).filter(
+            Account.user_id == user_id, Account.id.in_(wanted_accounts - {None})
+        )}
+        wanted_categories = set()
+        for item in items:
+            if isinstance(item, dict):
+                wanted_categories.add(item.get('category_id'))
+                for split in item.get('splits') or []:
+                    if isinstance(split, dict):
+                        wanted_categories.add(split.get('category_id'))
+        category_ids = {row.id for row in db.session.query(Category.id).filter(
+            Category.user_id == user_id, Category.id.in_(wanted_categories - {None})
+        )}
+
+        results = []
+        parsed = []
+        for index, item in enumerate(items):
+            try:
+                main, children = TransactionService._parse_batch_item(item, account_ids, category_ids)
+                parsed.append((len(results), main, children))
+                results.append({"index": index, "status": "ok"})
+            except (ValueError, TypeError, AttributeError) as e:
+                results.append({"index": index, "status": "error", "msg": str(e)})
+
+        # Exact duplicates against stored transactions, one IN query per 500 fingerprints
+        DuplicateService.fingerprint_rows([main for _, main, _ in parsed], seen=occurrences)
+        existing = DuplicateService.existing(account_ids, {main["fingerprint"] for _, main, _ in parsed})
+        if existing:
+            for i, main, _ in parsed:
+                if main["fingerprint"] not in existing:
+                    continue
+                if skip_duplicates:
+                    results[i]["status"] = "duplicate"
+                else:
+                    results[i].update(status="error", msg=str(DuplicateTransactionError()))
+            parsed = [entry for entry in parsed if entry[1]["fingerprint"] not in existing]
+
+        if any(r["status"] == "error" for r in results):
+            return results, False
+        if not parsed:
+            return results, True
+
+        # Rules compiled once for the whole batch; one automaton pass per row.
+        # After fingerprinting, so fingerprints keep the description as entered.
+        matcher = RuleService.get_matcher(user_id)
+        for i, main, children in parsed:
+            if not children and matcher.apply(main):
+                results[i]["categorized"] = True
+
+        # Main rows: one executemany INSERT, ids returned in input order
+        main_rows = [dict(main, user_id=user_id) for _, main, _ in parsed]
+        ids = db.session.execute(
+            insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+            main_rows
+        ).scalars().all()
+
+        child_rows = []
+        for tx_id, (_, _, children) in zip(ids, parsed):
+            child_rows.extend(dict(child, user_id=user_id, parent_id=tx_id) for child in children)
+        if child_rows:
+            db.session.execute(insert(Transaction), child_rows)
+
+        # One aggregated balance delta per account (split children don't move balances)
+        deltas = {}
+        for row in main_rows:
+            deltas[row["account_id"]] = deltas.get(row["account_id"], 0.0) + row["amount"]
+        accounts = Account.__table__
+        db.session.execute(
+            update(accounts)
+            .where(accounts.c.id == bindparam('account_id'))
+            .values(balance=accounts.c.balance + bindparam('delta')),
+            [{"account_id": k, "delta": v} for k, v in deltas.items()]
+        )
+
+        RollupService.add_rows(main_rows + child_rows)
+        bump_data_version(user_id)
+
+        for tx_id, (i, _, children) in zip(ids, parsed):
+            results[i].update(status="created", id=tx_id, splits=len(children))
+        return results, True
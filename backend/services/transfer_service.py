@@ -17,6 +17,7 @@ class TransferService:
 
         # Create Transfer Record
         transfer = Transfer(
+            user_id=from_acc.user_id,
             from_account_id=from_account_id,
             to_account_id=to_account_id,
             amount=amount,
@@ -32,19 +33,17 @@ class TransferService:
             amount=-amount,
             description=f"Transfer to {to_acc.name}" + (f": {description}" if description else ""),
             date=date,
-            # We could link to transfer_id if we added that field to Transaction model as polymorphic
-            # In models.py we have 'transfer_id' in Transaction? Yes.
+            transfer_id=transfer.id
         )
-        t1.transfer_id = transfer.id
 
         # Create Deposit Transaction (To)
         t2 = TransactionService.create_transaction(
             account_id=to_account_id,
             amount=amount,
             description=f"Transfer from {from_acc.name}" + (f": {description}" if description else ""),
-            date=date
+            date=date,
+            transfer_id=transfer.id
         )
-        t2.transfer_id = transfer.id
         
         db.session.commit()
         return transfer
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app(tmp_path):
+    """App on a fresh SQLite database, with rate limiting and the response cache off."""
+    from app import create_app
+    from config import Config
+    from extensions import db, limiter
+
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        SHARED_CACHE_PATH = str(tmp_path / 'shared_cache.db')
+        RATELIMIT_ENABLED = False
+        RESPONSE_CACHE_ENABLED = False
+        EXCHANGE_RATES_API_URL = 'http://127.0.0.1:9'  # never reach the real API
+
+    app = create_app(TestConfig)
+    # Per-process caches are keyed by user id, which repeats across test databases
+    from cache import response_cache, value_cache
+    from services import rule_service, suggest_service
+    for cache in (response_cache, value_cache, rule_service._matchers, suggest_service._indexes):
+        cache.clear()
+    limiter.enabled = False
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    client.post('/auth/register', json={'username': 'tester', 'email': 'tester@example.com', 'password': 'secret'})
+    token = client.post('/auth/login', json={'username': 'tester', 'password': 'secret'}).get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import pytest
+
+
+@pytest.fixture
+def accounts(client, auth_headers):
+    """A COP and a USD account with one income each this month."""
+    ids = {}
+    for currency in ('COP', 'USD'):
+        response = client.post('/accounts/', headers=auth_headers, json={
+            'name': f'Banco {currency}', 'type': 'bank', 'currency_code': currency, 'balance': 0
+        })
+        ids[currency] = response.get_json()['id']
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0).isoformat()
+    for currency, amount in (('COP', 420000), ('USD', 100)):
+        response = client.post('/transactions/', headers=auth_headers, json={
+            'account_id': ids[currency], 'amount': amount, 'description': 'Salario', 'date': today
+        })
+        assert response.status_code == 201
+    return ids
+
+
+def test_monthly_figures_are_converted_to_the_base_currency(client, auth_headers, accounts):
+    cop = client.get('/dashboard/', headers=auth_headers).get_json()
+    usd = client.get('/dashboard/?currency=USD', headers=auth_headers).get_json()
+
+    assert cop['metrics']['currency'] == 'COP'
+    assert usd['metrics']['currency'] == 'USD'
+    rate = cop['metrics']['monthly_income'] / usd['metrics']['monthly_income']
+    assert cop['metrics']['monthly_income'] == pytest.approx(420000 + 100 * rate)
+    assert cop['cashflow_history'][-1]['income'] == pytest.approx(cop['metrics']['monthly_income'])
+    assert usd['cashflow_history'][-1]['income'] == pytest.approx(usd['metrics']['monthly_income'])
+    assert rate != pytest.approx(1.0)
+
+
+def test_base_currency_is_stored_on_the_profile(client, auth_headers, accounts):
+    assert client.get('/auth/me', headers=auth_headers).get_json()['base_currency'] is None
+
+    response = client.put('/auth/profile', headers=auth_headers, json={'base_currency': 'usd'})
+    assert response.status_code == 200
+    assert response.get_json()['user']['base_currency'] == 'USD'
+    assert client.get('/dashboard/', headers=auth_headers).get_json()['metrics']['currency'] == 'USD'
+    # An explicit ?currency= still wins
+    assert client.get('/dashboard/?currency=EUR', headers=auth_headers).get_json()['metrics']['currency'] == 'EUR'
+
+    response = client.put('/auth/profile', headers=auth_headers, json={'base_currency': 'XYZ'})
+    assert response.status_code == 400
+    client.put('/auth/profile', headers=auth_headers, json={'base_currency': None})
+    assert client.get('/dashboard/', headers=auth_headers).get_json()['metrics']['currency'] == 'COP'
@@ -0,0 +1,116 @@
+import io
+from datetime import datetime
+
+import pytest
+
+from extensions import db
+from models import Account, Transaction
+from services.duplicate_service import DuplicateService
+from services.import_service import ImportService
+
+DAY = datetime(2026, 3, 1)
+
+
+def row(description='Café', amount=-5000, date=DAY, account_id=1):
+    return {'account_id': account_id, 'date': date, 'amount': amount, 'description': description}
+
+
+@pytest.fixture
+def account(client, auth_headers, app):
+    account_id = client.post('/accounts/', headers=auth_headers, json={'name': 'Banco', 'type': 'bank', 'balance': 0}).get_json()['id']
+    with app.app_context():
+        return db.session.get(Account, account_id).user_id, account_id
+
+
+def test_identical_rows_get_occurrence_numbers():
+    rows = DuplicateService.fingerprint_rows([row(), row('cafe'), row('Pan')])
+
+    first, second, other = (r['fingerprint'] for r in rows)
+    assert first == DuplicateService.fingerprint(1, DAY, -5000, 'Café')
+    # Same normalized description: the second one is occurrence 2
+    assert second == DuplicateService.fingerprint(1, DAY, -5000, 'Café', 2)
+    assert len({first, second, other}) == 3
+
+
+def test_occurrences_continue_across_chunks():
+    seen = {}
+    first = DuplicateService.fingerprint_rows([row()], seen)[0]['fingerprint']
+    second = DuplicateService.fingerprint_rows([row()], seen)[0]['fingerprint']
+    assert (first, second) == (
+        DuplicateService.fingerprint(1, DAY, -5000, 'Café'),
+        DuplicateService.fingerprint(1, DAY, -5000, 'Café', 2)
+    )
+
+
+CSV = b"date,description,amount\n2026-03-01,Cafe,-5000\n2026-03-01,Pan,-2000\n2026-03-01,Cafe,-5000\n"
+
+
+@pytest.mark.parametrize('chunk_size', [1000, 1])
+def test_reimport_maps_identical_rows_onto_the_same_fingerprints(app, account, chunk_size):
+    user_id, account_id = account
+    with app.app_context():
+        first = ImportService.import_statement(user_id, account_id, io.BytesIO(CSV), chunk_size=chunk_size)
+        again = ImportService.import_statement(user_id, account_id, io.BytesIO(CSV), chunk_size=chunk_size)
+
+        assert (first['imported'], first['duplicates']) == (3, 0)
+        assert (again['imported'], again['duplicates']) == (0, 3)
+        assert Transaction.query.filter_by(account_id=account_id).count() == 3
+
+
+def test_free_fingerprint_skips_used_occurrences(app, account, client, auth_headers):
+    user_id, account_id = account
+    for _ in range(2):
+        client.post('/transactions/', headers=auth_headers, json={
+            'account_id': account_id, 'amount': -5000, 'description': 'Café', 'date': '2026-03-01',
+            'allow_duplicate': True
+        })
+    with app.app_context():
+        ids = [t.id for t in Transaction.query.filter_by(account_id=account_id).order_by(Transaction.id)]
+        assert DuplicateService.free_fingerprint(account_id, DAY, -5000, 'Café') == \
+            DuplicateService.fingerprint(account_id, DAY, -5000, 'Café', 3)
+        # A row never collides with its own fingerprint
+        assert DuplicateService.free_fingerprint(account_id, DAY, -5000, 'Café', exclude_id=ids[0]) == \
+            DuplicateService.fingerprint(account_id, DAY, -5000, 'Café')
+
+
+def test_edit_onto_an_existing_row_takes_the_next_occurrence(app, account, client, auth_headers):
+    _, account_id = account
+    ids = [client.post('/transactions/', headers=auth_headers, json={
+        'account_id': account_id, 'amount': -5000, 'description': description, 'date': '2026-03-01'
+    }).get_json()['id'] for description in ('Café', 'Pan')]
+
+    response = client.put(f'/transactions/{ids[1]}', headers=auth_headers, json={'description': 'Cafe'})
+    assert response.status_code == 200
+
+    with app.app_context():
+        assert db.session.get(Transaction, ids[1]).fingerprint == DuplicateService.fingerprint(account_id, DAY, -5000, 'Café', 2)
+    # Creating the same row again is now a duplicate of the first
+    response = client.post('/transactions/', headers=auth_headers, json={
+        'account_id': account_id, 'amount': -5000, 'description': 'Café', 'date': '2026-03-01'
+    })
+    assert response.status_code == 409
+
+
+def test_near_duplicates_inside_the_window_only(app, account, client, auth_headers):
+    user_id, account_id = account
+    for description, amount, date in [
+        ('Netflix suscripcion', -30000, '2026-03-01'),
+        ('NETFLIX.COM suscripcion', -30000, '2026-03-02'),   # flagged: next day, same amount
+        ('Netflix suscripcion', -30000, '2026-03-10'),       # outside the 2-day window
+        ('Netflix suscripcion', -31000, '2026-03-11'),       # amount differs
+        ('Panaderia', -30000, '2026-03-01'),                 # description differs
+    ]:
+        client.post('/transactions/', headers=auth_headers, json={
+            'account_id': account_id, 'amount': amount, 'description': description, 'date': date
+        })
+    with app.app_context():
+        ids = {(t.description, t.date.day): t.id for t in Transaction.query.filter_by(account_id=account_id)}
+        pairs = DuplicateService.find_near_duplicates(user_id)
+        assert [p['transaction_ids'] for p in pairs] == [
+            sorted([ids[('Netflix suscripcion', 1)], ids[('NETFLIX.COM suscripcion', 2)]])
+        ]
+        assert pairs[0]['days_apart'] == 1
+
+        tolerant = DuplicateService.find_near_duplicates(user_id, amount_tolerance=1000)
+        assert sorted([ids[('Netflix suscripcion', 10)], ids[('Netflix suscripcion', 11)]]) in \
+            [p['transaction_ids'] for p in tolerant]
@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.mark.parametrize('amount', ['nan', 'inf', '-Infinity', 1e308])
+def test_convert_batch_rejects_non_finite_amounts(client, auth_headers, amount):
+    response = client.post('/exchange-rates/convert/batch', headers=auth_headers, json={
+        'items': [{'amount': 10, 'from': 'USD', 'to': 'COP'}, {'amount': amount, 'from': 'USD', 'to': 'COP'}]
+    })
+    assert response.status_code == 400
+
+
+def test_convert_batch_converts_in_item_order(client, auth_headers):
+    response = client.post('/exchange-rates/convert/batch', headers=auth_headers, json={
+        'items': [{'amount': 10, 'from': 'USD', 'to': 'USD'}, {'amount': '2.5', 'from': 'eur', 'to': 'EUR'}]
+    })
+    assert response.status_code == 200
+    assert [r['converted'] for r in response.get_json()['results']] == [10, 2.5]
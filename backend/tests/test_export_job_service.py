@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from extensions import db
+from models import ExportJob, User
+from services.export_job_service import ExportJobService
+
+
+@pytest.fixture
+def user_id(app):
+    with app.app_context():
+        user = User(username='u', email='u@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def add_job(user_id, status, **fields):
+    job = ExportJob(user_id=user_id, kind='accounts', status=status, **fields)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def test_cleanup_keeps_old_jobs_with_a_recent_heartbeat(app, user_id):
+    now = datetime.utcnow()
+    with app.app_context():
+        queued = add_job(user_id, 'pending', created_at=now - timedelta(hours=3), heartbeat_at=now)
+        running = add_job(user_id, 'running', created_at=now - timedelta(hours=3),
+                          started_at=now - timedelta(hours=2), heartbeat_at=now)
+        dead = add_job(user_id, 'pending', created_at=now - timedelta(minutes=20),
+                       heartbeat_at=now - timedelta(minutes=10))
+        legacy = add_job(user_id, 'running', created_at=now - timedelta(hours=3),
+                         started_at=now - timedelta(minutes=1))
+
+        ExportJobService.cleanup(force=True)
+
+        status = {job.id: job.status for job in ExportJob.query}
+        assert status == {queued: 'pending', running: 'running', dead: 'failed', legacy: 'running'}
+
+
+def test_heartbeat_touches_only_this_workers_live_jobs(app, user_id):
+    old = datetime.utcnow() - timedelta(hours=1)
+    with app.app_context():
+        mine = add_job(user_id, 'pending', worker=ExportJobService.worker_id(), heartbeat_at=old)
+        other = add_job(user_id, 'pending', worker='elsewhere:1', heartbeat_at=old)
+        finished = add_job(user_id, 'done', worker=ExportJobService.worker_id(), heartbeat_at=old)
+
+        assert ExportJobService.heartbeat() == 1
+
+        beats = {job.id: job.heartbeat_at for job in ExportJob.query}
+        assert beats[mine] > old
+        assert beats[other] == beats[finished] == old
@@ -0,0 +1,120 @@
+import io
+
+import pytest
+
+from extensions import db
+from models import Account, Transaction
+from services.import_service import ImportService, BANK_PROFILES, parse_csv, parse_ofx
+from services.transaction_service import TransactionService
+
+CSV = b"date,description,amount\n" + b"".join(
+    f"2026-03-{day:02d},Compra {day},-{day}000\n".encode() for day in range(1, 7)
+)
+
+
+@pytest.fixture
+def account_id(client, auth_headers):
+    response = client.post('/accounts/', json={'name': 'Banco', 'type': 'bank', 'balance': 0}, headers=auth_headers)
+    return response.get_json()['id']
+
+
+@pytest.fixture
+def failing_second_chunk(monkeypatch):
+    """create_batch fails the second row of the second chunk it is given."""
+    original = TransactionService.create_batch
+    calls = []
+
+    def create_batch(user_id, items, **kwargs):
+        calls.append(len(items))
+        if len(calls) == 2:
+            return [{"index": i, "status": "ok"} for i in range(len(items) - 1)] + \
+                   [{"index": len(items) - 1, "status": "error", "msg": "boom"}], False
+        return original(user_id, items, **kwargs)
+
+    monkeypatch.setattr(TransactionService, 'create_batch', staticmethod(create_batch))
+    return calls
+
+
+def test_failed_chunk_keeps_committed_rows_and_reports_line(app, account_id, failing_second_chunk):
+    with app.app_context():
+        user_id = db.session.get(Account, account_id).user_id
+        stats = ImportService.import_statement(user_id, account_id, io.BytesIO(CSV), chunk_size=2)
+
+        assert stats["imported"] == 2
+        assert stats["error"] == {"line": 5, "msg": "boom"}
+        assert Transaction.query.filter_by(account_id=account_id).count() == 2
+        assert failing_second_chunk == [2, 2]  # stopped at the failing chunk
+
+
+def test_endpoint_answers_207_with_partial_stats(client, auth_headers, account_id, failing_second_chunk, monkeypatch):
+    original = ImportService.import_statement
+    monkeypatch.setattr(ImportService, 'import_statement', staticmethod(
+        lambda *args, **kwargs: original(*args, chunk_size=2, **kwargs)
+    ))
+    response = client.post('/import/', headers=auth_headers, data={
+        'account_id': account_id, 'file': (io.BytesIO(CSV), 'statement.csv')
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 207
+    body = response.get_json()
+    assert body["imported"] == 2
+    assert body["error"] == {"line": 5, "msg": "boom"}
+
+
+def test_complete_import_has_no_error(client, auth_headers, account_id):
+    response = client.post('/import/', headers=auth_headers, data={
+        'account_id': account_id, 'file': (io.BytesIO(CSV), 'statement.csv')
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 201
+    assert response.get_json()["imported"] == 6
+    assert "error" not in response.get_json()
+
+
+def parsed(rows):
+    return [(line, row["amount"] if row else None, error) for line, row, error in rows]
+
+
+def test_missing_and_non_finite_amounts_are_row_errors():
+    csv_file = (b"date,description,amount\n2026-03-01,Vacia,\n2026-03-02,Infinito,inf\n"
+                b"2026-03-03,Nada,nan\n2026-03-04,Bien,-10.5\n")
+    rows = parsed(parse_csv(io.BytesIO(csv_file), BANK_PROFILES['generic']))
+
+    assert [(line, amount) for line, amount, _ in rows] == [(2, None), (3, None), (4, None), (5, -10.5)]
+    assert rows[0][2] == "Missing amount"
+
+
+def test_credit_debit_pair_needs_one_side():
+    csv_file = ("fecha;descripcion;debito;credito\n01/03/2026;Compra;1.500,50;\n"
+                "02/03/2026;Abono;;200\n03/03/2026;Nada;;\n").encode('latin-1')
+    rows = parsed(parse_csv(io.BytesIO(csv_file), BANK_PROFILES['davivienda']))
+
+    assert rows == [(2, -1500.5, None), (3, 200.0, None), (4, None, "Missing amount")]
+
+
+def test_ofx_transaction_without_amount_is_an_error():
+    ofx = (b"<OFX><STMTTRN><DTPOSTED>20260301<NAME>Sin monto</STMTTRN>"
+           b"<STMTTRN><DTPOSTED>20260302<TRNAMT>-20.00<NAME>Con monto</STMTTRN></OFX>")
+    rows = parsed(parse_ofx(io.BytesIO(ofx)))
+
+    assert [(amount, error) for _, amount, error in rows] == [(None, "Missing amount"), (-20.0, None)]
+
+
+def test_unexpected_chunk_error_keeps_committed_rows(app, account_id, monkeypatch):
+    original = TransactionService.create_batch
+    calls = []
+
+    def create_batch(user_id, items, **kwargs):
+        calls.append(len(items))
+        if len(calls) == 2:
+            raise OverflowError("boom")
+        return original(user_id, items, **kwargs)
+
+    monkeypatch.setattr(TransactionService, 'create_batch', staticmethod(create_batch))
+    with app.app_context():
+        user_id = db.session.get(Account, account_id).user_id
+        stats = ImportService.import_statement(user_id, account_id, io.BytesIO(CSV), chunk_size=2)
+
+        assert stats["imported"] == 2
+        assert stats["error"] == {"line": 4, "msg": "boom"}
+        assert Transaction.query.filter_by(account_id=account_id).count() == 2
@@ -0,0 +1,46 @@
+import pytest
+
+
+@pytest.fixture
+def goals(client, auth_headers):
+    for i in range(120):
+        response = client.post('/savings-goals/', headers=auth_headers, json={
+            'name': f'Meta {i}', 'target_amount': 1000 + i
+        })
+        assert response.status_code == 201
+
+
+def test_savings_goals_are_unpaged_by_default(client, auth_headers, goals):
+    response = client.get('/savings-goals/', headers=auth_headers)
+    assert len(response.get_json()) == 120
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_savings_goals_page_when_limit_is_sent(client, auth_headers, goals):
+    seen = []
+    response = client.get('/savings-goals/?limit=50', headers=auth_headers)
+    while True:
+        page = response.get_json()
+        assert len(page) <= 50
+        seen += [g['id'] for g in page]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+        response = client.get(f'/savings-goals/?limit=50&cursor={cursor}', headers=auth_headers)
+    assert len(seen) == len(set(seen)) == 120
+
+
+def test_recurring_are_unpaged_by_default(client, auth_headers):
+    account_id = client.post('/accounts/', headers=auth_headers, json={
+        'name': 'Banco', 'type': 'bank', 'balance': 0
+    }).get_json()['id']
+    for i in range(105):
+        response = client.post('/recurring/', headers=auth_headers, json={
+            'name': f'Pago {i}', 'amount': -1000, 'account_id': account_id,
+            'frequency': 'monthly', 'start_date': '2026-01-01'
+        })
+        assert response.status_code == 201
+
+    response = client.get('/recurring/', headers=auth_headers)
+    assert len(response.get_json()) == 105
+    assert 'X-Next-Cursor' not in response.headers
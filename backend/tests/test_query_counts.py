@@ -0,0 +1,73 @@
+"""List endpoints must issue the same number of queries whatever the page size (no per-row loads)."""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from extensions import db
+
+
+@contextmanager
+def count_queries(app):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture
+def account_id(client, auth_headers):
+    accounts = [
+        client.post('/accounts/', headers=auth_headers, json={'name': f'Cuenta {i}', 'type': 'bank', 'balance': 0}).get_json()['id']
+        for i in range(3)
+    ]
+    categories = [
+        client.post('/categories/', headers=auth_headers, json={'name': f'Cat {i}', 'type': 'expense'}).get_json()['id']
+        for i in range(4)
+    ]
+    items = []
+    for i in range(80):
+        item = {
+            'account_id': accounts[0] if i % 4 else accounts[1 + i % 2],
+            'amount': -(i + 1),
+            'category_id': categories[i % 4] if i % 5 else None,
+            'description': f'pago tienda {i}',
+            'date': f'2026-0{1 + i % 6}-{1 + i % 28:02d}'
+        }
+        if i % 10 == 0:
+            item['splits'] = [{'amount': -(i + 1) / 2, 'category_id': categories[0]},
+                              {'amount': -(i + 1) / 2, 'category_id': categories[1]}]
+        items.append(item)
+    response = client.post('/transactions/batch', headers=auth_headers, json={'transactions': items})
+    assert response.status_code == 201, response.get_json()
+    return accounts[0]
+
+
+@pytest.mark.parametrize('path', [
+    '/transactions/?limit={limit}',
+    '/transactions/search?q=pago&per_page={limit}',
+    '/transactions/search?per_page={limit}',
+    '/accounts/{account_id}/transactions?limit={limit}',
+])
+def test_list_endpoints_issue_constant_queries(app, client, auth_headers, account_id, path):
+    # Warm up one-off lookups (search index availability, reference maps)
+    client.get(path.format(limit=1, account_id=account_id), headers=auth_headers)
+    counts = {}
+    for limit in (5, 50):
+        url = path.format(limit=limit, account_id=account_id)
+        with count_queries(app) as statements:
+            response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200, response.get_json()
+        rows = response.get_json()
+        rows = rows.get('transactions', rows) if isinstance(rows, dict) else rows
+        assert len(rows) == limit
+        counts[limit] = len(statements)
+    assert counts[5] == counts[50], counts
@@ -0,0 +1,81 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from extensions import db
+from models import ExchangeRate
+from services import rate_history_service
+from services.exchange_rate_service import SUPPORTED_CURRENCIES, ANCHOR_RATES, FALLBACK_EUR_RATES
+from services.rate_history_service import RateHistory
+from services.rate_matrix import RateMatrix
+
+DAY = datetime(2026, 3, 10)
+
+
+@pytest.fixture
+def history():
+    rows = [
+        ('USD', 'COP', DAY, 4000.0),
+        ('USD', 'COP', DAY + timedelta(hours=5), 4010.0),  # same day: the latest snapshot wins
+        ('USD', 'COP', DAY + timedelta(days=10), 4100.0),
+        ('EUR', 'USD', DAY, 1.10),
+    ]
+    history = RateHistory(rows)
+    history.fallback = RateMatrix.triangulated(SUPPORTED_CURRENCIES, {}, ANCHOR_RATES, FALLBACK_EUR_RATES)
+    return history
+
+
+def test_rate_at_bisects_by_day(history):
+    assert len(history) == 3
+    assert history.rate_at('USD', 'COP', DAY) == 4010.0
+    assert history.rate_at('USD', 'COP', DAY + timedelta(days=3)) == 4010.0
+    assert history.rate_at('USD', 'COP', DAY + timedelta(days=10, hours=1)) == 4100.0
+    # Before the first and after the last snapshot
+    assert history.rate_at('USD', 'COP', DAY - timedelta(days=30)) == 4010.0
+    assert history.rate_at('USD', 'COP', DAY + timedelta(days=365)) == 4100.0
+
+
+def test_inverse_pair_and_fallback_to_current_matrix(history):
+    assert history.rate_at('COP', 'USD', DAY) == pytest.approx(1 / 4010.0)
+    assert history.rate_at('EUR', 'EUR', DAY) == 1.0
+    assert history.rate_at('CZK', 'EUR', DAY) == pytest.approx(history.fallback.rate('CZK', 'EUR'))
+    with pytest.raises(KeyError):
+        history.rate_at('XYZ', 'EUR', DAY)
+    assert history.rates_at(['XYZ', 'CZK'], ['EUR', 'EUR'], [DAY, DAY]) == [
+        None, pytest.approx(history.fallback.rate('CZK', 'EUR'))
+    ]
+
+
+def test_vectorized_lookup_matches_scalar(history, monkeypatch):
+    pytest.importorskip('numpy')
+    rng = random.Random(7)
+    pairs = [('USD', 'COP'), ('COP', 'USD'), ('EUR', 'USD'), ('USD', 'EUR'), ('CZK', 'COP'), ('EUR', 'EUR')]
+    lookups = [rng.choice(pairs) for _ in range(300)]
+    dates = [DAY + timedelta(days=rng.randint(-20, 40)) for _ in lookups]
+    args = ([p[0] for p in lookups], [p[1] for p in lookups], dates)
+
+    vectorized = history.rates_at(*args)
+    monkeypatch.setattr(rate_history_service, 'np', None)
+    assert history.rates_at(*args) == pytest.approx(vectorized)
+    assert vectorized == pytest.approx([history.rate_at(f, t, d) for f, t, d in zip(*args)])
+
+
+def test_dashboard_converts_past_months_at_their_rate(client, auth_headers, app):
+    account = client.post('/accounts/', headers=auth_headers, json={
+        'name': 'Chase', 'type': 'bank', 'currency_code': 'USD', 'balance': 0
+    }).get_json()
+    month_start = datetime.utcnow().replace(day=1, hour=12, minute=0, second=0, microsecond=0)
+    last_month = (month_start - timedelta(days=1)).replace(day=5)
+    for date in (last_month, month_start):
+        client.post('/transactions/', headers=auth_headers, json={
+            'account_id': account['id'], 'amount': 100, 'description': 'Salario', 'date': date.isoformat()
+        })
+    with app.app_context():
+        db.session.add(ExchangeRate(currency_from='USD', currency_to='COP', rate=3000.0, date=last_month))
+        db.session.commit()
+
+    cashflow = client.get('/dashboard/', headers=auth_headers).get_json()['cashflow_history']
+
+    assert cashflow[-2]['income'] == pytest.approx(100 * 3000.0)
+    assert cashflow[-1]['income'] == pytest.approx(100 * 4200.0)  # current month: current rates
@@ -0,0 +1,145 @@
+import pytest
+
+from extensions import db
+from models import MonthlyRollup
+from services.rollup_service import RollupService
+
+
+@pytest.fixture
+def setup(client, auth_headers):
+    """An account, three categories and uncategorized transactions (created before any rule)."""
+    account = client.post('/accounts/', headers=auth_headers, json={'name': 'Banco', 'type': 'bank', 'balance': 0}).get_json()
+    categories = {
+        name: client.post('/categories/', headers=auth_headers, json={'name': name, 'type': 'expense'}).get_json()['id']
+        for name in ('Comida', 'Taxi', 'Otros')
+    }
+    transactions = {}
+    for i, (description, category) in enumerate([
+        ('Rappi pedido', None), ('Rappi pedido', None), ('Uber viaje', None),
+        ('Rappi taxi', None), ('Rappi pedido', 'Otros'), ('Uber viaje', 'Otros')
+    ]):
+        created = client.post('/transactions/', headers=auth_headers, json={
+            'account_id': account['id'], 'amount': -1000 * (i + 1), 'description': description,
+            'category_id': categories[category] if category else None, 'date': f'2026-0{i % 3 + 1}-10'
+        })
+        transactions.setdefault(description, []).append(created.get_json()['id'])
+    return categories, transactions
+
+
+def add_rule(client, auth_headers, pattern, category_id):
+    return client.post('/rules/', headers=auth_headers, json={'pattern': pattern, 'category_id': category_id}).get_json()['id']
+
+
+def recategorize(client, auth_headers, **body):
+    response = client.post('/transactions/recategorize', headers=auth_headers, json=body)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def categories_of(client, auth_headers):
+    rows = client.get('/transactions/?limit=100', headers=auth_headers).get_json()
+    rows = rows['transactions'] if isinstance(rows, dict) else rows
+    return {row['id']: row['category_id'] for row in rows}
+
+
+def assert_rollups_consistent(app):
+    def buckets():
+        return sorted(db.session.query(
+            MonthlyRollup.account_id, MonthlyRollup.category_id, MonthlyRollup.month,
+            MonthlyRollup.income, MonthlyRollup.expense, MonthlyRollup.income_count, MonthlyRollup.expense_count
+        ).filter((MonthlyRollup.income_count != 0) | (MonthlyRollup.expense_count != 0)).all(), key=repr)
+    with app.app_context():
+        maintained = buckets()
+        RollupService.rebuild()
+        db.session.commit()
+        assert buckets() == maintained
+
+
+def test_dry_run_counts_without_writing(client, auth_headers, setup):
+    categories, transactions = setup
+    rule_id = add_rule(client, auth_headers, 'rappi', categories['Comida'])
+    before = categories_of(client, auth_headers)
+
+    stats = recategorize(client, auth_headers, rule_id=rule_id, dry_run=True)
+
+    assert stats['dry_run'] is True
+    assert (stats['matched'], stats['updated']) == (3, 0)
+    assert len(stats['sample']) == 3
+    assert categories_of(client, auth_headers) == before
+
+
+def test_older_rule_keeps_its_matches(client, auth_headers, setup, app):
+    categories, transactions = setup
+    add_rule(client, auth_headers, 'taxi', categories['Taxi'])
+    rappi = add_rule(client, auth_headers, 'rappi', categories['Comida'])
+
+    stats = recategorize(client, auth_headers, rule_id=rappi)
+
+    assert stats['updated'] == 2  # "Rappi taxi" belongs to the older rule
+    current = categories_of(client, auth_headers)
+    assert current[transactions['Rappi taxi'][0]] is None
+    assert [current[i] for i in transactions['Rappi pedido']] == [categories['Comida']] * 2 + [categories['Otros']]
+    assert_rollups_consistent(app)
+
+
+def test_overwrite_recategorizes_categorized_rows(client, auth_headers, setup, app):
+    categories, transactions = setup
+    rule_id = add_rule(client, auth_headers, 'rappi pedido', categories['Comida'])
+
+    stats = recategorize(client, auth_headers, rule_id=rule_id, overwrite=True)
+
+    assert stats['updated'] == 3
+    current = categories_of(client, auth_headers)
+    assert {current[i] for i in transactions['Rappi pedido']} == {categories['Comida']}
+    assert_rollups_consistent(app)
+
+
+def test_remap_moves_transactions_and_rules(client, auth_headers, setup, app):
+    categories, transactions = setup
+    rule_id = add_rule(client, auth_headers, 'uber', categories['Otros'])
+
+    stats = recategorize(client, auth_headers, from_category_ids=[categories['Otros']],
+                         to_category_id=categories['Taxi'])
+
+    assert (stats['matched'], stats['updated'], stats['rules']) == (2, 2, 1)
+    current = categories_of(client, auth_headers)
+    assert categories['Otros'] not in current.values()
+    rules = client.get('/rules/', headers=auth_headers).get_json()
+    assert [r['category_id'] for r in rules if r['id'] == rule_id] == [categories['Taxi']]
+    assert_rollups_consistent(app)
+
+
+def test_remap_can_leave_rules(client, auth_headers, setup):
+    categories, _ = setup
+    rule_id = add_rule(client, auth_headers, 'uber', categories['Otros'])
+
+    stats = recategorize(client, auth_headers, from_category_ids=[categories['Otros']],
+                         to_category_id=categories['Taxi'], remap_rules=False)
+
+    assert stats['rules'] == 0
+    rules = client.get('/rules/', headers=auth_headers).get_json()
+    assert [r['category_id'] for r in rules if r['id'] == rule_id] == [categories['Otros']]
+
+
+def test_chunks_keep_rollups_consistent_when_a_run_fails(app, client, auth_headers, setup, monkeypatch):
+    from models import User
+    from services.recategorize_service import RecategorizeService
+    categories, _ = setup
+    original = RecategorizeService._move
+    calls = []
+
+    def failing_move(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("worker died")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(RecategorizeService, '_move', staticmethod(failing_move))
+    with app.app_context():
+        user_id = User.query.filter_by(username='tester').one().id
+        with pytest.raises(RuntimeError):
+            RecategorizeService.remap(user_id, [categories['Otros']], categories['Taxi'], chunk_size=1)
+        db.session.rollback()
+
+    assert list(categories_of(client, auth_headers).values()).count(categories['Otros']) == 1
+    assert_rollups_consistent(app)
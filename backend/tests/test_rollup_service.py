@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import MonthlyRollup, Account, AccountType, User
+from services.rollup_service import RollupService
+
+
+@pytest.fixture
+def account(app):
+    with app.app_context():
+        user = User(username='u', email='u@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        acc = Account(user_id=user.id, name='Banco', type=AccountType.BANK, balance=0)
+        db.session.add(acc)
+        db.session.commit()
+        return user.id, acc.id
+
+
+def buckets():
+    return db.session.query(
+        MonthlyRollup.category_id, MonthlyRollup.income, MonthlyRollup.expense,
+        MonthlyRollup.income_count, MonthlyRollup.expense_count
+    ).order_by(MonthlyRollup.id).all()
+
+
+def test_writes_to_one_bucket_accumulate_in_one_row(app, account):
+    user_id, account_id = account
+    with app.app_context():
+        key = RollupService._key(user_id, account_id, None, datetime(2026, 3, 5), None, None)
+        RollupService._apply(key, 100.0, 0.0, 1, 0)
+        RollupService._apply(key, 0.0, 40.0, 0, 1)
+        RollupService._apply(key, -100.0, 0.0, -1, 0)
+        db.session.commit()
+        assert buckets() == [(None, 0.0, 40.0, 0, 1)]
+
+
+def test_bucket_key_is_unique_with_null_category(app, account):
+    user_id, account_id = account
+    with app.app_context():
+        for _ in range(2):
+            db.session.add(MonthlyRollup(user_id=user_id, account_id=account_id, category_id=None, month='2026-03',
+                                         is_transfer=False, is_split=False))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+
+def test_rollups_match_rebuild(client, auth_headers, app):
+    acc = client.post('/accounts/', headers=auth_headers, json={'name': 'Banco', 'type': 'bank', 'balance': 0}).get_json()
+    cat = client.post('/categories/', headers=auth_headers, json={'name': 'Comida', 'type': 'expense'}).get_json()
+    ids = []
+    for i, (amount, category_id) in enumerate([(-10, cat['id']), (-5, None), (20, None), (-7, cat['id'])]):
+        created = client.post('/transactions/', headers=auth_headers, json={
+            'account_id': acc['id'], 'amount': amount, 'category_id': category_id,
+            'description': f'tx {i}', 'date': '2026-03-0%d' % (i + 1)
+        })
+        ids.append(created.get_json()['id'])
+    client.put(f'/transactions/{ids[1]}', headers=auth_headers, json={'category_id': cat['id']})
+    client.delete(f'/transactions/{ids[3]}', headers=auth_headers)
+
+    with app.app_context():
+        maintained = sorted(buckets(), key=repr)
+        RollupService.rebuild()
+        db.session.commit()
+        assert sorted(buckets(), key=repr) == maintained
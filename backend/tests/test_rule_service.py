@@ -0,0 +1,35 @@
+from services.rule_service import RuleMatcher
+
+
+def winner(rules, description):
+    found = RuleMatcher([(rule_id, pattern, 100 + rule_id, None) for rule_id, pattern in rules]).match(description)
+    return found[0] if found else None
+
+
+def test_overlapping_regex_keeps_oldest_rule():
+    # A newer rule matching earlier in the text must not hide an older one
+    assert winner([(1, r'exito\b'), (2, r'pago .*')], 'pago exito') == 1
+    assert winner([(1, 'b[c]'), (2, 'a.')], 'abc') == 1
+
+
+def test_regex_at_same_position_keeps_oldest_rule():
+    assert winner([(1, 'pago.*'), (2, 'pa.o')], 'pago luz') == 1
+    assert winner([(2, 'pago.*'), (1, 'pa.o')], 'pago luz') == 1
+
+
+def test_literal_and_regex_priority():
+    assert winner([(1, 'uber'), (2, r'uber\s+eats')], 'Uber Eats pedido') == 1
+    assert winner([(1, r'uber\s+eats'), (2, 'uber')], 'Uber Eats pedido') == 1
+    assert winner([(1, 'netflix'), (2, 'net')], 'NETFLIX.COM') == 1
+    assert winner([(2, 'netflix'), (1, 'net')], 'NETFLIX.COM') == 1
+
+
+def test_no_match_and_invalid_regex():
+    assert winner([(1, r'exito\b')], 'pago exitoso') is None
+    # An invalid regex is matched as plain text
+    assert winner([(1, 'cafe (')], 'cafe (centro)') == 1
+
+
+def test_numbered_backreference_matches_on_its_own():
+    assert winner([(1, r'(\d)\1'), (2, 'x.')], 'x 44') == 1
+    assert winner([(1, r'(\d)\1')], 'x 45') is None
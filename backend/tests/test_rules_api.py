@@ -0,0 +1,16 @@
+def test_create_and_update_return_category_name(client, auth_headers):
+    food = client.post('/categories/', headers=auth_headers, json={'name': 'Comida', 'type': 'expense'}).get_json()
+    taxi = client.post('/categories/', headers=auth_headers, json={'name': 'Taxi', 'type': 'expense'}).get_json()
+
+    created = client.post('/rules/', headers=auth_headers, json={'pattern': 'rappi', 'category_id': food['id']})
+    assert created.status_code == 201
+    assert created.get_json()['category_name'] == 'Comida'
+
+    rule_id = created.get_json()['id']
+    renamed = client.put(f'/rules/{rule_id}', headers=auth_headers, json={'pattern': 'rappi pay'}).get_json()
+    assert renamed['category_name'] == 'Comida'
+    moved = client.put(f'/rules/{rule_id}', headers=auth_headers, json={'category_id': taxi['id']}).get_json()
+    assert moved['category_name'] == 'Taxi'
+
+    listed = client.get('/rules/', headers=auth_headers).get_json()
+    assert [(r['id'], r['category_name']) for r in listed] == [(rule_id, 'Taxi')]
@@ -0,0 +1,105 @@
+import importlib.util
+import os
+
+import pytest
+from sqlalchemy import text
+
+from extensions import db
+from models import Category
+from services.search_service import SearchService
+
+MIGRATION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'migrations', 'versions', '035e7345e8b0_add_transaction_search_index.py')
+
+
+def install_from_migration():
+    spec = importlib.util.spec_from_file_location('search_index_migration', MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    for statement in migration.SQLITE_DDL:
+        db.session.execute(text(statement))
+    db.session.execute(text(migration.SQLITE_BACKFILL))
+
+
+@pytest.fixture(params=['migration', 'service', 'fallback'])
+def mode(request, app):
+    """Search index from the migration, from SearchService.install(), or none (ILIKE)."""
+    if request.param != 'fallback':
+        with app.app_context():
+            install_from_migration() if request.param == 'migration' else SearchService.install()
+            db.session.commit()
+            assert SearchService.available()
+    return request.param
+
+
+@pytest.fixture
+def data(client, auth_headers, mode):
+    account = client.post('/accounts/', headers=auth_headers, json={'name': 'Bancolombia', 'type': 'bank', 'balance': 0}).get_json()
+    category = client.post('/categories/', headers=auth_headers, json={'name': 'Educación', 'type': 'expense'}).get_json()
+    ids = {}
+    for i, description in enumerate(['Pago colegio', 'Pago colegio mensual', 'Mercado', 'Pago luz']):
+        response = client.post('/transactions/', headers=auth_headers, json={
+            'account_id': account['id'], 'amount': -1000 * (i + 1), 'description': description,
+            'category_id': category['id'] if 'colegio' in description else None, 'date': f'2026-03-0{i + 1}'
+        })
+        ids[description] = response.get_json()['id']
+    return account['id'], category['id'], ids
+
+
+def search(client, auth_headers, query, **params):
+    params = '&'.join(f'{key}={value}' for key, value in params.items())
+    response = client.get(f'/transactions/search?q={query}&{params}', headers=auth_headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def found(client, auth_headers, query):
+    return {tx['description'] for tx in search(client, auth_headers, query)['transactions']}
+
+
+def test_search_hits(client, auth_headers, data):
+    assert found(client, auth_headers, 'colegio') == {'Pago colegio', 'Pago colegio mensual'}
+    assert found(client, auth_headers, 'mercado') == {'Mercado'}
+    assert found(client, auth_headers, 'Bancolombia') == {'Pago colegio', 'Pago colegio mensual', 'Mercado', 'Pago luz'}
+    assert found(client, auth_headers, 'zapatos') == set()
+
+
+def test_prefix_terms_ignore_accents(client, auth_headers, data, mode):
+    if mode == 'fallback':
+        pytest.skip("ILIKE matches the whole string, not word prefixes")
+    assert found(client, auth_headers, 'educacion pag') == {'Pago colegio', 'Pago colegio mensual'}
+    assert found(client, auth_headers, 'col mens') == {'Pago colegio mensual'}
+
+
+def test_index_follows_updates_and_deletes(client, auth_headers, data):
+    _, _, ids = data
+    client.put(f"/transactions/{ids['Mercado']}", headers=auth_headers, json={'description': 'Tienda Ara'})
+    assert found(client, auth_headers, 'tienda') == {'Tienda Ara'}
+    assert found(client, auth_headers, 'mercado') == set()
+
+    client.delete(f"/transactions/{ids['Pago luz']}", headers=auth_headers)
+    assert found(client, auth_headers, 'luz') == set()
+
+
+def test_renamed_category_and_account_are_found(app, client, auth_headers, data):
+    account_id, category_id, _ = data
+    with app.app_context():
+        db.session.get(Category, category_id).name = 'Colegiaturas'
+        db.session.commit()
+    client.put(f'/accounts/{account_id}', headers=auth_headers, json={'name': 'Davivienda'})
+
+    assert found(client, auth_headers, 'colegiaturas') == {'Pago colegio', 'Pago colegio mensual'}
+    assert found(client, auth_headers, 'davivienda') == {'Pago colegio', 'Pago colegio mensual', 'Mercado', 'Pago luz'}
+    assert found(client, auth_headers, 'bancolombia') == set()
+
+
+def test_cursor_pages_in_relevance_order(client, auth_headers, data):
+    first = search(client, auth_headers, 'pago', sort='relevance', per_page=2)
+    assert len(first['transactions']) == 2 and first['has_more']
+    second = search(client, auth_headers, 'pago', sort='relevance', per_page=2, cursor=first['next_cursor'])
+    assert not second['has_more']
+
+    ids = [tx['id'] for tx in first['transactions'] + second['transactions']]
+    everything = search(client, auth_headers, 'pago', sort='relevance', per_page=50)['transactions']
+    assert ids == [tx['id'] for tx in everything]
+    assert len(ids) == len(set(ids)) == 3
@@ -0,0 +1,61 @@
+import pytest
+
+from services import suggest_service
+from services.suggest_service import SuggestService
+
+
+@pytest.fixture
+def account_id(client, auth_headers):
+    return client.post('/accounts/', headers=auth_headers, json={'name': 'Banco', 'type': 'bank', 'balance': 0}).get_json()['id']
+
+
+def create(client, auth_headers, account_id, description, amount=-1000, date='2026-03-01'):
+    response = client.post('/transactions/', headers=auth_headers, json={
+        'account_id': account_id, 'amount': amount, 'description': description, 'date': date,
+        'allow_duplicate': True
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['id']
+
+
+def suggest(client, auth_headers, prefix):
+    response = client.get(f'/transactions/suggest?prefix={prefix}', headers=auth_headers)
+    return [(s['description'], s['count']) for s in response.get_json()]
+
+
+def test_most_used_then_most_recent_first(client, auth_headers, account_id):
+    for day in (1, 2, 3):
+        create(client, auth_headers, account_id, 'Almuerzo', date=f'2026-03-0{day}')
+    create(client, auth_headers, account_id, 'Almacén', date='2026-03-05')
+    create(client, auth_headers, account_id, 'Alquiler', date='2026-03-04')
+    create(client, auth_headers, account_id, 'Taxi')
+
+    assert suggest(client, auth_headers, 'alm') == [('Almuerzo', 3), ('Almacén', 1)]
+    assert suggest(client, auth_headers, 'Al') == [('Almuerzo', 3), ('Almacén', 1), ('Alquiler', 1)]
+    assert suggest(client, auth_headers, 'x') == []
+
+
+def test_new_transactions_are_caught_up_without_rebuilding(app, client, auth_headers, account_id):
+    create(client, auth_headers, account_id, 'Coffee shop')
+    assert suggest(client, auth_headers, 'cof') == [('Coffee shop', 1)]
+    index = suggest_service._indexes.get(1)
+
+    create(client, auth_headers, account_id, 'Coffee shop', amount=-2000)
+    create(client, auth_headers, account_id, 'Cofre')
+
+    assert suggest(client, auth_headers, 'cof') == [('Coffee shop', 2), ('Cofre', 1)]
+    assert suggest_service._indexes.get(1) is index
+
+
+def test_edits_and_deletes_leave_the_index(client, auth_headers, account_id):
+    tx_id = create(client, auth_headers, account_id, 'Coffee shop')
+    create(client, auth_headers, account_id, 'Cine')
+    assert suggest(client, auth_headers, 'cof') == [('Coffee shop', 1)]
+
+    client.put(f'/transactions/{tx_id}', headers=auth_headers, json={'description': 'Groceries'})
+    assert suggest(client, auth_headers, 'cof') == []
+    assert suggest(client, auth_headers, 'gro') == [('Groceries', 1)]
+
+    client.delete(f'/transactions/{tx_id}', headers=auth_headers)
+    assert suggest(client, auth_headers, 'gro') == []
+    assert suggest(client, auth_headers, 'ci') == [('Cine', 1)]
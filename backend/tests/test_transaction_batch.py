@@ -0,0 +1,15 @@
+import pytest
+
+
+@pytest.mark.parametrize('amount', ['nan', 'inf', '-Infinity', '1e308'])
+def test_non_finite_amount_is_an_item_error(client, auth_headers, amount):
+    account = client.post('/accounts/', headers=auth_headers, json={'name': 'Banco', 'type': 'bank', 'balance': 0}).get_json()
+    response = client.post('/transactions/batch', headers=auth_headers, json={'transactions': [
+        {'account_id': account['id'], 'amount': -10, 'description': 'ok', 'date': '2026-03-01'},
+        {'account_id': account['id'], 'amount': amount, 'description': 'bad', 'date': '2026-03-01'}
+    ]})
+
+    assert response.status_code == 400
+    results = response.get_json()['results']
+    assert results[1] == {'index': 1, 'status': 'error', 'msg': 'Invalid amount'}
+    assert client.get('/transactions/', headers=auth_headers).get_json() == []
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { api } from '../services/api';
 import Modal from './Modal';
 import { formatNumberWithThousands, parseFormattedNumber } from '../utils/currency';
@@ -12,6 +12,8 @@ const TransactionModal = ({ isOpen, onClose, onSuccess, editTransaction = null }
     const [isCreatingCategory, setIsCreatingCategory] = useState(false);
     const [newCategoryName, setNewCategoryName] = useState('');
     const [errors, setErrors] = useState({});
+    const [suggestions, setSuggestions] = useState([]);
+    const pickedDescription = useRef(null);
     const toast = useToast();
 
     const isEditMode = !!editTransaction;
@@ -73,6 +75,38 @@ const TransactionModal = ({ isOpen, onClose, onSuccess, editTransaction = null }
         }
     }, [isOpen, editTransaction]);
 
+    // Sugerencias de descripción (solo al crear), con una pequeña espera entre teclas
+    useEffect(() => {
+        const prefix = formData.description.trim();
+        if (!isOpen || isEditMode || prefix.length < 2 || prefix === pickedDescription.current) {
+            setSuggestions([]);
+            return;
+        }
+        const timer = setTimeout(async () => {
+            try {
+                const res = await api.get(`/transactions/suggest?prefix=${encodeURIComponent(prefix)}&limit=6`);
+                setSuggestions(res);
+            } catch (err) {
+                setSuggestions([]);
+            }
+        }, 150);
+        return () => clearTimeout(timer);
+    }, [formData.description, isOpen, isEditMode]);
+
+    const applySuggestion = (suggestion) => {
+        pickedDescription.current = suggestion.description;
+        const account = accounts.find(a => a.id === suggestion.account_id);
+        setFormData(prev => ({
+            ...prev,
+            description: suggestion.description,
+            category_id: suggestion.category_id || prev.category_id,
+            account_id: account ? account.id : prev.account_id,
+            type: suggestion.amount > 0 ? 'income' : 'expense',
+            amount: prev.amount || formatNumberWithThousands(Math.abs(suggestion.amount), account?.currency_code || 'COP')
+        }));
+        setSuggestions([]);
+    };
+
     // Función helper para obtener el símbolo de la divisa
     const getCurrencySymbol = (currencyCode) => {
         const symbols = {
@@ -166,13 +200,21 @@ const TransactionModal = ({ isOpen, onClose, onSuccess, editTransaction = null }
                 toast.success('Transacción actualizada exitosamente');
             } else {
                 // Crear nueva transacción
-                await api.post('/transactions/', {
+                const payload = {
                     account_id: formData.account_id,
                     amount: finalAmount,
                     description: formData.description || '',
                     date: formData.date,
                     category_id: categoryIdToUse || null
-                });
+                };
+                try {
+                    await api.post('/transactions/', payload);
+                } catch (err) {
+                    // 409: ya existe una transacción igual (misma cuenta, fecha, monto y descripción)
+                    if (err.status !== 409) throw err;
+                    if (!confirm("Ya existe una transacción igual. ¿Guardarla de todas formas?")) return;
+                    await api.post('/transactions/', { ...payload, allow_duplicate: true });
+                }
                 toast.success('Transacción guardada exitosamente');
             }
             
@@ -357,7 +399,23 @@ const TransactionModal = ({ isOpen, onClose, onSuccess, editTransaction = null }
 
                 <div>
                     <label className="block text-sm mb-1 text-muted">Descripción</label>
-                    <input type="text" className="w-full bg-tertiary text-primary" value={formData.description} onChange={e => setFormData({ ...formData, description: e.target.value })} placeholder="Almuerzo, Salario, etc." />
+                    <input type="text" className="w-full bg-tertiary text-primary" value={formData.description} onChange={e => setFormData({ ...formData, description: e.target.value })} placeholder="Almuerzo, Salario, etc." autoComplete="off" />
+                    {suggestions.length > 0 && (
+                        <ul className="mt-1 rounded-lg border border-border-color/30 bg-bg-tertiary overflow-hidden">
+                            {suggestions.map(suggestion => (
+                                <li key={suggestion.description}>
+                                    <button
+                                        type="button"
+                                        onClick={() => applySuggestion(suggestion)}
+                                        className="w-full flex justify-between px-3 py-2 text-sm text-left text-primary hover:bg-accent-primary/10"
+                                    >
+                                        <span>{suggestion.description}</span>
+                                        <span className="text-xs text-muted">{suggestion.count}×</span>
+                                    </button>
+                                </li>
+                            ))}
+                        </ul>
+                    )}
                 </div>
 
                 <button 
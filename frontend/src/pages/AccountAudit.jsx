@@ -97,7 +97,8 @@ const AccountAudit = () => {
         try {
             const params = new URLSearchParams({
                 q: searchQuery,
-                per_page: '100'
+                per_page: '100',
+                include_total: 'true'
             });
             
             if (filters.startDate) params.append('start_date', filters.startDate);
@@ -72,8 +72,9 @@ const Dashboard = () => {
 
     const { metrics, debt_status, cashflow_history = [], top_expenses, budget_status } = data;
 
-    // Format currency
-    const formatCurrency = (val) => new Intl.NumberFormat('es-CO', { style: 'currency', currency: 'COP', maximumFractionDigits: 0 }).format(val || 0);
+    // Format currency (metrics, cashflow, top expenses and budgets come in the base currency)
+    const baseCurrency = metrics.currency || 'COP';
+    const formatCurrency = (val, code = baseCurrency) => new Intl.NumberFormat(code === 'COP' ? 'es-CO' : 'en-US', { style: 'currency', currency: code, maximumFractionDigits: 0 }).format(val || 0);
 
     // Calculate max value for cashflow chart (outside map for efficiency)
     const cashflowMaxVal = cashflow_history.length > 0 
@@ -396,8 +397,8 @@ const Dashboard = () => {
                                     ></div>
                                 </div>
                                 <div className="flex justify-between text-xs text-muted mt-1">
-                                    <span>{formatCurrency(item.current_debt)}</span>
-                                    <span>Cupo: {formatCurrency(item.limit)}</span>
+                                    <span>{formatCurrency(item.current_debt, item.currency)}</span>
+                                    <span>Cupo: {formatCurrency(item.limit, item.currency)}</span>
                                 </div>
                             </div>
                         ))}
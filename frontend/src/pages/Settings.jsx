@@ -20,7 +20,7 @@ const Settings = () => {
 
     // Profile state
     const [profile, setProfile] = useState(null);
-    const [profileForm, setProfileForm] = useState({ username: '', email: '' });
+    const [profileForm, setProfileForm] = useState({ username: '', email: '', base_currency: 'COP' });
     const [isEditingProfile, setIsEditingProfile] = useState(false);
     const [profileSaving, setProfileSaving] = useState(false);
 
@@ -61,7 +61,7 @@ const Settings = () => {
             setCategories(categoriesRes);
             setSavingsGoals(goalsRes);
             setProfile(profileRes);
-            setProfileForm({ username: profileRes.username, email: profileRes.email });
+            setProfileForm({ username: profileRes.username, email: profileRes.email, base_currency: profileRes.base_currency || 'COP' });
         } catch (err) {
             console.error(err);
             toast.error('Error al cargar configuración');
@@ -461,6 +461,19 @@ const Settings = () => {
                                                         required
                                                     />
                                                 </div>
+                                                <div>
+                                                    <label className="block text-xs text-muted mb-1">Moneda del dashboard</label>
+                                                    <select
+                                                        className="w-full bg-bg-tertiary text-white text-sm rounded-lg px-3 py-2 border border-border-color/30 focus:border-accent-primary/50 focus:outline-none"
+                                                        value={profileForm.base_currency}
+                                                        onChange={e => setProfileForm({ ...profileForm, base_currency: e.target.value })}
+                                                    >
+                                                        <option value="COP">🇨🇴 Peso Colombiano (COP)</option>
+                                                        <option value="CZK">🇨🇿 Corona Checa (CZK)</option>
+                                                        <option value="EUR">🇪🇺 Euro (EUR)</option>
+                                                        <option value="USD">🇺🇸 Dólar (USD)</option>
+                                                    </select>
+                                                </div>
                                                 <div className="flex gap-2">
                                                     <button
                                                         type="submit"
@@ -473,7 +486,7 @@ const Settings = () => {
                                                         type="button"
                                                         onClick={() => {
                                                             setIsEditingProfile(false);
-                                                            setProfileForm({ username: profile.username, email: profile.email });
+                                                            setProfileForm({ username: profile.username, email: profile.email, base_currency: profile.base_currency || 'COP' });
                                                         }}
                                                         className="btn btn-secondary text-xs py-1.5 px-3"
                                                     >
@@ -485,6 +498,7 @@ const Settings = () => {
                                             <>
                                                 <h4 className="font-bold text-white text-lg">{profile.username}</h4>
                                                 <p className="text-sm text-muted">{profile.email}</p>
+                                                <p className="text-xs text-muted mt-1">Moneda del dashboard: {profile.base_currency || 'COP'}</p>
                                                 <p className="text-xs text-muted mt-1">
                                                     Miembro desde {profile.created_at ? new Date(profile.created_at).toLocaleDateString('es-CO', { year: 'numeric', month: 'long' }) : 'N/A'}
                                                 </p>